@@ -1,46 +1,136 @@
 import os
 import json
 import re
+import time
+import logging
 from dotenv import load_dotenv
-import google.generativeai as genai
+from backends import create_backend
+from cache import get_evaluation_cache, make_cache_key, normalize_text
+from ratelimit import call_with_retry, get_rate_limiter
+from jsonstream import StreamingJSONParser
+from metrics import ERRORS, STAGE_SECONDS, record_llm_usage
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
-# Set up Gemini API key
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+MODEL_NAME = 'gemini-2.5-pro-exp-03-25'
+# Bump whenever the evaluation prompt changes so cached results are not reused
+PROMPT_VERSION = "1"
+# Approximate input-token budget for one multi-resume request (job description included)
+BATCH_TOKEN_BUDGET = int(os.getenv("EVALUATION_BATCH_TOKEN_BUDGET", "24000"))
+# Upper bound on resumes packed into one request, whatever their size
+BATCH_MAX_RESUMES = int(os.getenv("EVALUATION_BATCH_MAX_RESUMES", "8"))
+# Output tokens reserved per call when taking quota; corrected from usage metadata afterwards
+OUTPUT_TOKEN_ESTIMATE = int(os.getenv("GEMINI_OUTPUT_TOKEN_ESTIMATE", "800"))
+
+
+def estimate_tokens(text):
+    """Rough token count for budgeting (about four characters per token)."""
+    return len(text or "") // 4 + 1
+
+
+def plan_batches(resume_texts, job_description, token_budget=BATCH_TOKEN_BUDGET, max_batch_size=BATCH_MAX_RESUMES):
+    """
+    Group resumes into batches that fit one prompt each.
+
+    The job description is counted once per batch. A resume that does not fit
+    in the budget on its own still gets a batch of its own.
+
+    Args:
+        resume_texts (list): Resume texts
+        job_description (str): Job description text
+        token_budget (int, optional): Approximate input tokens allowed per batch
+        max_batch_size (int, optional): Maximum resumes per batch
+
+    Returns:
+        list: Lists of indices into resume_texts, in input order
+    """
+    base = estimate_tokens(job_description) + 300  # instructions and framing
+    batches = []
+    current, used = [], base
+    for index, text in enumerate(resume_texts):
+        tokens = estimate_tokens(text) + 20
+        if current and (used + tokens > token_budget or len(current) >= max(1, max_batch_size)):
+            batches.append(current)
+            current, used = [], base
+        current.append(index)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
 
 class TalentEvaluationAgent:
     """AI agent for evaluating candidate resumes against job descriptions using Gemini. """
     
-    def __init__(self):
-        # Initialize Gemini model
-        self.api_key = GEMINI_API_KEY
-        if self.is_configured():
-            self.model = genai.GenerativeModel('gemini-2.5-pro-exp-03-25')
-        else:
-            self.model = None
+    def __init__(self, cache=None, rate_limiter=None, backend=None):
+        # Evaluator backend selected by EVALUATOR_BACKEND: Gemini, or the offline fake
+        self.backend = backend if backend is not None else create_backend(MODEL_NAME)
+        self.model_name = getattr(self.backend, 'model_name', MODEL_NAME)
+        self.model = self.backend if self.is_configured() else None
+        # Shared two-tier cache of previous evaluations (None when disabled)
+        self.cache = cache if cache is not None else get_evaluation_cache()
+        # Process-wide RPM/TPM limiter shared by every agent (and, via its state file, every process)
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
     
     def is_configured(self):
-        """Check if the agent has a valid API key configured."""
-        return self.api_key is not None and self.api_key.strip() != ""
+        """Check if the agent's backend is usable (for Gemini: an API key is configured)."""
+        return self.backend.is_configured()
     
-    def evaluate_resume(self, resume_text, job_description):
+    def _generate(self, prompt, **kwargs):
+        """Call Gemini under the shared rate limiter, retrying quota and transient errors."""
+        response, _ = self._generate_with_estimate(prompt, **kwargs)
+        return response
+
+    def _generate_stream(self, prompt, **kwargs):
         """
-        Evaluate a resume against a job description.
-        
-        Args:
-            resume_text (str): Text content of the resume
-            job_description (str): Job description text
-            
+        Start a streamed Gemini call under the shared rate limiter.
+
         Returns:
-            tuple: (score, feedback) where score is a float from 1-10 and feedback is a string
+            tuple: (response, estimated tokens); pass both to _record_usage() once
+                the stream has been read to the end
         """
-        if not self.is_configured():
-            return 0, "Gemini API key not configured. Please set the GEMINI_API_KEY in your .env file."
-            
-        prompt = f"""
+        return self._generate_with_estimate(prompt, stream=True, **kwargs)
+
+    def _record_usage(self, response, estimated):
+        """Count a response's tokens and correct the rate limiter's estimate for the call."""
+        usage = getattr(response, 'usage_metadata', None)
+        record_llm_usage(usage)
+        used = getattr(usage, 'total_token_count', None)
+        if isinstance(used, int) and used > 0:
+            self.rate_limiter.adjust(used - estimated)
+
+    def _generate_with_estimate(self, prompt, **kwargs):
+        estimated = estimate_tokens(prompt) + OUTPUT_TOKEN_ESTIMATE
+        stream = kwargs.get('stream', False)
+
+        def call():
+            try:
+                if stream:
+                    # Timed by the caller, which reads the stream
+                    return self.model.generate_content(prompt, **kwargs)
+                with STAGE_SECONDS.time(stage="llm_call"):
+                    return self.model.generate_content(prompt, **kwargs)
+            except Exception as e:
+                if not stream:  # Streamed calls count their errors where the stream is read
+                    ERRORS.inc(stage="llm_call", type=type(e).__name__)
+                raise
+
+        response = call_with_retry(call, self.rate_limiter, estimated)
+        # A streamed response only knows its usage once it has been read to the end
+        if not stream:
+            self._record_usage(response, estimated)
+        return response, estimated
+
+    def _cache_key(self, resume_text, job_description):
+        if self.cache is None:
+            return None
+        return make_cache_key(normalize_text(resume_text), job_description, self.model_name, PROMPT_VERSION)
+
+    def _evaluation_prompt(self, resume_text, job_description):
+        return f"""
         You are an expert recruiter. You need to evaluate a resume against a job description.
         
         Job Description:
@@ -58,10 +148,32 @@ class TalentEvaluationAgent:
             "feedback": "<detailed feedback explaining the score>"
         }}
         """
+
+    def evaluate_resume(self, resume_text, job_description):
+        """
+        Evaluate a resume against a job description.
+        
+        Args:
+            resume_text (str): Text content of the resume
+            job_description (str): Job description text
+            
+        Returns:
+            tuple: (score, feedback) where score is a float from 1-10 and feedback is a string
+        """
+        if not self.is_configured():
+            return 0, "Gemini API key not configured. Please set the GEMINI_API_KEY in your .env file."
+
+        cache_key = self._cache_key(resume_text, job_description)
+        if cache_key is not None:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached[0], cached[1]
+            
+        prompt = self._evaluation_prompt(resume_text, job_description)
         
         try:
             # Generate response from Gemini
-            response = self.model.generate_content(prompt)
+            response = self._generate(prompt)
             result = response.text
             
             # Extract JSON part from the response
@@ -71,11 +183,254 @@ class TalentEvaluationAgent:
                 json_str = json_match.group(0)
                 try:
                     rating_data = json.loads(json_str)
-                    return rating_data.get("score", 0), rating_data.get("feedback", "No feedback provided")
+                    score, feedback = rating_data.get("score", 0), rating_data.get("feedback", "No feedback provided")
+                    # Only successful evaluations are cached; errors are retried next time
+                    if cache_key is not None:
+                        self.cache.set(cache_key, [score, feedback])
+                    return score, feedback
                 except json.JSONDecodeError:
+                    ERRORS.inc(stage="llm_response", type="parse_error")
                     return 0, "Error parsing AI response."
             else:
+                ERRORS.inc(stage="llm_response", type="format_error")
                 return 0, "AI response format error."
                 
         except Exception as e:
-            return 0, f"Error: {str(e)}" 
\ No newline at end of file
+            logger.error(f"Resume evaluation failed: {str(e)}")
+            return 0, f"Error: {str(e)}" 
+
+    def evaluate_resume_stream(self, resume_text, job_description):
+        """
+        Evaluate a resume like evaluate_resume(), reporting the answer as it is generated.
+
+        The model response is streamed through an incremental JSON parser, so the
+        score is available as soon as that field is complete and the feedback
+        follows piece by piece.
+
+        Args:
+            resume_text (str): Text content of the resume
+            job_description (str): Job description text
+
+        Yields:
+            tuple: (event, data) where event is 'score' ({"score"}), 'feedback'
+                ({"text"}: the next piece of feedback) or, last, 'done'
+                ({"score", "feedback"}: the same values evaluate_resume() returns)
+        """
+        if not self.is_configured():
+            yield 'done', {"score": 0, "feedback": "Gemini API key not configured. Please set the GEMINI_API_KEY in your .env file."}
+            return
+
+        cache_key = self._cache_key(resume_text, job_description)
+        cached = self.cache.get(cache_key) if cache_key is not None else None
+        if cached is not None:
+            yield 'score', {"score": cached[0]}
+            yield 'feedback', {"text": cached[1]}
+            yield 'done', {"score": cached[0], "feedback": cached[1]}
+            return
+
+        prompt = self._evaluation_prompt(resume_text, job_description)
+        parser = StreamingJSONParser(stream_fields=("feedback",))
+        chunks = []
+        started = time.perf_counter()
+        try:
+            response, estimated = self._generate_stream(prompt)
+            for chunk in response:
+                text = chunk.text
+                chunks.append(text)
+                for kind, key, value in parser.feed(text):
+                    if kind == 'value' and key == 'score':
+                        yield 'score', {"score": value}
+                    elif kind == 'text' and key == 'feedback':
+                        yield 'feedback', {"text": value}
+        except Exception as e:
+            ERRORS.inc(stage="llm_call", type=type(e).__name__)
+            logger.error(f"Streamed resume evaluation failed: {str(e)}")
+            yield 'done', {"score": 0, "feedback": f"Error: {str(e)}"}
+            return
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_call")
+        self._record_usage(response, estimated)
+
+        if "score" in parser.values:
+            score = parser.values["score"]
+            feedback = parser.values.get("feedback", "No feedback provided")
+        else:
+            # The parser never saw a complete object; fall back to the non-streaming extraction
+            json_match = re.search(r'\{.*\}', "".join(chunks), re.DOTALL)
+            try:
+                rating_data = json.loads(json_match.group(0)) if json_match else None
+            except json.JSONDecodeError:
+                rating_data = None
+            if rating_data is None:
+                ERRORS.inc(stage="llm_response", type="format_error" if json_match is None else "parse_error")
+                yield 'done', {"score": 0, "feedback": "AI response format error." if json_match is None else "Error parsing AI response."}
+                return
+            score, feedback = rating_data.get("score", 0), rating_data.get("feedback", "No feedback provided")
+            yield 'score', {"score": score}
+            yield 'feedback', {"text": feedback}
+
+        if cache_key is not None:
+            self.cache.set(cache_key, [score, feedback])
+        yield 'done', {"score": score, "feedback": feedback}
+
+    def condense_job_description(self, job_description):
+        """
+        Condense a scraped job description into a requirement profile.
+
+        Benefits, company boilerplate and legal text are dropped so that
+        evaluation prompts only carry what a resume is judged against.
+
+        Args:
+            job_description (str): Raw job description text
+
+        Returns:
+            dict: Profile with title, seniority, location_constraints, must_have,
+                nice_to_have and responsibilities, or None if it could not be built
+        """
+        if not self.is_configured():
+            return None
+
+        prompt = f"""
+        You are an expert recruiter. Condense the job posting below into the requirements a candidate is judged against.
+        Leave out benefits, salary, company marketing, equal-opportunity and other legal text.
+        Keep every concrete skill, technology, qualification and experience requirement.
+        
+        Job Posting:
+        {job_description}
+        
+        Your response should be in this exact JSON format:
+        {{
+            "title": "<job title>",
+            "seniority": "<seniority level and years of experience required>",
+            "location_constraints": "<on-site/remote/hybrid, locations, work authorization; empty if none>",
+            "must_have": ["<required skill or qualification>"],
+            "nice_to_have": ["<preferred skill or qualification>"],
+            "responsibilities": ["<key responsibility>"]
+        }}
+        """
+
+        try:
+            response = self._generate(
+                prompt,
+                generation_config={"response_mime_type": "application/json"}
+            )
+            json_match = re.search(r'\{.*\}', response.text, re.DOTALL)
+            profile = json.loads(json_match.group(0)) if json_match else None
+        except Exception as e:
+            logger.error(f"Error condensing job description: {str(e)}")
+            return None
+        if not isinstance(profile, dict) or not profile.get("must_have"):
+            return None
+        return profile
+
+    def evaluate_resumes_batch(self, resumes, job_description, token_budget=None, max_batch_size=None):
+        """
+        Evaluate several resumes against one job description, packing them into shared prompts.
+
+        Resumes are grouped under a token budget so the job description is sent
+        once per group rather than once per resume. Each group is answered with
+        a JSON array keyed by candidate id; if a response cannot be parsed, or
+        leaves a candidate out, those resumes fall back to evaluate_resume().
+
+        Args:
+            resumes (list): Resume texts
+            job_description (str): Job description text
+            token_budget (int, optional): Approximate input tokens per request.
+                Defaults to EVALUATION_BATCH_TOKEN_BUDGET.
+            max_batch_size (int, optional): Maximum resumes per request.
+                Defaults to EVALUATION_BATCH_MAX_RESUMES.
+
+        Returns:
+            list: (score, feedback) tuples in the same order as resumes
+        """
+        resumes = list(resumes)
+        if not self.is_configured():
+            return [self.evaluate_resume(text, job_description) for text in resumes]
+
+        results = [None] * len(resumes)
+        pending = []
+        for index, text in enumerate(resumes):
+            cache_key = self._cache_key(text, job_description)
+            cached = self.cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                results[index] = (cached[0], cached[1])
+            else:
+                pending.append(index)
+
+        batches = plan_batches(
+            [resumes[index] for index in pending], job_description,
+            token_budget=token_budget or BATCH_TOKEN_BUDGET,
+            max_batch_size=max_batch_size or BATCH_MAX_RESUMES
+        )
+        for batch in batches:
+            indices = [pending[position] for position in batch]
+            if len(indices) == 1:
+                results[indices[0]] = self.evaluate_resume(resumes[indices[0]], job_description)
+                continue
+            parsed = self._evaluate_group([resumes[index] for index in indices], job_description)
+            for offset, index in enumerate(indices):
+                if offset in parsed:
+                    score, feedback = parsed[offset]
+                    cache_key = self._cache_key(resumes[index], job_description)
+                    if cache_key is not None:
+                        self.cache.set(cache_key, [score, feedback])
+                    results[index] = (score, feedback)
+                else:
+                    # Missing or unparseable in the batch answer: ask for this one on its own
+                    results[index] = self.evaluate_resume(resumes[index], job_description)
+        return results
+
+    def _evaluate_group(self, resume_texts, job_description):
+        """Send one multi-resume prompt. Returns {offset: (score, feedback)} for the candidates it could parse."""
+        candidate_ids = [f"R{offset + 1}" for offset in range(len(resume_texts))]
+        resume_sections = "\n".join(
+            f'<resume candidate_id="{candidate_id}">\n{text}\n</resume>'
+            for candidate_id, text in zip(candidate_ids, resume_texts)
+        )
+        prompt = f"""
+        You are an expert recruiter. You need to evaluate several resumes against one job description.
+        Evaluate each resume independently; do not compare candidates with each other.
+        
+        Job Description:
+        {job_description}
+        
+        Resumes:
+        {resume_sections}
+        
+        Rate each resume on a scale of 1 to 10 based on how well it matches the job description.
+        Provide detailed feedback on why you gave each score, including strengths and improvement areas.
+        
+        Your response should be a JSON array with exactly one object per resume, in this exact format:
+        [
+            {{
+                "candidate_id": "<candidate_id of the resume>",
+                "score": <score as a decimal between 1 and 10>,
+                "feedback": "<detailed feedback explaining the score>"
+            }}
+        ]
+        """
+
+        try:
+            response = self._generate(
+                prompt,
+                generation_config={"response_mime_type": "application/json"}
+            )
+            json_match = re.search(r'\[.*\]', response.text, re.DOTALL)
+            items = json.loads(json_match.group(0)) if json_match else []
+        except Exception as e:
+            logger.warning(f"Batch evaluation of {len(resume_texts)} resumes failed, falling back to single calls: {str(e)}")
+            return {}
+
+        offsets = {candidate_id: offset for offset, candidate_id in enumerate(candidate_ids)}
+        parsed = {}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict):
+                continue
+            offset = offsets.get(str(item.get("candidate_id", "")).strip())
+            if offset is None or "score" not in item:
+                continue
+            try:
+                score = float(item["score"])
+            except (TypeError, ValueError):
+                continue
+            parsed[offset] = (score, item.get("feedback", "No feedback provided"))
+        return parsed
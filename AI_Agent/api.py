@@ -1,48 +1,93 @@
 import os
-import pandas as pd
-from flask import Flask, jsonify, request
+import json
+import time
+from flask import Flask, Response, g, jsonify, request, stream_with_context, url_for
 from flask_cors import CORS
-from werkzeug.utils import secure_filename # For handling filenames securely
-import io # For handling file streams
 import logging # Import the logging module
-try:
-    import PyPDF2 # For PDF text extraction
-except ImportError:
-    PyPDF2 = None # Handle gracefully if not installed, though it's needed for PDFs
-
 from dotenv import load_dotenv # To load .env for the agent
+from catalog import get_job_catalog
+from workers import clamp_concurrency, iter_bounded
+from tasks import TaskQueueFull, task_manager_from_env
+from extraction import SUPPORTED_EXTENSIONS, extract_documents, get_text_cache
+from cache import get_evaluation_cache
+from ranking import select_for_evaluation
+from matching import DEFAULT_MATCH_JOBS, DEFAULT_TOP_K_JOBS, DEFAULT_TOP_K_RESUMES, evaluate_top_pairs, match_resumes
+from profiles import prompt_description
+from ratelimit import get_rate_limiter
+from uploads import EXTRACT_BATCH_BYTES, MAX_REQUEST_BYTES, close_uploads, format_size, spool_uploads
+from metrics import ERRORS, EVALUATIONS_IN_FLIGHT, HTTP_REQUEST_SECONDS, REGISTRY, STAGE_SECONDS
+from logging_config import (REQUEST_ID_HEADER, configure_logging, new_request_id, redact,
+                            request_id_var, should_sample, truncate)
 
 # Assuming agents.py is in the same directory or accessible via PYTHONPATH
 try:
-    from agents import TalentEvaluationAgent
+    from agents import TalentEvaluationAgent, plan_batches
 except ImportError:
     TalentEvaluationAgent = None
+    plan_batches = None
     print("Warning: TalentEvaluationAgent could not be imported from agents.py. Real evaluation will not work.")
 
 
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
+# Larger request bodies are rejected with 413 before any file is read
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 
-# Configure basic logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+# Background queue for async=true evaluation batches
+evaluation_tasks = task_manager_from_env("EVALUATION_TASK", name="evaluation-task")
+SSE_KEEPALIVE_SECONDS = 15
+
+# Structured logging through a background writer thread (LOG_LEVEL, LOG_FORMAT, LOG_BODY_SAMPLE_RATE)
+configure_logging()
 
 @app.before_request
 def log_request_info():
-    app.logger.debug('Request Headers: %s', request.headers)
-    app.logger.debug('Request Path: %s', request.path)
-    app.logger.debug('Request URL: %s', request.url)
-    app.logger.debug('Request Method: %s', request.method)
+    g.request_id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+    request_id_var.set(g.request_id)
+    if not app.logger.isEnabledFor(logging.DEBUG) or not should_sample():
+        return
+    # Only sampled requests pay for logging their details; bodies are never re-parsed for it
+    details = {"headers": redact(request.headers.items())}
     if request.method == 'POST':
-        try:
-            # Attempt to log form data if content type is form-data
-            if request.form:
-                app.logger.debug('Request Form Data: %s', request.form)
-            # Attempt to log JSON data if content type is application/json
-            if request.is_json:
-                app.logger.debug('Request JSON Data: %s', request.get_json())
-        except Exception as e:
-            app.logger.debug(f"Could not log request data: {e}")
+        if request.mimetype in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+            details["form"] = redact(request.form.items(multi=True))
+            details["files"] = [f"{name}={upload.filename}" for name, upload in request.files.items(multi=True)]
+        elif request.is_json:
+            details["json"] = truncate(request.get_data(as_text=True))
+    app.logger.debug("Request details", extra=details)
+
+@app.teardown_request
+def clear_request_id(error=None):
+    request_id_var.set(None)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Streamed responses are timed until their headers are ready, not until the stream ends
+        endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint,
+                                     method=request.method, status=response.status_code)
+        if response.status_code >= 500:
+            ERRORS.inc(stage="http", type=str(response.status_code))
+        app.logger.info("Request handled", extra={
+            "method": request.method, "path": request.path, "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+    request_id = g.get('request_id')
+    if request_id is not None:
+        response.headers[REQUEST_ID_HEADER] = request_id
+    return response
+
 
+@app.errorhandler(413)
+def request_too_large(error):
+    limit = format_size(app.config.get('MAX_CONTENT_LENGTH') or 0)
+    return jsonify({"error": f"Request is larger than the {limit} limit. Send fewer or smaller files."}), 413
 
 def load_job_descriptions(json_path='jobs.json'):
     if not os.path.exists(json_path):
@@ -77,63 +122,307 @@ def load_job_descriptions(json_path='jobs.json'):
         return []
 
 def load_job_descriptions(csv_path='jobs.csv'):
-    if not os.path.exists(csv_path):
-        app.logger.error(f"Error: {csv_path} not found. Serving empty job list.")
-        return []
-    try:
-        jobs_df = pd.read_csv(csv_path)
-        # Ensure 'job_title' and 'description' columns exist
-        required_columns = ['job_title', 'description'] # Adjust if your CSV has different names
-        
-        # Handle potential variations in job title column name
-        if 'Title' in jobs_df.columns and 'job_title' not in jobs_df.columns:
-            jobs_df.rename(columns={'Title': 'job_title'}, inplace=True)
-        elif 'title' in jobs_df.columns and 'job_title' not in jobs_df.columns:
-            jobs_df.rename(columns={'title': 'job_title'}, inplace=True)
-
-        if not all(col in jobs_df.columns for col in required_columns):
-            app.logger.error(f"Error: CSV must contain columns: {', '.join(required_columns)}")
-            return []
-            
-        return jobs_df.to_dict(orient='records')
-    except Exception as e:
-        app.logger.error(f"Error reading or processing CSV {csv_path}: {e}")
-        return []
+    # The catalog is parsed once per process and only re-read when the file changes
+    return get_job_catalog(csv_path).snapshot().jobs
 
 @app.route('/api/jobs', methods=['GET'])
 def get_job_titles_api():
     try:
         app.logger.info(f"Received request for /api/jobs")
-        job_data = load_job_descriptions()
-        job_titles = [job['job_title'] for job in job_data if 'job_title' in job and pd.notna(job['job_title'])]
-        return jsonify(list(set(job_titles))) 
+        catalog = get_job_catalog().snapshot()
+        return jsonify(catalog.titles)
     except Exception as e:
         print(f"Error in /api/jobs: {e}")
         return jsonify({"error": "Could not load job titles"}), 500
 
-def extract_text_from_resume(file_storage):
-    filename = secure_filename(file_storage.filename)
-    resume_text = ""
+@app.route('/api/jobs/search', methods=['GET'])
+def search_jobs_api():
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', default=10, type=int)
+    if not query.strip():
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    if limit <= 0:
+        return jsonify({"error": "limit must be a positive integer"}), 400
     try:
-        if filename.endswith('.pdf'):
-            if PyPDF2:
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_storage.read()))
-                for page_num in range(len(pdf_reader.pages)):
-                    resume_text += pdf_reader.pages[page_num].extract_text()
+        catalog = get_job_catalog().snapshot()
+        with STAGE_SECONDS.time(stage="title_lookup"):
+            matches = catalog.title_index.search(query, limit=limit, fuzzy=True)
+        return jsonify({"results": [match.to_dict() for match in matches]})
+    except Exception as e:
+        app.logger.error(f"Error in /api/jobs/search: {e}")
+        return jsonify({"error": "Could not search job titles"}), 500
+
+# File types the API accepts for resumes (the same parsers as the Streamlit app)
+RESUME_EXTENSIONS = SUPPORTED_EXTENSIONS
+
+def _upload_size(upload):
+    return upload.size if hasattr(upload, 'size') else len(upload)
+
+def _read_upload(upload):
+    return upload.read() if hasattr(upload, 'read') else upload
+
+def extract_text_from_uploads(uploads):
+    """
+    Extract text from several uploads, a batch of at most EXTRACT_BATCH_BYTES at a time.
+
+    Only the uploads of the current batch are loaded into memory; each batch
+    is extracted in one extract_documents() call.
+
+    Args:
+        uploads (list): (candidate, upload, error) tuples from spool_uploads(); upload
+            may also be raw bytes
+
+    Returns:
+        list: (text, error) tuples in upload order
+    """
+    results = [None] * len(uploads)
+    batch = []
+
+    def extract_batch():
+        documents = [(_read_upload(upload), os.path.splitext(filename)[1]) for _, filename, upload in batch]
+        for (position, filename, _), extracted in zip(batch, extract_documents(documents)):
+            resume_text, error = extracted.text, extracted.error
+            app.logger.debug(f"Extracted {filename}", extra={"extraction": extracted.to_dict()})
+            if error:
+                app.logger.warning(f"Error extracting text from {filename}: {error}")
+                results[position] = (None, error)
+            elif not resume_text.strip():
+                results[position] = (None, "Could not extract text from the resume or resume is empty.")
             else:
-                return None, "PyPDF2 is not installed, cannot process PDF."
-        elif filename.endswith('.txt'):
-            resume_text = file_storage.read().decode('utf-8')
+                results[position] = (resume_text, None)
+        del batch[:]
+
+    batch_bytes = 0
+    for position, (filename, upload, error) in enumerate(uploads):
+        if error:
+            results[position] = (None, error)
+            continue
+        size = _upload_size(upload)
+        if batch and batch_bytes + size > EXTRACT_BATCH_BYTES:
+            extract_batch()
+            batch_bytes = 0
+        batch.append((position, filename, upload))
+        batch_bytes += size
+    if batch:
+        extract_batch()
+    return results
+
+def extract_text_from_resumes(file_storages):
+    uploads = spool_uploads(file_storages, RESUME_EXTENSIONS)
+    try:
+        return extract_text_from_uploads(uploads)
+    finally:
+        close_uploads(uploads)
+
+def extract_text_from_resume(file_storage):
+    return extract_text_from_resumes([file_storage])[0]
+
+def build_error_result(candidate, message):
+    return {
+        "Candidate": candidate, "MatchScore": 0,
+        "Assessment": message, "Status": "Error",
+        "sections": [], "strengths": [], "suggestions": []
+    }
+
+def build_filtered_result(candidate, local_score):
+    return {
+        "Candidate": candidate, "MatchScore": 0, "LocalScore": local_score,
+        "Assessment": f"Not sent for AI evaluation: local similarity to the job description ({local_score:.2f}) did not make the pre-ranking cut.",
+        "Status": "Filtered",
+        "sections": [], "strengths": [], "suggestions": []
+    }
+
+def scale_match_score(agent_score):
+    """The agent's 1-10 score on the 0-100 MatchScore scale."""
+    return float(agent_score) * 10
+
+def build_evaluation_result(candidate, agent_score, agent_feedback):
+    match_score = scale_match_score(agent_score)
+    assessment_text = agent_feedback
+
+    # Simulate detailed breakdown based on agent's score and feedback
+    sections_data = [
+        {"name": "Relevance to Job Description", "score": int(match_score * 0.95) if match_score > 0 else 20},
+        {"name": "Key Skills Match", "score": int(match_score * 1.05) if match_score > 0 and int(match_score * 1.05) <=100 else (80 if match_score > 0 else 15)},
+        {"name": "Experience Alignment", "score": int(match_score * 0.9) if match_score > 0 else 10},
+    ]
+    # Strengths and suggestions could be parsed from agent_feedback if it's structured,
+    # or use generic ones, or parts of the feedback.
+    strengths_data = [f"Overall feedback indicates: {agent_feedback.split('.')[0] if '.' in agent_feedback else agent_feedback[:50]+'...'}" ]
+    if match_score > 70: strengths_data.append("Good alignment with the role based on AI evaluation.")
+    
+    suggestions_data = ["Review the detailed AI feedback for specific improvement areas."]
+    if match_score < 60 : suggestions_data.append("Consider highlighting skills more relevant to the job description.")
+
+    return {
+        "Candidate": candidate,
+        "MatchScore": round(match_score, 2),
+        "Assessment": assessment_text,
+        "Status": "Processed",
+        "sections": sections_data,
+        "strengths": strengths_data,
+        "suggestions": suggestions_data
+    }
+
+def evaluate_extracted_resume(agent, candidate, resume_text, job_description_text):
+    """Evaluate one resume whose text is already extracted. Runs on the shared evaluation pool."""
+    # --- Call Agent for Evaluation ---
+    agent_score, agent_feedback = agent.evaluate_resume(resume_text, job_description_text)
+    return build_evaluation_result(candidate, agent_score, agent_feedback)
+
+def evaluate_extracted_resume_streaming(agent, position, candidate, resume_text, job_description_text, on_event):
+    """Evaluate one resume with a streamed response, reporting the score and feedback pieces as they arrive."""
+    final = {"score": 0, "feedback": "No response received."}
+    for event, data in agent.evaluate_resume_stream(resume_text, job_description_text):
+        if event == 'done':
+            final = data
+            continue
+        if event == 'score':
+            # Same 0-100 scale as the MatchScore of the final result
+            try:
+                data = dict(data, match_score=round(scale_match_score(data["score"]), 2))
+            except (TypeError, ValueError):
+                pass
+        on_event(event, dict(data, position=position, candidate=candidate))
+    return build_evaluation_result(candidate, final["score"], final["feedback"])
+
+def evaluate_extracted_group(agent, group, job_description_text):
+    """Evaluate (position, candidate, resume_text) items in one multi-resume request where possible."""
+    if len(group) == 1:
+        return [evaluate_extracted_resume(agent, group[0][1], group[0][2], job_description_text)]
+    scored = agent.evaluate_resumes_batch([item[2] for item in group], job_description_text)
+    return [
+        build_evaluation_result(candidate, agent_score, agent_feedback)
+        for (_, candidate, _), (agent_score, agent_feedback) in zip(group, scored)
+    ]
+
+def run_evaluation_batch(agent, uploads, job_description_text, tfidf=None, job_position=None,
+                         max_concurrency=None, prefilter_top_k=None, prefilter_min_similarity=None,
+                         on_result=None, cancel_event=None, on_event=None):
+    """
+    Extract, optionally pre-rank, and evaluate a batch of uploaded resumes.
+
+    Args:
+        agent (TalentEvaluationAgent): Configured evaluation agent
+        uploads (list): (candidate, upload, error) tuples from spool_uploads()
+        job_description_text (str): Description of the job to evaluate against
+        tfidf (TfidfIndex, optional): Catalog TF-IDF index, needed for pre-ranking
+        job_position (int, optional): Row of the job in tfidf, needed for pre-ranking
+        max_concurrency (int, optional): Per-request cap on concurrent evaluations
+        prefilter_top_k (int, optional): Only evaluate the K best resumes by local score
+        prefilter_min_similarity (float, optional): Only evaluate resumes at or above this local score
+        on_result (callable, optional): Called as on_result(position, result) as soon as
+            each result is known, in completion order
+        cancel_event (threading.Event, optional): Stop starting new evaluations once set
+        on_event (callable, optional): Stream each evaluation; called as on_event(event, data)
+            with 'score' and 'feedback' events (data includes position and candidate)
+            before the result of that resume is published. 'score' data carries the
+            agent's raw 1-10 'score' and 'match_score', the same value on the 0-100
+            scale of the result's MatchScore
+
+    Returns:
+        list: One result dict per upload, in upload order
+    """
+    results_list = [None] * len(uploads)
+
+    def publish(position, result):
+        results_list[position] = result
+        if on_result is not None:
+            on_result(position, result)
+
+    # Extract in bounded batches (cached by content hash, parsed across processes);
+    # the uploaded files are not needed after this
+    try:
+        extracted = extract_text_from_uploads(uploads)
+    finally:
+        close_uploads(uploads)
+    to_evaluate = []  # (position, candidate, resume_text)
+    for position, ((candidate, _, _), (resume_text, error_msg)) in enumerate(zip(uploads, extracted)):
+        if error_msg:
+            publish(position, build_error_result(candidate, error_msg))
         else:
-            return None, "Unsupported file type. Please upload .txt or .pdf."
-        
-        if not resume_text.strip():
-            return None, "Could not extract text from the resume or resume is empty."
-            
-        return resume_text, None
-    except Exception as e:
-        print(f"Error extracting text from {filename}: {e}")
-        return None, f"Error processing file: {str(e)}"
+            to_evaluate.append((position, candidate, resume_text))
+
+    local_scores = {}
+    if to_evaluate and (prefilter_top_k is not None or prefilter_min_similarity is not None):
+        # Score every resume against the job's precomputed TF-IDF vector in one pass
+        job_vector = tfidf.document_vector(job_position)
+        scores = tfidf.score([item[2] for item in to_evaluate], job_vector)
+        keep = select_for_evaluation(scores, prefilter_top_k, prefilter_min_similarity)
+        local_scores = {item[0]: round(float(score), 4) for item, score in zip(to_evaluate, scores)}
+        for (position, candidate, _), selected in zip(to_evaluate, keep):
+            if not selected:
+                publish(position, build_filtered_result(candidate, local_scores[position]))
+        to_evaluate = [item for item, selected in zip(to_evaluate, keep) if selected]
+        app.logger.info(f"Local pre-ranking kept {len(to_evaluate)} of {len(keep)} resume(s) for AI evaluation")
+
+    if to_evaluate:
+        # Prompts carry the job's condensed requirement profile instead of the raw posting
+        job_description_text = prompt_description(agent, job_description_text)
+
+    # Pack resumes into multi-resume prompts when the agent supports it (not when streaming)
+    if on_event is None and plan_batches is not None and hasattr(agent, 'evaluate_resumes_batch') and len(to_evaluate) > 1:
+        groups = [
+            [to_evaluate[index] for index in batch]
+            for batch in plan_batches([item[2] for item in to_evaluate], job_description_text)
+        ]
+    else:
+        groups = [[item] for item in to_evaluate]
+
+    # Fan the evaluations out over the shared evaluation pool
+    if on_event is not None:
+        def evaluate(group):
+            position, candidate, resume_text = group[0]
+            return [evaluate_extracted_resume_streaming(agent, position, candidate, resume_text,
+                                                        job_description_text, on_event)]
+    else:
+        def evaluate(group):
+            return evaluate_extracted_group(agent, group, job_description_text)
+
+    def evaluate_tracked(group):
+        with EVALUATIONS_IN_FLIGHT.track(len(group)):
+            return evaluate(group)
+
+    outcomes = iter_bounded(
+        evaluate_tracked,
+        groups,
+        max_concurrency=max_concurrency,
+        cancel_event=cancel_event
+    )
+    for index, group_results, error in outcomes:
+        for offset, (position, candidate, _) in enumerate(groups[index]):
+            if error is not None:
+                app.logger.error(f"Unexpected error evaluating {candidate}: {error}")
+                result = build_error_result(candidate, f"Error processing file: {str(error)}")
+            else:
+                result = group_results[offset]
+            if position in local_scores:
+                result["LocalScore"] = local_scores[position]
+            publish(position, result)
+
+    # Anything still missing was skipped because the batch was cancelled
+    for position, candidate, _ in to_evaluate:
+        if results_list[position] is None:
+            result = build_error_result(candidate, "Evaluation cancelled before this resume was processed.")
+            result["Status"] = "Cancelled"
+            publish(position, result)
+
+    return results_list
+
+def form_number(name, cast, default=None):
+    """
+    Read a numeric form field.
+
+    Unlike request.form.get(..., type=...), a value that does not convert is
+    an error rather than silently replaced by the default.
+
+    Raises:
+        ValueError: If the field is present but not a valid number
+    """
+    raw = request.form.get(name)
+    if raw is None or not raw.strip():
+        return default
+    return cast(raw.strip())
 
 @app.route('/api/evaluate', methods=['POST'])
 def evaluate_resumes_api():
@@ -147,12 +436,30 @@ def evaluate_resumes_api():
     job_title_form = request.form.get('job_title')
     app.logger.debug(f"Job title from form: {job_title_form}")
     try:
-        score_threshold_form = request.form.get('score_threshold', default=0.0, type=float)
+        score_threshold_form = form_number('score_threshold', float, default=0.0)
         app.logger.debug(f"Score threshold from form: {score_threshold_form}")
     except ValueError:
         app.logger.error("Invalid score_threshold format in request to /api/evaluate")
         return jsonify({"error": "Invalid score_threshold format"}), 400
         
+    try:
+        max_concurrency_form = clamp_concurrency(form_number('max_concurrency', int))
+    except ValueError:
+        app.logger.error("Invalid max_concurrency format in request to /api/evaluate")
+        return jsonify({"error": "Invalid max_concurrency format"}), 400
+
+    # Optional local pre-ranking: only the best-matching resumes are sent to the LLM
+    try:
+        prefilter_top_k_form = form_number('prefilter_top_k', int)
+        prefilter_min_similarity_form = form_number('prefilter_min_similarity', float)
+    except ValueError:
+        app.logger.error("Invalid prefilter_top_k or prefilter_min_similarity format in request to /api/evaluate")
+        return jsonify({"error": "prefilter_top_k must be an integer and prefilter_min_similarity a number"}), 400
+    if prefilter_top_k_form is not None and prefilter_top_k_form <= 0:
+        return jsonify({"error": "prefilter_top_k must be a positive integer"}), 400
+    if prefilter_min_similarity_form is not None and not 0.0 <= prefilter_min_similarity_form <= 1.0:
+        return jsonify({"error": "prefilter_min_similarity must be between 0 and 1"}), 400
+
     if not job_title_form:
         app.logger.error("Job title is required but not provided in request to /api/evaluate")
         return jsonify({"error": "Job title is required"}), 400
@@ -164,54 +471,31 @@ def evaluate_resumes_api():
         app.logger.error("No selected files in request to /api/evaluate")
         return jsonify({"error": "No selected files"}), 400
 
+    # async=true queues the batch as a background task instead of holding the request open
+    async_form = request.form.get('async', 'false').lower() in ('1', 'true', 'yes')
+    stream_form = request.form.get('stream', 'false').lower() in ('1', 'true', 'yes')
+
     # --- Get Job Description ---
-    all_jobs = load_job_descriptions()
-    if not all_jobs:
+    catalog = get_job_catalog().snapshot()
+    if not catalog.jobs:
          app.logger.error("Job descriptions could not be loaded from jobs.csv for /api/evaluate")
          return jsonify({"error": "Job descriptions could not be loaded from jobs.csv."}), 500
 
-    job_to_use_for_evaluation = None
-    job_description_text = None # Will be set if job_to_use_for_evaluation is found
-    
-    # Variables for fallback if no description is found but a URL is
-    fallback_job_url = None
-    fallback_matched_title = None
-
-    for job in all_jobs:
-        current_csv_job_title = job.get('job_title', '')
-        # Case-insensitive partial match
-        if job_title_form.lower() in current_csv_job_title.lower():
-            description = job.get('description')
-            
-            # Check if description is valid (exists, not NaN, not just whitespace)
-            is_description_valid = description and \
-                                   (not isinstance(description, float) or not pd.isna(description)) and \
-                                   str(description).strip()
-
-            if is_description_valid:
-                job_to_use_for_evaluation = job
-                job_description_text = description
-                app.logger.info(f"Found job '{current_csv_job_title}' with valid description for evaluation via partial match.")
-                break # Prioritize first match with a valid description
-            
-            # If no job with description has been found yet, and this is the first partial match
-            # with a URL, store it as a potential fallback.
-            if not job_to_use_for_evaluation and not fallback_job_url:
-                url_from_csv = job.get('job_url') # Assuming 'job_url' is the column name for job links
-                is_url_valid = url_from_csv and \
-                               (not isinstance(url_from_csv, float) or not pd.isna(url_from_csv)) and \
-                               str(url_from_csv).strip()
-                if is_url_valid:
-                    fallback_job_url = url_from_csv
-                    fallback_matched_title = current_csv_job_title
-                    app.logger.info(f"Partial match '{current_csv_job_title}' found without valid description, but has URL: {url_from_csv}. Storing as fallback.")
-
-    if job_to_use_for_evaluation:
-        # A job with a valid description was found, proceed with this.
-        # job_description_text is already set.
-        pass
-    elif fallback_job_url:
+    # Case-insensitive partial match; the index ranks exact and prefix matches first,
+    # then jobs with a valid description, then jobs that only have a job_url.
+    # Evaluate against the best match that has a description, whatever its rank.
+    with STAGE_SECONDS.time(stage="title_lookup"):
+        matches = catalog.title_index.search(job_title_form)
+    best_match = next((match for match in matches if match.has_description), None)
+    url_match = next((match for match in matches if match.has_url), None)
+
+    if best_match:
+        job_description_text = best_match.job['description']
+        app.logger.info(f"Found job '{best_match.title}' with valid description for evaluation via partial match.")
+    elif url_match:
         # No job with a description found, but a partial match with a URL was found.
+        fallback_job_url = url_match.job['job_url']
+        fallback_matched_title = url_match.title
         app.logger.info(f"No job with description found for '{job_title_form}'. Providing URL for partially matched job '{fallback_matched_title}'.")
         return jsonify({
             "message": f"Job description for the best match '{fallback_matched_title}' is missing. You can view the job posting directly using the provided link.",
@@ -223,7 +507,7 @@ def evaluate_resumes_api():
         app.logger.warning(f"No job found for '{job_title_form}' with a usable description or fallback URL. Returning 404.")
         return jsonify({"error": f"Could not find a suitable job posting for '{job_title_form}' with a description or direct link."}), 404
     
-    # --- Initialize Agent --- (This part is reached only if job_to_use_for_evaluation is set)
+    # --- Initialize Agent --- (This part is reached only if a job with a description was found)
     if not TalentEvaluationAgent:
         return jsonify({"error": "TalentEvaluationAgent is not available. Evaluation cannot proceed."}), 500
     
@@ -231,75 +515,256 @@ def evaluate_resumes_api():
     if not agent.is_configured(): # Assuming is_configured checks for API key
         return jsonify({"error": "Talent Evaluation Agent is not configured (e.g., API key missing)."}), 500
 
-    results_list = []
-    for file_storage in uploaded_files:
-        if file_storage and file_storage.filename:
-            print(f"Processing file: {file_storage.filename} for job: {job_title_form} with threshold: {score_threshold_form}")
-            
-            resume_text, error_msg = extract_text_from_resume(file_storage)
-            if error_msg:
-                results_list.append({
-                    "Candidate": secure_filename(file_storage.filename), "MatchScore": 0,
-                    "Assessment": error_msg, "Status": "Error",
-                    "sections": [], "strengths": [], "suggestions": []
-                })
+    # Files (and the members of ZIP/TAR archives) are copied out of the request into spooled
+    # temporary files: small ones stay in memory up to a per-request budget, the rest go to disk
+    uploads = spool_uploads(uploaded_files, RESUME_EXTENSIONS)
+    batch_options = {
+        "max_concurrency": max_concurrency_form,
+        "prefilter_top_k": prefilter_top_k_form,
+        "prefilter_min_similarity": prefilter_min_similarity_form,
+    }
+
+    if async_form or stream_form:
+        # Queue the batch; async clients get the task id at once, streaming clients follow its events here
+        params = dict(batch_options, job_title=job_title_form, matched_job_title=best_match.title,
+                      score_threshold=score_threshold_form, stream=stream_form,
+                      files=[candidate for candidate, _, _ in uploads])
+
+        def run_task(task):
+            run_evaluation_batch(agent, uploads, job_description_text, catalog.tfidf, best_match.position,
+                                 on_result=task.add_result, cancel_event=task.cancel_event,
+                                 on_event=task.add_event if stream_form else None, **batch_options)
+
+        try:
+            task = evaluation_tasks.submit('evaluation', run_task, total=len(uploads), params=params,
+                                           cleanup=lambda: close_uploads(uploads))
+        except TaskQueueFull as e:
+            close_uploads(uploads)
+            app.logger.warning(f"Rejecting async evaluation: {e}")
+            return jsonify({"error": "Too many evaluation jobs are queued. Please retry later."}), 503
+        app.logger.info(f"Queued evaluation task {task.id} for {len(uploads)} file(s)")
+        if not async_form:
+            return task_event_response(task)
+        status_url = url_for('get_evaluation_task_api', task_id=task.id)
+        return jsonify({
+            "task_id": task.id,
+            "status": task.status,
+            "status_url": status_url,
+            "events_url": url_for('stream_evaluation_task_api', task_id=task.id)
+        }), 202, {"Location": status_url}
+
+    app.logger.info(f"Evaluating {len(uploads)} file(s) for job '{job_title_form}' with threshold {score_threshold_form} and concurrency {max_concurrency_form}")
+    results_list = run_evaluation_batch(agent, uploads, job_description_text, catalog.tfidf, best_match.position, **batch_options)
+    with STAGE_SECONDS.time(stage="response_build"):
+        response = jsonify({"results": results_list})
+    return response
+
+def format_sse(event, data, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route('/api/evaluate/tasks/<task_id>', methods=['GET'])
+def get_evaluation_task_api(task_id):
+    task = evaluation_tasks.get(task_id)
+    if task is None:
+        return jsonify({"error": "Unknown or expired task id"}), 404
+    return jsonify(task.to_dict())
+
+@app.route('/api/evaluate/tasks/<task_id>', methods=['DELETE'])
+def cancel_evaluation_task_api(task_id):
+    task = evaluation_tasks.cancel(task_id)
+    if task is None:
+        return jsonify({"error": "Unknown or expired task id"}), 404
+    app.logger.info(f"Cancellation requested for evaluation task {task_id}")
+    return jsonify(task.to_dict(include_results=False))
+
+def task_event_response(task, start=0):
+    """Server-Sent Events response that follows a task's event log from index `start` until it finishes."""
+    def generate():
+        seen = start
+        while True:
+            events = task.wait_for_events(seen, timeout=SSE_KEEPALIVE_SECONDS)
+            if not events:
+                if task.finished:
+                    break
+                yield ": keep-alive\n\n"
                 continue
+            for index, event, data in events:
+                yield format_sse(event, data, event_id=index)
+            seen = events[-1][0] + 1
+            if task.finished and not task.wait_for_events(seen, timeout=0):
+                break
+        yield format_sse('done', task.to_dict(include_results=False))
 
-            # --- Call Agent for Evaluation ---
-            agent_score, agent_feedback = agent.evaluate_resume(resume_text, job_description_text)
-            
-            match_score = float(agent_score) * 10  # Scale 1-10 to 0-100
-            assessment_text = agent_feedback
-
-            # Simulate detailed breakdown based on agent's score and feedback
-            sections_data = [
-                {"name": "Relevance to Job Description", "score": int(match_score * 0.95) if match_score > 0 else 20},
-                {"name": "Key Skills Match", "score": int(match_score * 1.05) if match_score > 0 and int(match_score * 1.05) <=100 else (80 if match_score > 0 else 15)},
-                {"name": "Experience Alignment", "score": int(match_score * 0.9) if match_score > 0 else 10},
-            ]
-            # Strengths and suggestions could be parsed from agent_feedback if it's structured,
-            # or use generic ones, or parts of the feedback.
-            strengths_data = [f"Overall feedback indicates: {agent_feedback.split('.')[0] if '.' in agent_feedback else agent_feedback[:50]+'...'}" ]
-            if match_score > 70: strengths_data.append("Good alignment with the role based on AI evaluation.")
-            
-            suggestions_data = ["Review the detailed AI feedback for specific improvement areas."]
-            if match_score < 60 : suggestions_data.append("Consider highlighting skills more relevant to the job description.")
-
-
-            results_list.append({
-                "Candidate": secure_filename(file_storage.filename),
-                "MatchScore": round(match_score, 2),
-                "Assessment": assessment_text,
-                "Status": "Processed",
-                "sections": sections_data,
-                "strengths": strengths_data,
-                "suggestions": suggestions_data
-            })
-        else:
-            # This case should ideally not be reached if initial checks are done
-            results_list.append({
-                "Candidate": "Unknown or empty file", "MatchScore": 0,
-                "Assessment": "File could not be processed.", "Status": "Error",
-                "sections": [], "strengths": [], "suggestions": []
-            })
-            
-    return jsonify({"results": results_list})
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Task-Id": task.id})
+
+@app.route('/api/evaluate/tasks/<task_id>/events', methods=['GET'])
+def stream_evaluation_task_api(task_id):
+    task = evaluation_tasks.get(task_id)
+    if task is None:
+        return jsonify({"error": "Unknown or expired task id"}), 404
+
+    # Resume after the last event a reconnecting EventSource already received
+    try:
+        start = int(request.headers.get('Last-Event-ID', -1)) + 1
+    except ValueError:
+        start = 0
+
+    return task_event_response(task, start)
+
+def job_summary(catalog, position):
+    job = catalog.jobs[position]
+    return {
+        "job_title": job.get('job_title'),
+        "company": job.get('company'),
+        "location": job.get('location'),
+        "job_url": job.get('job_url'),
+        "position": position,
+    }
+
+def build_match_response(catalog, candidates, errors, result):
+    """JSON body for /api/match: top jobs per resume and top resumes per job."""
+    resumes = []
+    for resume_index, (candidate, error) in enumerate(zip(candidates, errors)):
+        top_jobs = []
+        for job_position, similarity in result.resume_matches[resume_index] or []:
+            entry = dict(job_summary(catalog, job_position), similarity=similarity)
+            evaluation = result.evaluations.get((resume_index, job_position))
+            if isinstance(evaluation, Exception):
+                entry["evaluation"] = {"error": f"Error evaluating resume: {evaluation}"}
+            elif evaluation is not None:
+                agent_score, agent_feedback = evaluation
+                entry["evaluation"] = {"match_score": round(float(agent_score) * 10, 2), "assessment": agent_feedback}
+            top_jobs.append(entry)
+        resumes.append({"candidate": candidate, "error": error, "top_jobs": top_jobs})
+
+    jobs = [
+        dict(job_summary(catalog, job_position), top_resumes=[
+            {"candidate": candidates[resume_index], "similarity": similarity}
+            for resume_index, similarity in top_resumes
+        ])
+        for job_position, top_resumes in result.job_matches
+    ]
+    return {
+        "resumes": resumes,
+        "jobs": jobs,
+        "stats": {
+            "resumes": len(candidates),
+            "jobs_in_catalog": len(catalog),
+            "evaluated_pairs": len(result.evaluations),
+            "matching_seconds": round(result.seconds, 4),
+        },
+    }
+
+@app.route('/api/match', methods=['POST'])
+def match_resumes_api():
+    """
+    Rank every uploaded resume against every job in the catalog in one pass.
+
+    Scoring is local TF-IDF similarity over the whole catalog; with
+    evaluate_top > 0 the most similar resume/job pairs are also evaluated by
+    the LLM.
+    """
+    app.logger.info("Received request for /api/match")
+    load_dotenv()
+
+    uploaded_files = request.files.getlist('resumes')
+    if not uploaded_files or uploaded_files[0].filename == '':
+        return jsonify({"error": "No resume files part"}), 400
+
+    try:
+        top_k_jobs = form_number('top_k_jobs', int, default=DEFAULT_TOP_K_JOBS)
+        top_k_resumes = form_number('top_k_resumes', int, default=DEFAULT_TOP_K_RESUMES)
+        max_jobs = form_number('max_jobs', int, default=DEFAULT_MATCH_JOBS)
+        evaluate_top = form_number('evaluate_top', int, default=0)
+        min_similarity = form_number('min_similarity', float)
+        max_concurrency = clamp_concurrency(form_number('max_concurrency', int))
+    except ValueError:
+        app.logger.error("Invalid matching parameter format in request to /api/match")
+        return jsonify({"error": "top_k_jobs, top_k_resumes, max_jobs, evaluate_top and max_concurrency must be integers and min_similarity a number"}), 400
+    if top_k_jobs <= 0 or top_k_resumes <= 0 or max_jobs < 0 or evaluate_top < 0:
+        return jsonify({"error": "top_k_jobs and top_k_resumes must be positive; max_jobs and evaluate_top must not be negative"}), 400
+    if min_similarity is not None and not 0.0 <= min_similarity <= 1.0:
+        return jsonify({"error": "min_similarity must be between 0 and 1"}), 400
+
+    catalog = get_job_catalog().snapshot()
+    if not catalog.jobs:
+        app.logger.error("Job descriptions could not be loaded from jobs.csv for /api/match")
+        return jsonify({"error": "Job descriptions could not be loaded from jobs.csv."}), 500
+
+    agent = None
+    if evaluate_top:
+        if not TalentEvaluationAgent:
+            return jsonify({"error": "TalentEvaluationAgent is not available. Evaluation cannot proceed."}), 500
+        agent = TalentEvaluationAgent()
+        if not agent.is_configured():
+            return jsonify({"error": "Talent Evaluation Agent is not configured (e.g., API key missing)."}), 500
+
+    uploads = spool_uploads(uploaded_files, RESUME_EXTENSIONS)
+    try:
+        extracted = extract_text_from_uploads(uploads)
+    finally:
+        close_uploads(uploads)
+    candidates = [candidate for candidate, _, _ in uploads]
+    resume_texts = [text for text, _ in extracted]
+
+    with STAGE_SECONDS.time(stage="matching"):
+        result = match_resumes(resume_texts, catalog, top_k_jobs=top_k_jobs, top_k_resumes=top_k_resumes,
+                               max_jobs=max_jobs, min_similarity=min_similarity)
+    app.logger.info(f"Matched {len(candidates)} resume(s) against {len(catalog)} job(s) in {result.seconds:.3f}s")
+
+    if agent is not None:
+        evaluate_top_pairs(agent, result, resume_texts, catalog, evaluate_top, max_concurrency=max_concurrency,
+                           describe=lambda description: prompt_description(agent, description))
+
+    with STAGE_SECONDS.time(stage="response_build"):
+        response = jsonify(build_match_response(catalog, candidates, [error for _, error in extracted], result))
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics_api():
+    """Prometheus metrics for this process."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/rate-limit', methods=['GET'])
+def get_rate_limit_api():
+    """Gemini quota usage and how long calls have been queueing for it."""
+    return jsonify(get_rate_limiter().stats())
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats_api():
+    """Hit/miss counters of the evaluation cache and the extracted text cache."""
+    evaluation_cache = get_evaluation_cache()
+    return jsonify({
+        "evaluation": evaluation_cache.stats() if evaluation_cache is not None else None,
+        "extracted_text": get_text_cache().stats(),
+    })
 
 # Add these imports at the top of the file if not already present
 import logging
 from flask import request, jsonify
-from scraper import run_job_scraper
+from scrape_scheduler import ScrapeScheduler
 
-# Add this new endpoint after your existing endpoints
-@app.route('/api/scrape-jobs', methods=['POST'])
-def scrape_jobs_api():
-    app.logger.info("Received request for /api/scrape-jobs")
-    
-    # Get JSON data from request
-    data = request.get_json()
+# Scrapes run on their own small background queue so they never hold a request thread
+scrape_tasks = task_manager_from_env("SCRAPE_TASK", name="scrape-task", max_workers=1)
+scrape_scheduler = ScrapeScheduler(scrape_tasks)
+MIN_SCRAPE_INTERVAL_MINUTES = float(os.getenv("MIN_SCRAPE_INTERVAL_MINUTES", "15"))
+
+def parse_scrape_params(data):
+    """
+    Validate a scrape request body.
+
+    Returns:
+        tuple: (params, error_response) where exactly one is None
+    """
     if not data:
         app.logger.error("No JSON data in request to /api/scrape-jobs")
-        return jsonify({"error": "No data provided"}), 400
+        return None, (jsonify({"error": "No data provided"}), 400)
     
     # Extract and validate parameters
     search_term = data.get('search_term')
@@ -310,64 +775,136 @@ def scrape_jobs_api():
     # Validate required parameters
     if not search_term:
         app.logger.error("Missing search_term parameter in /api/scrape-jobs request")
-        return jsonify({"error": "search_term is required"}), 400
+        return None, (jsonify({"error": "search_term is required"}), 400)
     
     if not google_search_term:
         app.logger.error("Missing google_search_term parameter in /api/scrape-jobs request")
-        return jsonify({"error": "google_search_term is required"}), 400
+        return None, (jsonify({"error": "google_search_term is required"}), 400)
         
     if not location:
         app.logger.error("Missing location parameter in /api/scrape-jobs request")
-        return jsonify({"error": "location is required"}), 400
+        return None, (jsonify({"error": "location is required"}), 400)
     
     if not results_wanted:
         app.logger.error("Missing results_wanted parameter in /api/scrape-jobs request")
-        return jsonify({"error": "results_wanted is required"}), 400
+        return None, (jsonify({"error": "results_wanted is required"}), 400)
     
     try:
         # Convert results_wanted to integer
         results_wanted = int(results_wanted)
         if results_wanted <= 0:
-            return jsonify({"error": "results_wanted must be a positive integer"}), 400
+            return None, (jsonify({"error": "results_wanted must be a positive integer"}), 400)
     except ValueError:
         app.logger.error("Invalid results_wanted format in /api/scrape-jobs request")
-        return jsonify({"error": "results_wanted must be a valid integer"}), 400
+        return None, (jsonify({"error": "results_wanted must be a valid integer"}), 400)
     
     # Optional parameters
-    hours_old = data.get('hours_old', 72)
+    try:
+        hours_old = int(data.get('hours_old', 72))
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "hours_old must be a valid integer"}), 400)
     country_indeed = data.get('country_indeed', 'USA')
+
+    return {
+        "search_term": search_term,
+        "google_search_term": google_search_term,
+        "location": location,
+        "results_wanted": results_wanted,
+        "hours_old": hours_old,
+        "country_indeed": country_indeed,
+    }, None
+
+def build_scrape_response(report):
+    jobs_found = report["jobs_found"]
+    if jobs_found > 0:
+        return jsonify({
+            "message": f"Successfully scraped {jobs_found} jobs",
+            "jobs_found": jobs_found,
+            "sites": report["sites"]
+        }), 200
+    elif jobs_found == 0:
+        return jsonify({
+            "message": "No jobs found matching your criteria",
+            "jobs_found": 0,
+            "sites": report["sites"]
+        }), 200
+    else:
+        return jsonify({
+            "error": "An error occurred while scraping jobs",
+            "jobs_found": 0,
+            "sites": report["sites"]
+        }), 500
+
+@app.route('/api/scrape-jobs', methods=['POST'])
+def scrape_jobs_api():
+    app.logger.info("Received request for /api/scrape-jobs")
+    
+    # Get JSON data from request
+    data = request.get_json(silent=True)
+    params, error_response = parse_scrape_params(data)
+    if error_response:
+        return error_response
     
     try:
-        # Call the scraper function
-        app.logger.info(f"Running job scraper with: search_term={search_term}, location={location}, results_wanted={results_wanted}")
-        jobs_found = run_job_scraper(
-            search_term=search_term,
-            google_search_term=google_search_term,
-            location=location,
-            results_wanted=results_wanted,
-            hours_old=hours_old,
-            country_indeed=country_indeed
-        )
-        
-        if jobs_found > 0:
-            return jsonify({
-                "message": f"Successfully scraped {jobs_found} jobs",
-                "jobs_found": jobs_found
-            }), 200
-        elif jobs_found == 0:
-            return jsonify({
-                "message": "No jobs found matching your criteria",
-                "jobs_found": 0
-            }), 200
-        else:
-            return jsonify({
-                "error": "An error occurred while scraping jobs",
-                "jobs_found": 0
-            }), 500
-            
-    except Exception as e:
-        app.logger.error(f"Error in /api/scrape-jobs: {str(e)}")
-        return jsonify({"error": f"Failed to scrape jobs: {str(e)}"}), 500
+        app.logger.info(f"Queueing job scraper with: search_term={params['search_term']}, location={params['location']}, results_wanted={params['results_wanted']}")
+        task, created = scrape_scheduler.enqueue(params)
+    except TaskQueueFull as e:
+        app.logger.warning(f"Rejecting scrape request: {e}")
+        return jsonify({"error": "Too many scrapes are queued. Please retry later."}), 503
+    if not created:
+        app.logger.info(f"Coalesced scrape request into in-flight task {task.id}")
+
+    if data.get('wait'):
+        # Blocking mode for scripts that want the old synchronous response
+        seen = 0
+        while not task.finished:
+            events = task.wait_for_events(seen, timeout=SSE_KEEPALIVE_SECONDS)
+            seen += len(events)
+        if task.status != 'completed' or not task.result:
+            return jsonify({"error": f"Failed to scrape jobs: {task.error or task.status}"}), 500
+        return build_scrape_response(task.result)
+
+    status_url = url_for('get_scrape_task_api', task_id=task.id)
+    return jsonify({
+        "task_id": task.id,
+        "status": task.status,
+        "coalesced": not created,
+        "status_url": status_url
+    }), 202, {"Location": status_url}
+
+@app.route('/api/scrape-jobs/tasks/<task_id>', methods=['GET'])
+def get_scrape_task_api(task_id):
+    task = scrape_tasks.get(task_id)
+    if task is None:
+        return jsonify({"error": "Unknown or expired task id"}), 404
+    return jsonify(task.to_dict())
+
+@app.route('/api/scrape-jobs/schedules', methods=['GET'])
+def list_scrape_schedules_api():
+    return jsonify({"schedules": scrape_scheduler.list_schedules()})
+
+@app.route('/api/scrape-jobs/schedules', methods=['POST'])
+def create_scrape_schedule_api():
+    data = request.get_json(silent=True)
+    params, error_response = parse_scrape_params(data)
+    if error_response:
+        return error_response
+    try:
+        interval_minutes = float(data.get('interval_minutes'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "interval_minutes is required and must be a number"}), 400
+    if interval_minutes < MIN_SCRAPE_INTERVAL_MINUTES:
+        return jsonify({"error": f"interval_minutes must be at least {MIN_SCRAPE_INTERVAL_MINUTES:g}"}), 400
+
+    schedule = scrape_scheduler.add_schedule(params, interval_minutes * 60, run_now=bool(data.get('run_now', True)))
+    app.logger.info(f"Added scrape schedule {schedule['schedule_id']} every {interval_minutes:g} minute(s)")
+    return jsonify(schedule), 201
+
+@app.route('/api/scrape-jobs/schedules/<schedule_id>', methods=['DELETE'])
+def delete_scrape_schedule_api(schedule_id):
+    if not scrape_scheduler.remove_schedule(schedule_id):
+        return jsonify({"error": "Unknown schedule id"}), 404
+    return jsonify({"message": "Schedule removed", "schedule_id": schedule_id})
 
 if __name__ == '__main__':
     # It's good practice to load .env here too if running directly,
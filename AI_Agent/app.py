@@ -2,18 +2,28 @@ import streamlit as st
 import pandas as pd
 import os
 import tempfile
+import time
+import threading
 # import json # Removed
 import warnings
 # from google.oauth2.service_account import Credentials # Removed
 # from googleapiclient.discovery import build # Removed
 # from googleapiclient.http import MediaIoBaseDownload # Removed
-# import io # Removed
-import PyPDF2
-import docx2txt
+import io
+import html
 from pathlib import Path
 # import toml # Removed (only used for Drive secrets)
 from dotenv import load_dotenv
+try:
+    import openpyxl # For the Excel export
+except ImportError:
+    openpyxl = None
 from agents import TalentEvaluationAgent
+from extraction import SUPPORTED_EXTENSIONS, extract_texts, normalize_extension
+from catalog import get_job_catalog
+from ranking import select_for_evaluation
+from profiles import prompt_description
+from workers import DEFAULT_REQUEST_CONCURRENCY, MAX_EVALUATION_WORKERS, clamp_concurrency, iter_bounded
 
 # Filter out SyntaxWarnings about invalid escape sequences
 warnings.filterwarnings("ignore", category=SyntaxWarning, message="invalid escape sequence")
@@ -118,6 +128,10 @@ def local_css():
             border-left: 5px solid #FF9800;
         }
         
+        .card-filtered {
+            border-left: 5px solid #9E9E9E;
+        }
+        
         .score-badge {
             display: inline-block;
             padding: 0.25rem 0.75rem;
@@ -139,6 +153,10 @@ def local_css():
             background-color: #FF9800;
         }
         
+        .badge-filtered {
+            background-color: #9E9E9E;
+        }
+        
         /* Button styling */
         .stButton>button {
             background-color: #4CAF50;
@@ -315,43 +333,6 @@ def get_resume_agent():
 #     """)
 #     return None
 
-# Function to extract text from a PDF file
-def extract_text_from_pdf(file_obj):
-    pdf_reader = PyPDF2.PdfReader(file_obj)
-    text = ""
-    for page_num in range(len(pdf_reader.pages)):
-        text += pdf_reader.pages[page_num].extract_text()
-    return text
-
-# Function to extract text from a DOCX file
-def extract_text_from_docx(file_obj):
-    return docx2txt.process(file_obj)
-
-# Function to extract text from uploaded files
-def extract_text_from_file(file_obj, file_extension=None):
-    # If file_extension is not provided, try to get it from the file object
-    if file_extension is None:
-        try:
-            file_extension = Path(file_obj.name).suffix.lower()
-        except AttributeError:
-            # If file_obj doesn't have a name attribute (like BytesIO), the extension must be provided
-            st.error("Could not determine file type. Please provide file extension.")
-            return None
-    else:
-        # Ensure the extension starts with a dot
-        if not file_extension.startswith('.'):
-            file_extension = '.' + file_extension
-        file_extension = file_extension.lower()
-    
-    if file_extension == ".pdf":
-        return extract_text_from_pdf(file_obj)
-    elif file_extension == ".docx":
-        return extract_text_from_docx(file_obj)
-    elif file_extension == ".txt":
-        return file_obj.read().decode('utf-8')
-    else:
-        return None
-
 # Function to download file from Google Drive # Removed
 # def download_file_from_drive(drive_service, file_id):
 #     request = drive_service.files().get_media(fileId=file_id)
@@ -404,23 +385,137 @@ def extract_text_from_file(file_obj, file_extension=None):
 
 # Function to load job descriptions from CSV
 def load_job_descriptions(csv_path="jobs.csv"):
-    try:
-        df = pd.read_csv(csv_path)
-        # Check if required columns exist
-        if 'title' not in df.columns or 'description' not in df.columns:
-            st.error(f"Error: CSV file '{csv_path}' must contain 'title' and 'description' columns.")
-            return None, None
-        # Create a dictionary mapping titles to descriptions
-        job_data = df.set_index('title')['description'].to_dict()
-        return list(job_data.keys()), job_data
-    except FileNotFoundError:
+    """
+    Get the job catalog for the position picker.
+
+    The shared catalog is only re-read when the file's mtime or size changes,
+    so on an ordinary rerun this costs a stat() call.
+
+    Returns:
+        tuple: (job titles, CatalogSnapshot), or (None, None) if the catalog cannot be loaded
+    """
+    if not os.path.exists(csv_path):
         st.error(f"Error: Job description file '{csv_path}' not found. Please place it in the application directory.")
         return None, None
-    except Exception as e:
-        st.error(f"Error reading job descriptions from CSV: {e}")
+    snapshot = get_job_catalog(csv_path).snapshot()
+    if not snapshot.titles:
+        st.error(f"Error: No jobs could be loaded from '{csv_path}'. It must contain 'title' and 'description' columns.")
         return None, None
+    return snapshot.titles, snapshot
+
+def evaluation_key(job_title, uploaded_files, prefilter_top_k, prefilter_min_similarity):
+    """Identity of an evaluation run; stored results are shown only while it is unchanged."""
+    return (
+        job_title,
+        tuple((file.file_id, file.name, file.size) for file in uploaded_files or []),
+        int(prefilter_top_k),
+        float(prefilter_min_similarity),
+    )
+
+def classify_results(evaluations, score_threshold):
+    """
+    Turn stored evaluations into result rows for a threshold.
+
+    Only the Qualified/Not Qualified status depends on the threshold, so
+    moving the slider re-classifies the stored scores without any new AI calls.
+    """
+    results = []
+    for evaluation in evaluations:
+        result = dict(evaluation)
+        if result["Status"] == "Evaluated":
+            result["Status"] = "Qualified" if result["Match Score"] >= score_threshold else "Not Qualified"
+        results.append(result)
+    return results
 
 # Function to display results
+# Render the card of a candidate whose evaluation is still streaming in
+def render_live_card(placeholder, candidate, score, feedback, score_threshold):
+    if score is None:
+        badge = '<span class="score-badge badge-filtered">Scoring...</span>'
+        card_class = "card-filtered"
+    else:
+        try:
+            passed = float(score) >= score_threshold
+            score_text = f"{float(score):.1f}"
+        except (TypeError, ValueError):
+            passed, score_text = False, html.escape(str(score))
+        badge = f'<span class="score-badge {"badge-pass" if passed else "badge-fail"}">Match Score: {score_text}/10</span>'
+        card_class = "card-pass" if passed else "card-fail"
+    placeholder.markdown(
+        f"""
+        <div class="card {card_class}">
+            <h4>{html.escape(str(candidate))}</h4>
+            <p>{badge}</p>
+            <p><strong>Assessment:</strong> {html.escape(str(feedback))}</p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+# Evaluate one resume, showing the score as soon as it arrives and the feedback as it is written
+def stream_evaluation(agent, placeholder, candidate, resume_text, job_description, score_threshold):
+    score, feedback = None, ""
+    last_render = 0.0
+    render_live_card(placeholder, candidate, score, feedback, score_threshold)
+    for event, data in agent.evaluate_resume_stream(resume_text, job_description):
+        if event == 'done':
+            return data["score"], data["feedback"]
+        if event == 'score':
+            score = data["score"]
+        elif event == 'feedback':
+            feedback += data["text"]
+        # Redraw at most ~10 times a second; every redraw is a message to the browser
+        if event == 'score' or time.monotonic() - last_render > 0.1:
+            render_live_card(placeholder, candidate, score, feedback, score_threshold)
+            last_render = time.monotonic()
+    return score if score is not None else 0, feedback or "No response received."
+
+# Result statuses in display order, with the card style and badge of each
+RESULT_STATUS_STYLES = {
+    "Qualified": ("card-pass", "badge-pass"),
+    "Not Qualified": ("card-fail", "badge-fail"),
+    "Error": ("card-error", "badge-error"),
+    "Filtered": ("card-filtered", "badge-filtered"),
+}
+RESULTS_PAGE_SIZES = (10, 25, 50, 100)
+
+def prepare_results(results):
+    """
+    Build the results table once, sorted for display.
+
+    Rows are ordered by status (RESULT_STATUS_STYLES order), then by match
+    score, or local score for filtered resumes, highest first.
+
+    Returns:
+        pd.DataFrame: One row per candidate
+    """
+    df = pd.DataFrame(results)
+    if "Local Score" not in df.columns:
+        df["Local Score"] = float("nan")
+    df["Match Score"] = pd.to_numeric(df["Match Score"], errors="coerce").fillna(0)
+    status_rank = df["Status"].map({status: rank for rank, status in enumerate(RESULT_STATUS_STYLES)}).fillna(len(RESULT_STATUS_STYLES))
+    sort_score = df["Match Score"].where(df["Status"] != "Filtered", df["Local Score"])
+    order = pd.DataFrame({"rank": status_rank, "score": sort_score}).sort_values(
+        ["rank", "score"], ascending=[True, False], kind="stable"
+    ).index
+    return df.loc[order].reset_index(drop=True)
+
+def result_card(row):
+    card_class, badge_class = RESULT_STATUS_STYLES.get(row["Status"], ("card-error", "badge-error"))
+    if row["Status"] == "Error":
+        badge, label = "Error", "Message"
+    elif row["Status"] == "Filtered":
+        badge, label = f"Local Score: {row['Local Score']:.2f}", "Message"
+    else:
+        badge, label = f"Match Score: {row['Match Score']:.1f}/10", "Assessment"
+    return f"""
+        <div class="card {card_class}">
+            <h4>{html.escape(str(row['Candidate']))}</h4>
+            <p><span class="score-badge {badge_class}">{badge}</span></p>
+            <p><strong>{label}:</strong> {html.escape(str(row['Assessment']))}</p>
+        </div>
+        """
+
 def display_results(results, score_threshold):
     st.markdown('<div class="section-container">', unsafe_allow_html=True)
     st.markdown('<h2 class="section-title">Evaluation Results</h2>', unsafe_allow_html=True)
@@ -430,87 +525,83 @@ def display_results(results, score_threshold):
         st.markdown('</div>', unsafe_allow_html=True)
         return
 
-    df = pd.DataFrame(results)
-
-    # Separate qualified, not qualified, and error candidates
-    qualified = df[df['Status'] == 'Qualified']
-    not_qualified = df[df['Status'] == 'Not Qualified']
-    errors = df[df['Status'] == 'Error']
+    df = prepare_results(results)
+    counts = df["Status"].value_counts()
+    qualified_count = int(counts.get("Qualified", 0))
 
-    if qualified.empty and not_qualified.empty and errors.empty:
-         st.info("Processing completed, but no results were generated.")
-    elif qualified.empty and not_qualified.empty:
+    if qualified_count == 0 and counts.get("Not Qualified", 0) == 0 and counts.get("Filtered", 0) == 0:
         st.warning("All resumes resulted in errors during processing.")
-    elif qualified.empty:
+    elif qualified_count == 0:
         st.info(f"No candidates matched your qualifications threshold of {score_threshold}. Consider adjusting your threshold or job requirements.")
     else:
-        st.success(f"{len(qualified)} candidate(s) meet or exceed the qualification threshold of {score_threshold}.")
-
-    # Display Qualified Candidates
-    st.markdown('<h3 style="color: #4CAF50; margin-top: 20px;">Qualified Candidates</h3>', unsafe_allow_html=True)
-    qualified_df = df[df["Status"] == "Qualified"].sort_values(by="Match Score", ascending=False).reset_index(drop=True)
-    
-    if not qualified_df.empty:
-        for _, row in qualified_df.iterrows():
-            st.markdown(
-                f"""
-                <div class="card card-pass">
-                    <h4>{row['Candidate']}</h4>
-                    <p><span class="score-badge badge-pass">Match Score: {row['Match Score']:.1f}/10</span></p>
-                    <p><strong>Assessment:</strong> {row['Assessment']}</p>
-                </div>
-                """, 
-                unsafe_allow_html=True
-            )
-    else:
-        st.info(f"No candidates matched your qualifications threshold of {score_threshold}. Consider adjusting your threshold or job requirements.")
-    
-    # Display failed resumes
-    st.markdown('<h3 style="color: #F44336; margin-top: 20px;">Non-Qualified Candidates</h3>', unsafe_allow_html=True)
-    not_qualified_df = df[df["Status"] == "Not Qualified"].sort_values(by="Match Score", ascending=False).reset_index(drop=True)
-    
-    if not not_qualified_df.empty:
-        for _, row in not_qualified_df.iterrows():
-            st.markdown(
-                f"""
-                <div class="card card-fail">
-                    <h4>{row['Candidate']}</h4>
-                    <p><span class="score-badge badge-fail">Match Score: {row['Match Score']:.1f}/10</span></p>
-                    <p><strong>Assessment:</strong> {row['Assessment']}</p>
-                </div>
-                """, 
-                unsafe_allow_html=True
-            )
+        st.success(f"{qualified_count} candidate(s) meet or exceed the qualification threshold of {score_threshold}.")
+
+    # Filtering and paging work on the prepared table; only the visible page is rendered
+    filter_col, search_col, size_col = st.columns([2, 2, 1])
+    with filter_col:
+        statuses = [status for status in RESULT_STATUS_STYLES if counts.get(status, 0)]
+        status_filter = st.selectbox(
+            "Show:",
+            options=["All"] + statuses,
+            format_func=lambda status: f"{status} ({len(df) if status == 'All' else int(counts[status])})",
+            key="results_status"
+        )
+    with search_col:
+        search = st.text_input("Search candidates:", key="results_search")
+    with size_col:
+        page_size = st.selectbox("Per page:", options=RESULTS_PAGE_SIZES, key="results_page_size")
+
+    mask = pd.Series(True, index=df.index)
+    if status_filter != "All":
+        mask &= df["Status"] == status_filter
+    if search:
+        mask &= df["Candidate"].astype(str).str.contains(search, case=False, regex=False)
+    view = df[mask]
+
+    page_count = max(1, -(-len(view) // page_size))
+    if st.session_state.get("results_page", 1) > page_count:
+        st.session_state["results_page"] = page_count
+    page = st.number_input("Page:", min_value=1, max_value=page_count, step=1, key="results_page")
+    start = (page - 1) * page_size
+    page_rows = view.iloc[start:start + page_size]
+
+    if page_rows.empty:
+        st.info("No candidates match the current filter.")
     else:
-        st.info("All candidates have met your qualification threshold.")
-    
-    # Display error resumes
-    error_df = df[df["Status"] == "Error"].reset_index(drop=True)
-    if not error_df.empty:
-        st.markdown('<h3 style="color: #FF9800; margin-top: 20px;">Processing Errors</h3>', unsafe_allow_html=True)
-        for _, row in error_df.iterrows():
-            st.markdown(
-                f"""
-                <div class="card card-error">
-                    <h4>{row['Candidate']}</h4>
-                    <p><span class="score-badge badge-error">Error</span></p>
-                    <p><strong>Message:</strong> {row['Assessment']}</p>
-                </div>
-                """, 
-                unsafe_allow_html=True
+        st.caption(f"Showing {start + 1}-{start + len(page_rows)} of {len(view)} candidate(s), page {page} of {page_count}")
+        # One markdown element for the whole page rather than one per candidate
+        st.markdown("".join(result_card(row) for row in page_rows.to_dict("records")), unsafe_allow_html=True)
+
+    # Exports are only generated when a download button is clicked
+    export_columns = [column for column in ("Candidate", "Match Score", "Assessment", "Status", "Local Score") if column in df.columns]
+    export_df = df[export_columns]
+    csv_col, excel_col = st.columns([1, 1])
+    with csv_col:
+        st.download_button(
+            label="Download Talent Assessment Report",
+            data=lambda: export_df.to_csv(index=False),
+            file_name="ai_recruiter_talent_assessment.csv",
+            mime="text/csv",
+            on_click="ignore"
+        )
+    if openpyxl is not None:
+        with excel_col:
+            st.download_button(
+                label="Download as Excel",
+                data=lambda: results_to_excel(export_df),
+                file_name="ai_recruiter_talent_assessment.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore"
             )
-    
-    # Download results as CSV
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="Download Talent Assessment Report",
-        data=csv,
-        file_name="ai_recruiter_talent_assessment.csv",
-        mime="text/csv"
-    )
-    
+
     st.markdown('</div>', unsafe_allow_html=True)
 
+# Excel export of the results table (needs openpyxl)
+def results_to_excel(df):
+    output = io.BytesIO()
+    df.to_excel(output, index=False, sheet_name="Assessment")
+    return output.getvalue()
+
 
 # Main app
 def main():
@@ -529,10 +620,10 @@ def main():
     resume_agent = get_resume_agent()
 
     # Load job descriptions
-    job_titles, job_descriptions_map = load_job_descriptions()
+    job_titles, catalog = load_job_descriptions()
 
     # Stop execution if job descriptions failed to load
-    if job_titles is None or job_descriptions_map is None:
+    if job_titles is None or catalog is None:
         return
 
     # Create two columns for layout
@@ -555,11 +646,11 @@ def main():
 
         # Get the corresponding description
         if selected_title:
-            job_description = job_descriptions_map[selected_title]
+            job_description = catalog.description_for(selected_title)
             # Optionally display the selected description (read-only)
             st.text_area(
                 "Selected Job Description:",
-                value=job_description,
+                value=job_description or "This position has no job description to evaluate against.",
                 height=250, # Adjust height as needed
                 disabled=True,
                 key="job_desc_display" # Add a key to prevent state issues
@@ -578,6 +669,29 @@ def main():
             step=0.1,
             help="Candidates with scores above this threshold will be marked as 'Qualified'"
         )
+        prefilter_top_k = st.number_input(
+            "Only send the top N resumes to AI (0 = all):",
+            min_value=0,
+            value=0,
+            step=1,
+            help="Resumes are first ranked locally by text similarity to the job description; only the best N are scored by Gemini."
+        )
+        prefilter_min_similarity = st.slider(
+            "Minimum local similarity for AI evaluation:",
+            min_value=0.0,
+            max_value=1.0,
+            value=0.0,
+            step=0.01,
+            help="Resumes whose local similarity to the job description is below this value are not sent to Gemini."
+        )
+        max_concurrency = clamp_concurrency(st.number_input(
+            "Resumes evaluated in parallel:",
+            min_value=1,
+            max_value=max(1, MAX_EVALUATION_WORKERS),
+            value=clamp_concurrency(DEFAULT_REQUEST_CONCURRENCY),
+            step=1,
+            help="With 1, each assessment is shown as the AI writes it; with more, results appear in a table as they finish."
+        ))
         st.markdown('</div>', unsafe_allow_html=True)
 
     with col2:
@@ -596,7 +710,7 @@ def main():
         # if input_method == "Upload files directly": # Condition removed
         uploaded_files = st.file_uploader(
             "Upload candidate resumes (PDF, DOCX, TXT)",
-            type=["pdf", "docx", "txt"],
+            type=[extension.lstrip('.') for extension in SUPPORTED_EXTENSIONS],
             accept_multiple_files=True,
             help="You can select multiple files at once to batch process candidates"
         )
@@ -612,6 +726,8 @@ def main():
         evaluate_button = st.button("Evaluate Candidates", type="primary", use_container_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
 
+    current_key = evaluation_key(selected_title, uploaded_files, prefilter_top_k, prefilter_min_similarity)
+
     # Process resumes when button is clicked
     if evaluate_button and job_description: # Check if a job description is selected
         with st.spinner("Initializing talent evaluation process..."):
@@ -625,36 +741,130 @@ def main():
                 st.markdown('</div>', unsafe_allow_html=True)
                 return # Use return instead of st.stop() inside main()
 
-            results = []
+            evaluations = [None] * len(uploaded_files)
             progress_text = st.empty()
             progress_bar = st.progress(0)
 
+            # Extract text from every resume first so they can be pre-ranked together
+            # (one batch, cached by content hash and parsed across worker processes)
+            progress_text.markdown(f'<div class="processing-info">Reading {len(uploaded_files)} candidate resume(s)...</div>', unsafe_allow_html=True)
+            resume_texts = [
+                text for text, _ in extract_texts(
+                    [(file.getvalue(), normalize_extension(Path(file.name).suffix)) for file in uploaded_files]
+                )
+            ]
+
+            # Local TF-IDF pre-ranking decides which resumes are worth an AI call
+            local_scores = {}
+            selected = set(i for i, text in enumerate(resume_texts) if text)
+            if selected and (prefilter_top_k > 0 or prefilter_min_similarity > 0):
+                positions = sorted(selected)
+                tfidf = get_job_catalog().snapshot().tfidf
+                scores = tfidf.score([resume_texts[i] for i in positions], tfidf.text_vector(job_description))
+                keep = select_for_evaluation(
+                    scores,
+                    top_k=int(prefilter_top_k) if prefilter_top_k > 0 else None,
+                    min_similarity=prefilter_min_similarity if prefilter_min_similarity > 0 else None
+                )
+                local_scores = {i: float(score) for i, score in zip(positions, scores)}
+                selected = set(i for i, kept in zip(positions, keep) if kept)
+
+            # Resumes that need no AI call are settled straight away
             for i, file in enumerate(uploaded_files):
-                progress_text.markdown(f'<div class="processing-info">Analyzing candidate: {file.name} ({i+1}/{len(uploaded_files)})</div>', unsafe_allow_html=True)
-                resume_text = extract_text_from_file(file)
-
-                if resume_text:
-                    with st.spinner(f"AI is evaluating candidate {file.name}..."):
-                        score, feedback = resume_agent.evaluate_resume(resume_text, job_description)
-
-                        results.append({
-                            "Candidate": file.name,
-                            "Match Score": score,
-                            "Assessment": feedback,
-                            "Status": "Qualified" if score >= score_threshold else "Not Qualified"
-                        })
-                else:
-                    results.append({
+                if not resume_texts[i]:
+                    evaluations[i] = {
                         "Candidate": file.name,
                         "Match Score": 0,
                         "Assessment": "Could not extract text from resume file.",
                         "Status": "Error"
-                    })
-
-                progress_bar.progress((i + 1) / len(uploaded_files))
-
+                    }
+                elif i not in selected:
+                    evaluations[i] = {
+                        "Candidate": file.name,
+                        "Match Score": 0,
+                        "Assessment": f"Not sent for AI evaluation: local similarity to the job description ({local_scores[i]:.2f}) did not make the pre-ranking cut.",
+                        "Status": "Filtered"
+                    }
+                if i in local_scores and evaluations[i] is not None:
+                    evaluations[i]["Local Score"] = round(local_scores[i], 4)
+
+            # Evaluation prompts use the job's condensed requirement profile
+            prompt_job_description = prompt_description(resume_agent, job_description) if selected else job_description
+
+            def record_evaluation(i, score, feedback):
+                evaluations[i] = {
+                    "Candidate": uploaded_files[i].name,
+                    "Match Score": score,
+                    "Assessment": feedback,
+                    "Status": "Evaluated"  # Qualified or not is decided per threshold by classify_results()
+                }
+                if i in local_scores:
+                    evaluations[i]["Local Score"] = round(local_scores[i], 4)
+
+            def show_progress(done):
+                progress_bar.progress(done / len(uploaded_files))
+                progress_text.markdown(f'<div class="processing-info">Evaluated {done} of {len(uploaded_files)} candidate(s)</div>', unsafe_allow_html=True)
+
+            to_evaluate = sorted(selected)
+            done = len(uploaded_files) - len(to_evaluate)
+            show_progress(done)
+            cancel_event = threading.Event()
+            # Clicking Cancel reruns the script, which interrupts this loop at its next UI update;
+            # the finally block then stops queued evaluations and keeps what has finished
+            cancel_placeholder = st.empty()
+            cancel_placeholder.button("Cancel evaluation", key="cancel_evaluation")
+            try:
+                if max_concurrency == 1:
+                    # One at a time: show the candidate being scored as the AI writes its assessment
+                    live_card = st.empty()
+                    for i in to_evaluate:
+                        score, feedback = stream_evaluation(
+                            resume_agent, live_card, uploaded_files[i].name, resume_texts[i], prompt_job_description, score_threshold
+                        )
+                        record_evaluation(i, score, feedback)
+                        done += 1
+                        show_progress(done)
+                    live_card.empty()
+                else:
+                    # Live table of finished evaluations, in the order they finish
+                    live_table = st.empty()
+                    finished = []
+                    outcomes = iter_bounded(
+                        lambda i: resume_agent.evaluate_resume(resume_texts[i], prompt_job_description),
+                        to_evaluate,
+                        max_concurrency=max_concurrency,
+                        cancel_event=cancel_event
+                    )
+                    for index, result, error in outcomes:
+                        i = to_evaluate[index]
+                        score, feedback = result if error is None else (0, f"Error: {error}")
+                        record_evaluation(i, score, feedback)
+                        finished.append({
+                            "Candidate": uploaded_files[i].name,
+                            "Match Score": score,
+                            "Status": "Qualified" if score >= score_threshold else "Not Qualified"
+                        })
+                        done += 1
+                        show_progress(done)
+                        live_table.dataframe(pd.DataFrame(finished), hide_index=True)
+                    live_table.empty()
+            finally:
+                cancel_event.set()
+                cancelled = 0
+                for i, file in enumerate(uploaded_files):
+                    if evaluations[i] is None:
+                        cancelled += 1
+                        evaluations[i] = {
+                            "Candidate": file.name,
+                            "Match Score": 0,
+                            "Assessment": "Not evaluated: the evaluation was cancelled.",
+                            "Status": "Error"
+                        }
+                # Kept across reruns so that widget changes (e.g. the threshold) do not re-run the evaluation
+                st.session_state["evaluation"] = {"key": current_key, "evaluations": evaluations, "cancelled": cancelled}
+
+            cancel_placeholder.empty()
             progress_text.empty()
-            display_results(results, score_threshold)
 
             # Removed the Google Drive processing block
             # else:  # Google Drive link
@@ -665,6 +875,13 @@ def main():
     elif evaluate_button and not job_description:
          st.warning("Please select a job position first.")
 
+    # Show the last evaluation while the job, resumes and pre-ranking settings are unchanged
+    stored = st.session_state.get("evaluation")
+    if stored is not None and stored["key"] == current_key:
+        if stored.get("cancelled"):
+            st.warning(f"Evaluation cancelled: {stored['cancelled']} of {len(stored['evaluations'])} resume(s) were not evaluated.")
+        display_results(classify_results(stored["evaluations"], score_threshold), score_threshold)
+
 
     # Footer
     st.markdown(
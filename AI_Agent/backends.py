@@ -0,0 +1,221 @@
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import Counter
+from types import SimpleNamespace
+from ranking import tokenize
+
+try:
+    import google.generativeai as genai
+except ImportError:
+    genai = None
+
+# Which evaluator the agent talks to: 'gemini' (default) or 'fake' for offline runs
+EVALUATOR_BACKEND = os.getenv("EVALUATOR_BACKEND", "gemini")
+
+# Fake backend behaviour
+FAKE_LATENCY_SECONDS = float(os.getenv("FAKE_EVALUATOR_LATENCY_SECONDS", "0.5"))
+FAKE_LATENCY_JITTER_SECONDS = float(os.getenv("FAKE_EVALUATOR_JITTER_SECONDS", "0.2"))
+FAKE_ERROR_RATE = float(os.getenv("FAKE_EVALUATOR_ERROR_RATE", "0"))
+FAKE_SEED = int(os.getenv("FAKE_EVALUATOR_SEED", "0"))
+# Characters per chunk when the fake backend streams a response
+FAKE_STREAM_CHUNK_CHARS = 24
+
+
+class GeminiBackend:
+    """Evaluator backend that calls the Gemini API through google.generativeai."""
+
+    name = "gemini"
+
+    def __init__(self, model_name, api_key=None):
+        self.model_name = model_name
+        self.api_key = api_key if api_key is not None else os.getenv("GEMINI_API_KEY")
+        self._model = None
+        if self.is_configured():
+            genai.configure(api_key=self.api_key)
+            self._model = genai.GenerativeModel(model_name)
+
+    def is_configured(self):
+        return genai is not None and self.api_key is not None and self.api_key.strip() != ""
+
+    def generate_content(self, prompt, **kwargs):
+        return self._model.generate_content(prompt, **kwargs)
+
+
+class FakeBackendError(Exception):
+    """Simulated API failure; carries an HTTP-style code so retry logic treats it like a real one."""
+
+    def __init__(self, message, code=429):
+        super().__init__(message)
+        self.code = code
+
+
+def _usage(prompt_tokens, output_tokens):
+    return SimpleNamespace(
+        prompt_token_count=prompt_tokens,
+        candidates_token_count=output_tokens,
+        total_token_count=prompt_tokens + output_tokens,
+    )
+
+
+class FakeResponse:
+    """Stands in for a Gemini response: .text, .usage_metadata, and iteration over chunks when streamed."""
+
+    def __init__(self, text, usage, chunk_delays=None):
+        self.text = text
+        self.usage_metadata = usage
+        self._chunk_delays = chunk_delays
+
+    def __iter__(self):
+        if self._chunk_delays is None:
+            yield self
+            return
+        for index, delay in enumerate(self._chunk_delays):
+            time.sleep(delay)
+            start = index * FAKE_STREAM_CHUNK_CHARS
+            yield SimpleNamespace(text=self.text[start:start + FAKE_STREAM_CHUNK_CHARS])
+
+
+def _section(prompt, start, end=None):
+    """Text between two headings of one of the agent's prompts."""
+    pattern = re.escape(start) + r"\s*(.*?)\s*" + (re.escape(end) if end else r"$")
+    match = re.search(pattern, prompt, re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def _key_terms(text, limit=30):
+    return [term for term, _ in Counter(tokenize(text)).most_common(limit)]
+
+
+def _fake_evaluation(resume_text, job_description):
+    """Deterministic score and feedback from how many of the job's key terms the resume mentions."""
+    terms = _key_terms(job_description)
+    resume_terms = set(tokenize(resume_text))
+    matched = [term for term in terms if term in resume_terms]
+    missing = [term for term in terms if term not in resume_terms]
+    coverage = len(matched) / len(terms) if terms else 0.0
+    score = round(1 + 9 * coverage, 1)
+    feedback = (
+        f"The resume covers {len(matched)} of {len(terms)} key terms from the job description"
+        f"{' (' + ', '.join(matched[:8]) + ')' if matched else ''}."
+        f"{' Missing: ' + ', '.join(missing[:8]) + '.' if missing else ''}"
+    )
+    return score, feedback
+
+
+class FakeBackend:
+    """
+    Deterministic offline stand-in for Gemini.
+
+    It answers the agent's evaluation, multi-resume and job-condensing prompts
+    in the formats those prompts ask for, scoring resumes by keyword coverage
+    of the job description. Latency (per prompt, seeded by its hash), the
+    sequence of injected errors (seeded by FAKE_EVALUATOR_SEED) and token
+    usage are reproducible, so the whole pipeline can be load-tested and
+    benchmarked without network access or an API key.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=FAKE_LATENCY_SECONDS, jitter=FAKE_LATENCY_JITTER_SECONDS,
+                 error_rate=FAKE_ERROR_RATE, seed=FAKE_SEED):
+        self.model_name = "fake-evaluator"
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.seed = seed
+        self._errors = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def is_configured(self):
+        return True
+
+    def _respond(self, prompt):
+        if "Job Posting:" in prompt:
+            posting = _section(prompt, "Job Posting:", "Your response should be")
+            terms = _key_terms(posting, limit=12)
+            first_line = posting.strip().splitlines()[0] if posting.strip() else ""
+            return json.dumps({
+                "title": first_line[:80],
+                "seniority": "",
+                "location_constraints": "",
+                "must_have": terms[:8],
+                "nice_to_have": terms[8:],
+                "responsibilities": [],
+            })
+        if 'candidate_id="' in prompt:
+            job_description = _section(prompt, "Job Description:", "Resumes:")
+            answers = []
+            for candidate_id, resume_text in re.findall(r'<resume candidate_id="([^"]+)">\n(.*?)\n</resume>', prompt, re.DOTALL):
+                score, feedback = _fake_evaluation(resume_text, job_description)
+                answers.append({"candidate_id": candidate_id, "score": score, "feedback": feedback})
+            return json.dumps(answers)
+        job_description = _section(prompt, "Job Description:", "Resume:")
+        resume_text = _section(prompt, "Resume:", "Rate this resume")
+        score, feedback = _fake_evaluation(resume_text, job_description)
+        return json.dumps({"score": score, "feedback": feedback})
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        delay = max(0.0, self.latency + random.Random(digest ^ self.seed).uniform(-self.jitter, self.jitter))
+        with self._lock:
+            self.calls += 1
+            fail = self.error_rate > 0 and self._errors.random() < self.error_rate
+            if fail:
+                self.failures += 1
+
+        if fail:
+            time.sleep(delay * 0.2)
+            raise FakeBackendError("429 Resource has been exhausted (simulated)", code=429)
+
+        text = self._respond(prompt)
+        prompt_tokens = len(prompt) // 4 + 1
+        output_tokens = len(text) // 4 + 1
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+        usage = _usage(prompt_tokens, output_tokens)
+
+        if not stream:
+            time.sleep(delay)
+            return FakeResponse(text, usage)
+        # Streamed: the first chunk arrives after a third of the latency, the rest spread over the remainder
+        chunks = max(1, -(-len(text) // FAKE_STREAM_CHUNK_CHARS))
+        delays = [delay / 3] + [(delay * 2 / 3) / max(1, chunks - 1)] * (chunks - 1)
+        return FakeResponse(text, usage, chunk_delays=delays)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+
+def create_backend(model_name, name=None):
+    """
+    Build the evaluator backend selected by name or EVALUATOR_BACKEND.
+
+    Args:
+        model_name (str): Gemini model to use for the 'gemini' backend
+        name (str, optional): 'gemini' or 'fake'. Defaults to EVALUATOR_BACKEND.
+
+    Returns:
+        GeminiBackend or FakeBackend: Object with is_configured() and generate_content()
+    """
+    name = (name or EVALUATOR_BACKEND).strip().lower()
+    if name == "fake":
+        return FakeBackend()
+    if name != "gemini":
+        raise ValueError(f"Unknown EVALUATOR_BACKEND '{name}' (expected 'gemini' or 'fake')")
+    return GeminiBackend(model_name)
@@ -0,0 +1,289 @@
+"""
+Benchmarks for the JobMatch hot paths.
+
+Generates synthetic catalogs and resume corpora, then times catalog load,
+title lookup, resume text extraction and end-to-end /api/evaluate through the
+Flask test client with the offline fake evaluator. Results are written as JSON
+so runs from different commits can be compared:
+
+    python benchmarks/run.py --output before.json
+    python benchmarks/run.py --output after.json --compare before.json
+
+Use --sizes to pick catalog sizes (the default includes 1M postings, which
+takes a few GB of disk and several minutes).
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+AGENT_DIR = os.path.dirname(BENCHMARK_DIR)
+sys.path.insert(0, AGENT_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+import synthetic
+
+
+def summarize(samples):
+    """Timing statistics in seconds for a list of samples."""
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "runs": count,
+        "min": ordered[0],
+        "mean": sum(ordered) / count,
+        "p50": ordered[count // 2],
+        "p95": ordered[min(count - 1, int(count * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+def timed(func, repeat=1):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples), result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=AGENT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_catalog(workdir, rows, args, results):
+    from catalog import JobCatalog
+    from columnar import columnar_path_for, write_columnar
+    import pandas as pd
+
+    csv_path = os.path.join(workdir, f"jobs_{rows}.csv")
+    start = time.perf_counter()
+    synthetic.write_catalog(csv_path, rows, description_words=args.description_words, seed=args.seed)
+    print(f"  generated {rows} postings in {time.perf_counter() - start:.1f}s")
+
+    stats, snapshot = timed(lambda: JobCatalog(csv_path).snapshot(), repeat=args.repeat)
+    results.append({"benchmark": "catalog_load", "source": "csv", "rows": rows, "seconds": stats,
+                    "jobs_loaded": len(snapshot)})
+
+    write_columnar(pd.read_csv(csv_path), columnar_path_for(csv_path))
+    # The columnar copy is newer than the CSV, so the catalog loads from it
+    stats, columnar_snapshot = timed(lambda: JobCatalog(csv_path).snapshot(), repeat=args.repeat)
+    results.append({"benchmark": "catalog_load", "source": "columnar", "rows": rows, "seconds": stats,
+                    "jobs_loaded": len(columnar_snapshot)})
+
+    rng = random.Random(args.seed)
+    titles = snapshot.titles
+    exact = [rng.choice(titles) for _ in range(args.queries)]
+    queries = {
+        "exact": exact,
+        "prefix": [title[:max(3, len(title) // 2)] for title in exact],
+        "substring": [title.split(" ", 1)[-1][:12] for title in exact],
+        "fuzzy": [title.replace("e", "a", 1).lower() for title in exact],
+    }
+    for kind, batch in queries.items():
+        fuzzy = kind == "fuzzy"
+        samples = []
+        for query in batch:
+            start = time.perf_counter()
+            snapshot.title_index.search(query, limit=5, fuzzy=fuzzy)
+            samples.append(time.perf_counter() - start)
+        results.append({"benchmark": "title_lookup", "kind": kind, "rows": rows, "seconds": summarize(samples)})
+
+    if not args.keep:
+        os.remove(csv_path)
+        shutil.rmtree(columnar_path_for(csv_path), ignore_errors=True)
+
+
+def bench_extraction(resumes, args, results):
+    from extraction import extract_texts, get_text_cache
+
+    documents = []
+    for path, ext in resumes:
+        with open(path, "rb") as f:
+            documents.append((f.read(), ext))
+
+    for ext in (".pdf", ".docx", ".txt"):
+        subset = [doc for doc in documents if doc[1] == ext]
+        if not subset:
+            continue
+
+        def cold():
+            get_text_cache().clear()
+            return extract_texts(subset)
+
+        stats, extracted = timed(cold, repeat=args.repeat)
+        errors = sum(1 for _, error in extracted if error)
+        results.append({"benchmark": "extraction", "format": ext, "files": len(subset), "cache": "cold",
+                        "seconds": stats, "errors": errors})
+        stats, _ = timed(lambda: extract_texts(subset), repeat=args.repeat)
+        results.append({"benchmark": "extraction", "format": ext, "files": len(subset), "cache": "warm",
+                        "seconds": stats})
+
+
+def bench_end_to_end(workdir, resumes, args, results):
+    import io
+    import logging
+    import api
+    from catalog import get_job_catalog
+
+    # api.py logs every request at DEBUG; keep logging out of the measurement
+    logging.disable(logging.INFO)
+
+    # Any title of the synthetic catalog; all descriptions have the same shape
+    job_title = get_job_catalog().snapshot().titles[0]
+    uploads = []
+    for path, _ in resumes:
+        with open(path, "rb") as f:
+            uploads.append((f.read(), os.path.basename(path)))
+    client = api.app.test_client()
+
+    for batch_size in args.batch_sizes:
+        batch = uploads[:batch_size]
+        if len(batch) < batch_size:
+            continue
+
+        def request():
+            response = client.post(
+                '/api/evaluate',
+                data={
+                    "job_title": job_title,
+                    "max_concurrency": str(args.concurrency),
+                    "resumes": [(io.BytesIO(data), name) for data, name in batch],
+                },
+                content_type='multipart/form-data'
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/evaluate returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+            return response.get_json()
+
+        request()  # Warm-up: first-request setup (profile store, TF-IDF index) is not what is measured
+        stats, body = timed(request, repeat=args.repeat)
+        results.append({"benchmark": "evaluate_end_to_end", "resumes": batch_size, "concurrency": args.concurrency,
+                        "evaluator_latency": args.evaluator_latency, "seconds": stats,
+                        "resumes_per_second": batch_size / stats["mean"],
+                        "results": len(body["results"])})
+
+
+def compare(current, baseline_path):
+    """Print the mean-time ratio of every benchmark against a baseline results file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    def key(entry):
+        return json.dumps({k: v for k, v in entry.items() if not isinstance(v, (dict, float)) and k not in ("results", "errors", "jobs_loaded")}, sort_keys=True)
+
+    previous = {key(entry): entry for entry in baseline["results"]}
+    print(f"\nCompared with {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for entry in current["results"]:
+        old = previous.get(key(entry))
+        if old is None:
+            continue
+        ratio = entry["seconds"]["mean"] / old["seconds"]["mean"] if old["seconds"]["mean"] else float("inf")
+        label = ", ".join(f"{k}={v}" for k, v in entry.items() if k not in ("seconds",) and not isinstance(v, (dict, float)))
+        print(f"  {label}: {old['seconds']['mean'] * 1000:.2f}ms -> {entry['seconds']['mean'] * 1000:.2f}ms ({ratio:.2f}x)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the JobMatch hot paths.")
+    parser.add_argument("--sizes", default="1000,100000,1000000", help="Comma-separated catalog sizes")
+    parser.add_argument("--description-words", type=int, default=120, help="Words per synthetic description")
+    parser.add_argument("--resumes", type=int, default=60, help="Synthetic resumes to generate (PDF/DOCX/TXT)")
+    parser.add_argument("--queries", type=int, default=200, help="Title lookups per kind")
+    parser.add_argument("--batch-sizes", default="1,10,50", help="Resumes per /api/evaluate request")
+    parser.add_argument("--concurrency", type=int, default=4, help="max_concurrency sent with /api/evaluate")
+    parser.add_argument("--evaluator-latency", type=float, default=0.0, help="Fake evaluator latency per call (s)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", default="catalog,extraction,end_to_end", help="Benchmarks to run")
+    parser.add_argument("--workdir", help="Directory for generated data (default: a temporary directory)")
+    parser.add_argument("--keep", action="store_true", help="Keep generated catalogs")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON results file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.batch_sizes = [int(size) for size in args.batch_sizes.split(",") if size]
+    args.only = set(args.only.split(","))
+    return args
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output)
+    workdir = args.workdir or tempfile.mkdtemp(prefix="jobmatch-bench-")
+    os.makedirs(workdir, exist_ok=True)
+
+    # Offline, deterministic evaluator and no state shared with a real deployment.
+    # Must be set before agents/api are imported.
+    os.environ.update({
+        "EVALUATOR_BACKEND": "fake",
+        "FAKE_EVALUATOR_LATENCY_SECONDS": str(args.evaluator_latency),
+        "FAKE_EVALUATOR_JITTER_SECONDS": "0",
+        "FAKE_EVALUATOR_SEED": str(args.seed),
+        "EVALUATION_CACHE": "off",
+        "GEMINI_RATE_LIMIT_FILE": "off",
+        "GEMINI_RPM": "0",
+        "GEMINI_TPM": "0",
+        "JOB_PROFILE_PATH": os.path.join(workdir, "profiles.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+    })
+
+    results = []
+    resumes = synthetic.write_resumes(os.path.join(workdir, "resumes"), args.resumes, seed=args.seed)
+
+    if "catalog" in args.only:
+        for rows in args.sizes:
+            print(f"Catalog benchmarks: {rows} postings")
+            bench_catalog(workdir, rows, args, results)
+
+    if "extraction" in args.only:
+        print(f"Extraction benchmarks: {len(resumes)} resumes")
+        bench_extraction(resumes, args, results)
+
+    if "end_to_end" in args.only:
+        print("End-to-end /api/evaluate benchmarks")
+        # api.py reads jobs.csv from the working directory
+        synthetic.write_catalog(os.path.join(workdir, "jobs.csv"), 1000, args.description_words, seed=args.seed)
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            bench_end_to_end(workdir, resumes, args, results)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: (sorted(v) if isinstance(v, set) else v) for k, v in vars(args).items()},
+        },
+        "results": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {len(results)} results to {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+    if not args.workdir and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import io
+import os
+import csv
+import random
+import zipfile
+from xml.sax.saxutils import escape
+
+# Vocabulary for synthetic postings and resumes; fixed so every run generates the same data
+ROLES = [
+    "Software Engineer", "Backend Engineer", "Frontend Developer", "Data Scientist", "Data Engineer",
+    "Machine Learning Engineer", "DevOps Engineer", "Site Reliability Engineer", "Product Manager",
+    "QA Engineer", "Security Engineer", "Mobile Developer", "Cloud Architect", "Business Analyst",
+    "Solutions Architect", "Database Administrator", "Technical Writer", "UX Designer",
+]
+LEVELS = ["Junior", "Associate", "Senior", "Staff", "Principal", "Lead"]
+AREAS = ["Payments", "Search", "Platform", "Infrastructure", "Analytics", "Growth", "Ads", "Identity", "Android", "Cloud"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises", "Soylent"]
+LOCATIONS = ["Mountain View, CA, US", "New York, NY, US", "Austin, TX, US", "Seattle, WA, US", "Remote, US", "London, UK"]
+SKILLS = [
+    "python", "java", "go", "rust", "typescript", "react", "kubernetes", "docker", "aws", "gcp", "azure",
+    "sql", "postgresql", "spark", "kafka", "airflow", "terraform", "linux", "pytorch", "tensorflow",
+    "graphql", "grpc", "redis", "elasticsearch", "ci/cd", "microservices", "distributed systems", "etl",
+]
+FILLER = [
+    "collaborate", "with", "cross-functional", "teams", "to", "design", "build", "and", "operate", "reliable",
+    "services", "at", "scale", "mentor", "engineers", "own", "roadmap", "deliver", "customer", "impact",
+    "benefits", "include", "health", "insurance", "equal", "opportunity", "employer", "qualified", "applicants",
+]
+
+# Columns written for each synthetic posting (a subset of what jobspy produces)
+CATALOG_FIELDS = ["id", "site", "job_url", "title", "company", "location", "date_posted", "job_type", "description"]
+
+
+def _description(rng, words):
+    skills = rng.sample(SKILLS, 6)
+    body = " ".join(rng.choice(FILLER) for _ in range(max(0, words - 12)))
+    return (
+        f"Minimum qualifications: experience with {', '.join(skills[:3])}. "
+        f"Preferred qualifications: {', '.join(skills[3:])}. {body}"
+    )
+
+
+def write_catalog(path, rows, description_words=120, seed=0):
+    """
+    Write a synthetic jobs.csv with `rows` postings.
+
+    Rows are streamed to disk, so even million-row catalogs use little memory.
+
+    Returns:
+        str: path
+    """
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CATALOG_FIELDS)
+        for index in range(rows):
+            title = f"{rng.choice(LEVELS)} {rng.choice(ROLES)}, {rng.choice(AREAS)}"
+            writer.writerow([
+                f"bench-{index}",
+                rng.choice(["indeed", "linkedin"]),
+                f"https://jobs.example.com/{index}",
+                title,
+                rng.choice(COMPANIES),
+                rng.choice(LOCATIONS),
+                "2025-05-08",
+                "fulltime",
+                _description(rng, description_words),
+            ])
+    return path
+
+
+def resume_text(rng, words=400):
+    skills = rng.sample(SKILLS, 8)
+    lines = [
+        f"{rng.choice(['Alex', 'Sam', 'Jordan', 'Taylor'])} {rng.choice(['Lee', 'Patel', 'Garcia', 'Kim'])}",
+        f"{rng.choice(LEVELS)} {rng.choice(ROLES)}",
+        f"Skills: {', '.join(skills)}",
+    ]
+    body = [rng.choice(FILLER + SKILLS) for _ in range(words)]
+    for start in range(0, len(body), 12):
+        lines.append(" ".join(body[start:start + 12]))
+    return lines
+
+
+def make_pdf(lines, lines_per_page=40):
+    """Minimal PDF with one text line per row, readable by PyPDF2."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>"]
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages)))
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>")
+    font = 3 + 2 * len(pages)
+    for i, page in enumerate(pages):
+        text = " ".join(
+            f"({line.replace(chr(92), '').replace('(', '').replace(')', '')}) Tj 0 -14 Td" for line in page
+        )
+        stream = f"BT /F1 10 Tf 50 760 Td {text} ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {4 + 2 * i} 0 R"
+            f" /Resources << /Font << /F1 {font} 0 R >> >> >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def make_docx(lines):
+    """Minimal DOCX (just word/document.xml and its manifest), readable by docx2txt."""
+    paragraphs = "".join(f"<w:p><w:r><w:t>{escape(line)}</w:t></w:r></w:p>" for line in lines)
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{paragraphs}</w:body></w:document>"
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        "</Types>"
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("word/document.xml", document)
+    return out.getvalue()
+
+
+def write_resumes(directory, count, formats=(".pdf", ".docx", ".txt"), words=400, seed=0):
+    """
+    Write `count` synthetic resumes, cycling through formats.
+
+    Returns:
+        list: (path, extension) for every file written
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    written = []
+    for index in range(count):
+        ext = formats[index % len(formats)]
+        lines = resume_text(rng, words)
+        if ext == ".pdf":
+            data = make_pdf(lines)
+        elif ext == ".docx":
+            data = make_docx(lines)
+        else:
+            data = "\n".join(lines).encode("utf-8")
+        path = os.path.join(directory, f"resume_{index:05d}{ext}")
+        with open(path, "wb") as f:
+            f.write(data)
+        written.append((path, ext))
+    return written
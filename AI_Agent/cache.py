@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "evaluation_cache.sqlite3")
+# Disk hits whose access times are buffered before being written back in one statement
+ACCESS_FLUSH_ENTRIES = 100
+
+
+def normalize_text(text):
+    """Collapse whitespace so re-extracted copies of the same document hash the same."""
+    return " ".join(str(text or "").split())
+
+
+def make_cache_key(*parts):
+    """
+    Build a content-addressed cache key.
+
+    Args:
+        *parts: Strings that together identify the cached value
+
+    Returns:
+        str: Hex SHA-256 digest of the parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = str(part).encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(str(len(encoded)).encode("ascii") + b":" + encoded)
+    return digest.hexdigest()
+
+
+class EvaluationCache:
+    """
+    Two-tier cache for evaluation results (also used memory-only for extracted text).
+
+    A bounded in-memory LRU sits in front of an optional SQLite file, which is
+    shared by every process (Flask API and Streamlit app) using the same path.
+    Entries expire after ttl_seconds; the disk tier is trimmed to
+    max_disk_entries by least recent use. Access times of disk hits are
+    buffered and written back with the next store or trim, so reads do not
+    each cost a write. Lookups are counted in jobmatch_cache_lookups_total
+    under the cache's name.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_entries=1024,
+                 max_disk_entries=50000, ttl_seconds=30 * 24 * 3600, name="evaluation"):
+        self.path = path
+        self.name = name
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes_since_trim = 0
+        self._pending_access = {}  # key -> accessed_at not yet written to disk
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if path:
+            try:
+                self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS evaluations ("
+                    " key TEXT PRIMARY KEY,"
+                    " value TEXT NOT NULL,"
+                    " stored_at REAL NOT NULL,"
+                    " accessed_at REAL NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_evaluations_accessed ON evaluations (accessed_at)")
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Evaluation cache disk tier disabled ({path}): {e}")
+                self._conn = None
+
+    def _expired(self, stored_at, now):
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def _remember(self, key, stored_at, value):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): Key from make_cache_key()
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self._record("memory_hits")
+                    return entry[1]
+                del self._memory[key]
+
+            if self._conn is not None:
+                try:
+                    row = self._conn.execute(
+                        "SELECT value, stored_at FROM evaluations WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and not self._expired(row[1], now):
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self._pending_access[key] = now
+                        if len(self._pending_access) >= ACCESS_FLUSH_ENTRIES:
+                            self._flush_access()
+                            self._conn.commit()
+                        self._record("disk_hits")
+                        return value
+                except sqlite3.Error as e:
+                    logger.warning(f"Evaluation cache read failed: {e}")
+
+            self._record("misses")
+            return None
+
+    def _record(self, result):
+        # Called with the lock held
+        self._stats[result] += 1
+        CACHE_LOOKUPS.inc(cache=self.name, result=result)
+
+    def _flush_access(self):
+        # Write buffered access times of disk hits; the caller commits
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE evaluations SET accessed_at = ? WHERE key = ?",
+                [(accessed_at, key) for key, accessed_at in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+
+    def set(self, key, value):
+        """
+        Store a JSON-serialisable value in both tiers.
+
+        Args:
+            key (str): Key from make_cache_key()
+            value: Value to cache
+        """
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._stats["stores"] += 1
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO evaluations (key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                self._pending_access.pop(key, None)
+                self._flush_access()
+                self._writes_since_trim += 1
+                if self._writes_since_trim >= 100:
+                    self._trim(now)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Evaluation cache write failed: {e}")
+
+    def _trim(self, now):
+        self._writes_since_trim = 0
+        self._flush_access()
+        if self.ttl_seconds is not None:
+            cursor = self._conn.execute("DELETE FROM evaluations WHERE stored_at < ?", (now - self.ttl_seconds,))
+            self._stats["evictions"] += max(cursor.rowcount, 0)
+        cursor = self._conn.execute(
+            "DELETE FROM evaluations WHERE key IN ("
+            " SELECT key FROM evaluations ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+        self._stats["evictions"] += max(cursor.rowcount, 0)
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            self._pending_access.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM evaluations")
+                self._conn.commit()
+
+    def stats(self):
+        """
+        Get hit/miss counters.
+
+        Returns:
+            dict: Counters plus the current memory size and overall hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+_evaluation_cache = None
+_evaluation_cache_lock = threading.Lock()
+
+
+def get_evaluation_cache():
+    """
+    Get the process-wide evaluation cache, configured from the environment.
+
+    EVALUATION_CACHE=off disables caching entirely. EVALUATION_CACHE_PATH
+    (empty for memory only), EVALUATION_CACHE_MEMORY_ENTRIES,
+    EVALUATION_CACHE_DISK_ENTRIES and EVALUATION_CACHE_TTL_HOURS tune it.
+
+    Returns:
+        EvaluationCache or None: The shared cache, or None if disabled
+    """
+    global _evaluation_cache
+    if os.getenv("EVALUATION_CACHE", "on").lower() in ("off", "0", "false"):
+        return None
+    with _evaluation_cache_lock:
+        if _evaluation_cache is None:
+            _evaluation_cache = EvaluationCache(
+                path=os.getenv("EVALUATION_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_memory_entries=int(os.getenv("EVALUATION_CACHE_MEMORY_ENTRIES", "1024")),
+                max_disk_entries=int(os.getenv("EVALUATION_CACHE_DISK_ENTRIES", "50000")),
+                ttl_seconds=float(os.getenv("EVALUATION_CACHE_TTL_HOURS", "720")) * 3600,
+            )
+        return _evaluation_cache
@@ -0,0 +1,421 @@
+import os
+import heapq
+import logging
+import threading
+from collections import Counter
+from collections.abc import Mapping
+import pandas as pd
+from ranking import TfidfIndex
+from columnar import CURRENT_FILE, ColumnarTable, columnar_path_for
+from metrics import ERRORS, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Columns the catalog relies on after normalisation
+REQUIRED_COLUMNS = ['job_title', 'description']
+# Columns loaded from jobs.csv; everything else is skipped while parsing
+CATALOG_COLUMNS = ('id', 'Title', 'title', 'job_title', 'job_url', 'company', 'location', 'description')
+# Short columns read eagerly from the columnar catalog; the rest are fetched per row on demand
+EAGER_COLUMNS = ('id', 'title', 'job_url', 'company', 'location')
+
+
+def is_valid_text(value):
+    """Return True if a CSV cell holds usable text (not None, NaN or only whitespace)."""
+    if value is None:
+        return False
+    if isinstance(value, float) and pd.isna(value):
+        return False
+    return str(value).strip() != ""
+
+
+def normalize_title(title):
+    """Lowercase a job title and collapse runs of whitespace."""
+    return " ".join(str(title).lower().split())
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+# Match kinds, in ranking order (lower is better)
+MATCH_EXACT = 0
+MATCH_PREFIX = 1
+MATCH_SUBSTRING = 2
+MATCH_FUZZY = 3
+
+MATCH_KIND_NAMES = {
+    MATCH_EXACT: 'exact',
+    MATCH_PREFIX: 'prefix',
+    MATCH_SUBSTRING: 'substring',
+    MATCH_FUZZY: 'fuzzy',
+}
+
+
+class TitleMatch:
+    """A single job returned by TitleIndex.search()."""
+
+    __slots__ = ('job', 'position', 'kind', 'similarity', 'has_description', 'has_url')
+
+    def __init__(self, job, position, kind, similarity, has_description, has_url):
+        self.job = job
+        self.position = position
+        self.kind = kind
+        self.similarity = similarity
+        self.has_description = has_description
+        self.has_url = has_url
+
+    @property
+    def title(self):
+        return self.job.get('job_title')
+
+    def to_dict(self):
+        return {
+            "job_title": self.title,
+            "match_type": MATCH_KIND_NAMES[self.kind],
+            "similarity": round(self.similarity, 3),
+            "has_description": self.has_description,
+            "job_url": self.job.get('job_url') if self.has_url else None,
+        }
+
+
+class TitleIndex:
+    """
+    Trigram inverted index over normalised job titles.
+
+    Substring queries only verify the titles that contain every trigram of the
+    query, so lookups touch a small fraction of the catalog. Titles are indexed
+    once per distinct normalised value; each maps back to all its job records.
+    """
+
+    def __init__(self, jobs, min_similarity=0.3, has_description=None):
+        self.min_similarity = min_similarity
+        self._jobs = jobs
+        self._titles = []          # title id -> normalised title
+        self._title_jobs = []      # title id -> list of job positions
+        self._title_grams = []     # title id -> number of distinct trigrams
+        self._postings = {}        # trigram -> list of title ids
+        if has_description is None:
+            has_description = [is_valid_text(job.get('description')) for job in jobs]
+        self._has_description = list(has_description)
+        self._has_url = [is_valid_text(job.get('job_url')) for job in jobs]
+
+        title_ids = {}
+        for position, job in enumerate(jobs):
+            title = job.get('job_title')
+            if not is_valid_text(title):
+                continue
+            normalized = normalize_title(title)
+            title_id = title_ids.get(normalized)
+            if title_id is None:
+                title_id = len(self._titles)
+                title_ids[normalized] = title_id
+                self._titles.append(normalized)
+                self._title_jobs.append([])
+                grams = _trigrams(normalized)
+                self._title_grams.append(len(grams))
+                for gram in grams:
+                    self._postings.setdefault(gram, []).append(title_id)
+            self._title_jobs[title_id].append(position)
+
+    def _substring_candidates(self, query):
+        grams = _trigrams(query)
+        if not grams:
+            # Too short to use the index; check every distinct title
+            return range(len(self._titles))
+        postings = sorted((self._postings.get(gram, ()) for gram in grams), key=len)
+        if not postings[0]:
+            return ()
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return candidates
+
+    def _fuzzy_candidates(self, query):
+        grams = _trigrams(query)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._postings.get(gram, ()))
+        hits = []
+        for title_id, count in shared.items():
+            # Dice coefficient over the two trigram sets
+            similarity = 2.0 * count / (len(grams) + self._title_grams[title_id])
+            if similarity >= self.min_similarity:
+                hits.append((title_id, MATCH_FUZZY, similarity))
+        return hits
+
+    def search(self, query, limit=None, fuzzy=False):
+        """
+        Find jobs whose title matches a query.
+
+        Results are ranked exact > prefix > substring > fuzzy match, then by
+        fuzzy similarity, then jobs with a valid description before jobs with
+        only a job_url, then by position in the catalog.
+
+        Args:
+            query (str): Title, or part of a title, to look for
+            limit (int, optional): Return at most this many matches. Defaults to all.
+            fuzzy (bool, optional): Fall back to trigram similarity when no title
+                contains the query. Defaults to False.
+
+        Returns:
+            list: TitleMatch objects, best first
+        """
+        normalized = normalize_title(query or "")
+        if not normalized:
+            return []
+
+        title_hits = []
+        for title_id in self._substring_candidates(normalized):
+            title = self._titles[title_id]
+            if normalized not in title:
+                continue
+            if title == normalized:
+                kind = MATCH_EXACT
+            elif title.startswith(normalized):
+                kind = MATCH_PREFIX
+            else:
+                kind = MATCH_SUBSTRING
+            title_hits.append((title_id, kind, 1.0))
+
+        if not title_hits and fuzzy:
+            title_hits = self._fuzzy_candidates(normalized)
+
+        ranked = (
+            ((kind, -similarity, not self._has_description[position], not self._has_url[position], position), similarity)
+            for title_id, kind, similarity in title_hits
+            for position in self._title_jobs[title_id]
+        )
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, ranked, key=lambda item: item[0])
+        else:
+            ranked = sorted(ranked, key=lambda item: item[0])
+
+        return [
+            TitleMatch(self._jobs[key[4]], key[4], key[0], similarity, not key[2], not key[3])
+            for key, similarity in ranked
+        ]
+
+
+class ColumnarJob(Mapping):
+    """
+    Job record backed by a ColumnarTable row.
+
+    Short fields are held in memory; any other column (notably 'description')
+    is decoded from the memory-mapped table only when it is looked up.
+    """
+
+    __slots__ = ('_table', '_row', '_fields')
+
+    def __init__(self, table, row, fields):
+        self._table = table
+        self._row = row
+        self._fields = fields
+
+    def __getitem__(self, key):
+        if key in self._fields:
+            return self._fields[key]
+        column = 'title' if key == 'job_title' else key
+        if self._table.has_column(column):
+            return self._table.value(column, self._row)
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from self._fields
+        for column in self._table.columns:
+            if column != 'title' and column not in self._fields:
+                yield column
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the job catalog as it was at one point in time.
+
+    Attributes:
+        jobs (list): Job records as dicts, with the title normalised to 'job_title'
+        titles (list): Deduplicated job titles in file order
+        jobs_by_title (dict): Exact title -> list of job records with that title
+        has_description (list): Per job, whether it has a valid description
+        title_index (TitleIndex): Trigram index for partial and fuzzy title lookups
+        signature (tuple): (source, mtime_ns, size) of the file the snapshot was built from
+    """
+
+    def __init__(self, jobs, signature=None, has_description=None):
+        self.jobs = jobs
+        self.signature = signature
+        if has_description is None:
+            has_description = [is_valid_text(job.get('description')) for job in jobs]
+        self.has_description = has_description
+        self.jobs_by_title = {}
+        self._description_rows = {}  # title -> position of its first job with a description
+        self._tfidf = None
+        self._tfidf_lock = threading.Lock()
+
+        for position, job in enumerate(jobs):
+            title = job.get('job_title')
+            if not is_valid_text(title):
+                continue
+            self.jobs_by_title.setdefault(title, []).append(job)
+            if title not in self._description_rows and has_description[position]:
+                self._description_rows[title] = position
+
+        self.titles = list(self.jobs_by_title.keys())
+        self.title_index = TitleIndex(jobs, has_description=has_description)
+
+    def description_for(self, title):
+        """First valid description for an exact title, or None."""
+        position = self._description_rows.get(title)
+        return None if position is None else self.jobs[position].get('description')
+
+    def __len__(self):
+        return len(self.jobs)
+
+    @property
+    def tfidf(self):
+        """TfidfIndex over the job descriptions (row = job position), built on first use."""
+        if self._tfidf is None:
+            with self._tfidf_lock:
+                if self._tfidf is None:
+                    self._tfidf = TfidfIndex(
+                        job.get('description') if valid else ""
+                        for job, valid in zip(self.jobs, self.has_description)
+                    )
+        return self._tfidf
+
+
+class JobCatalog:
+    """
+    Process-wide job catalog loaded from jobs.csv or its columnar copy.
+
+    When the scraper has written jobs.columns next to the CSV and it is at
+    least as new, the catalog is loaded from it: only the short columns are
+    read, and descriptions stay memory-mapped until a job's description is
+    looked up. Otherwise only CATALOG_COLUMNS are parsed from the CSV.
+
+    The result is kept in memory as a CatalogSnapshot. Each access costs a
+    couple of os.stat() calls; the source is only read again when its mtime or
+    size changes. If a reload fails, the previous snapshot keeps being served.
+    """
+
+    def __init__(self, csv_path='jobs.csv'):
+        self.csv_path = csv_path
+        self.columnar_path = columnar_path_for(csv_path)
+        self._lock = threading.Lock()
+        self._snapshot = CatalogSnapshot([])
+        self._loaded = False
+
+    def _file_signature(self):
+        signatures = []
+        for source, path in (('columnar', os.path.join(self.columnar_path, CURRENT_FILE)), ('csv', self.csv_path)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signatures.append((source, stat.st_mtime_ns, stat.st_size))
+        if not signatures:
+            return None
+        # Prefer the columnar copy unless the CSV has been written since
+        return max(signatures, key=lambda signature: (signature[1], signature[0] == 'columnar'))
+
+    def snapshot(self):
+        """
+        Get the current catalog, reloading it first if the file changed on disk.
+
+        Returns:
+            CatalogSnapshot: The current catalog contents
+        """
+        signature = self._file_signature()
+        current = self._snapshot
+        if self._loaded and signature == current.signature:
+            return current
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            if self._loaded and signature == self._snapshot.signature:
+                return self._snapshot
+            self._reload(signature)
+            return self._snapshot
+
+    def _reload(self, signature):
+        if signature is None:
+            logger.error(f"Error: {self.csv_path} not found. Serving empty job list.")
+            self._snapshot = CatalogSnapshot([])
+            self._loaded = True
+            return
+
+        try:
+            with STAGE_SECONDS.time(stage="catalog_load"):
+                if signature[0] == 'columnar':
+                    snapshot = self._read_columnar(signature)
+                else:
+                    snapshot = CatalogSnapshot(self._read_jobs(), signature)
+        except Exception as e:
+            ERRORS.inc(stage="catalog_load", type=type(e).__name__)
+            logger.error(f"Error reading or processing {signature[0]} catalog for {self.csv_path}: {e}")
+            if not self._loaded:
+                self._snapshot = CatalogSnapshot([], signature)
+                self._loaded = True
+            return
+
+        self._snapshot = snapshot
+        self._loaded = True
+        logger.info(f"Loaded {len(snapshot)} jobs from {signature[0]} catalog for {self.csv_path}")
+
+    def _read_columnar(self, signature):
+        table = ColumnarTable(self.columnar_path)
+        if not table.has_column('title') or not table.has_column('description'):
+            logger.error(f"Error: columnar catalog must contain columns: title, description")
+            return CatalogSnapshot([], signature)
+
+        eager = [column for column in EAGER_COLUMNS if table.has_column(column)]
+        values = {column: table.read_column(column) for column in eager}
+        jobs = []
+        for row in range(len(table)):
+            fields = {('job_title' if column == 'title' else column): values[column][row] for column in eager}
+            jobs.append(ColumnarJob(table, row, fields))
+        has_description = (~table.nulls('description')).tolist()
+        return CatalogSnapshot(jobs, signature, has_description=has_description)
+
+    def _read_jobs(self):
+        jobs_df = pd.read_csv(self.csv_path, usecols=lambda column: column in CATALOG_COLUMNS)
+
+        # Handle potential variations in job title column name
+        if 'Title' in jobs_df.columns and 'job_title' not in jobs_df.columns:
+            jobs_df.rename(columns={'Title': 'job_title'}, inplace=True)
+        elif 'title' in jobs_df.columns and 'job_title' not in jobs_df.columns:
+            jobs_df.rename(columns={'title': 'job_title'}, inplace=True)
+
+        if not all(col in jobs_df.columns for col in REQUIRED_COLUMNS):
+            logger.error(f"Error: CSV must contain columns: {', '.join(REQUIRED_COLUMNS)}")
+            return []
+
+        return jobs_df.to_dict(orient='records')
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_job_catalog(csv_path='jobs.csv'):
+    """
+    Get the shared JobCatalog for a CSV file, creating it on first use.
+
+    Args:
+        csv_path (str): Path to the jobs CSV file
+
+    Returns:
+        JobCatalog: The process-wide catalog for that file
+    """
+    key = os.path.abspath(csv_path)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = JobCatalog(csv_path)
+            _catalogs[key] = catalog
+        return catalog
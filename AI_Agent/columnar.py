@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+
+# Pointer file naming the active version directory; replaced atomically on write
+CURRENT_FILE = "CURRENT"
+# Older versions kept around so readers that still have them mapped are not surprised
+KEEP_VERSIONS = 2
+
+
+def columnar_path_for(csv_path):
+    """Return the columnar directory that sits next to a CSV catalog (jobs.csv -> jobs.columns)."""
+    return os.path.splitext(csv_path)[0] + ".columns"
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and pd.isna(value)) or str(value).strip() == ""
+
+
+def write_columnar(jobs_df, path):
+    """
+    Write a DataFrame as a columnar table of UTF-8 text columns.
+
+    Each column is stored as one contiguous byte blob plus an int64 offsets
+    array and a null mask, so a reader can load just the columns it needs and
+    fetch single values by row without parsing anything else. Blank cells are
+    stored as nulls. The new version is published by atomically replacing the
+    CURRENT pointer file.
+
+    Args:
+        jobs_df (pandas.DataFrame): Table to write
+        path (str): Columnar directory, e.g. 'jobs.columns'
+
+    Returns:
+        str: The version directory that was written
+    """
+    os.makedirs(path, exist_ok=True)
+    version = f"v-{time.time_ns()}"
+    version_dir = os.path.join(path, version)
+    os.makedirs(version_dir)
+
+    columns = [str(column) for column in jobs_df.columns]
+    for index, column in enumerate(jobs_df.columns):
+        values = jobs_df[column].tolist()
+        nulls = np.fromiter((_is_blank(value) for value in values), dtype=bool, count=len(values))
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        with open(os.path.join(version_dir, f"{index}.data"), "wb") as f:
+            position = 0
+            for row, value in enumerate(values):
+                if not nulls[row]:
+                    encoded = str(value).encode("utf-8")
+                    f.write(encoded)
+                    position += len(encoded)
+                offsets[row + 1] = position
+        np.save(os.path.join(version_dir, f"{index}.offsets.npy"), offsets)
+        np.save(os.path.join(version_dir, f"{index}.nulls.npy"), nulls)
+
+    with open(os.path.join(version_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"rows": len(jobs_df), "columns": columns, "created_at": time.time()}, f)
+
+    pointer_tmp = os.path.join(path, f".{CURRENT_FILE}.{version}.tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, os.path.join(path, CURRENT_FILE))
+
+    # Drop versions older than the last KEEP_VERSIONS
+    versions = sorted(name for name in os.listdir(path) if name.startswith("v-"))
+    for stale in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(path, stale), ignore_errors=True)
+    return version_dir
+
+
+class ColumnarTable:
+    """
+    Read-only view of one version of a columnar table written by write_columnar().
+
+    Offsets and null masks are memory-mapped; a column's text blob is mapped on
+    first use and values are decoded one row at a time, so large text columns
+    such as descriptions never have to be held on the heap.
+    """
+
+    def __init__(self, path):
+        with open(os.path.join(path, CURRENT_FILE), encoding="utf-8") as f:
+            self.version_dir = os.path.join(path, f.read().strip())
+        with open(os.path.join(self.version_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.columns = meta["columns"]
+        self._column_index = {name: index for index, name in enumerate(self.columns)}
+        self._mapped = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.rows
+
+    def _column(self, name):
+        mapped = self._mapped.get(name)
+        if mapped is not None:
+            return mapped
+        with self._lock:
+            if name not in self._mapped:
+                index = self._column_index[name]
+                base = os.path.join(self.version_dir, str(index))
+                offsets = np.load(f"{base}.offsets.npy", mmap_mode="r")
+                nulls = np.load(f"{base}.nulls.npy", mmap_mode="r")
+                size = os.path.getsize(f"{base}.data")
+                # np.memmap cannot map an empty file
+                data = np.memmap(f"{base}.data", dtype=np.uint8, mode="r") if size else np.zeros(0, dtype=np.uint8)
+                self._mapped[name] = (offsets, nulls, data)
+            return self._mapped[name]
+
+    def has_column(self, name):
+        return name in self._column_index
+
+    def nulls(self, name):
+        """Boolean array, True where the column is null or blank."""
+        return np.asarray(self._column(name)[1])
+
+    def value(self, name, row):
+        """Decode a single cell; None for null cells."""
+        offsets, nulls, data = self._column(name)
+        if nulls[row]:
+            return None
+        return bytes(data[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def read_column(self, name):
+        """Decode a whole column into a list. Meant for short columns such as titles and URLs."""
+        offsets, nulls, data = self._column(name)
+        blob = bytes(data)
+        return [
+            None if nulls[row] else blob[offsets[row]:offsets[row + 1]].decode("utf-8")
+            for row in range(self.rows)
+        ]
+
+
+if __name__ == "__main__":
+    # Convert an existing CSV catalog: python columnar.py [jobs.csv]
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else "jobs.csv"
+    written = write_columnar(pd.read_csv(csv_path), columnar_path_for(csv_path))
+    print(f"Wrote {written}")
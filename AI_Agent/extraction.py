@@ -0,0 +1,475 @@
+import io
+import os
+import queue
+import atexit
+import hashlib
+import logging
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+try:
+    import PyPDF2 # For PDF text extraction
+except ImportError:
+    PyPDF2 = None
+try:
+    import pypdf # Fallback PDF backend
+except ImportError:
+    pypdf = None
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text # Fallback PDF backend
+except ImportError:
+    pdfminer_extract_text = None
+try:
+    import fitz # PyMuPDF, fallback PDF backend
+except ImportError:
+    fitz = None
+try:
+    import docx2txt # For DOCX text extraction
+except ImportError:
+    docx2txt = None
+try:
+    import resource # Memory limit for worker processes (Unix only)
+except ImportError:
+    resource = None
+
+from cache import EvaluationCache
+from metrics import ERRORS, STAGE_SECONDS, Histogram, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+# Worker processes that parse documents; 0 parses in-process with no timeout or isolation
+EXTRACTION_PROCESSES = int(os.getenv("EXTRACTION_PROCESSES", str(min(4, os.cpu_count() or 1))))
+# A file still being parsed after this many seconds is abandoned and its worker killed
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "20"))
+# Only the first pages of a PDF are read (0 = all)
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "50"))
+# Address-space limit of each worker process (0 = none)
+EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024"))
+# Workers are replaced after this many files so leaks in the parsers cannot build up
+EXTRACTION_MAX_TASKS_PER_WORKER = int(os.getenv("EXTRACTION_MAX_TASKS_PER_WORKER", "200"))
+# PDF backends tried in order until one returns text; unavailable ones are skipped
+PDF_BACKENDS = [name.strip() for name in os.getenv("PDF_BACKENDS", "pypdf2,pypdf,pdfminer,pymupdf").split(",") if name.strip()]
+
+EXTRACTION_FILE_SECONDS = REGISTRY.register(Histogram(
+    "jobmatch_extraction_file_seconds", "Text extraction time per file.", labels=("format", "outcome")
+))
+
+# Extracted text keyed by the SHA-256 of the file bytes (memory only)
+_text_cache = EvaluationCache(
+    path=None,
+    max_memory_entries=int(os.getenv("EXTRACTION_CACHE_ENTRIES", "512")),
+    ttl_seconds=None,
+    name="extracted_text"
+)
+
+
+def get_text_cache():
+    """Get the process-wide extracted text cache."""
+    return _text_cache
+
+
+def normalize_extension(file_extension):
+    """Lowercase an extension and make sure it starts with a dot."""
+    file_extension = (file_extension or "").lower()
+    if file_extension and not file_extension.startswith('.'):
+        file_extension = '.' + file_extension
+    return file_extension
+
+
+def content_hash(data):
+    """Return the hex SHA-256 of a file's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ExtractionResult:
+    """
+    Outcome of extracting one document.
+
+    Attributes:
+        text (str): Extracted text, or None on failure
+        error (str): Why extraction failed, or None
+        seconds (float): Wall-clock extraction time (0 for cache hits)
+        backend (str): Parser that produced the text ('pypdf2', 'docx2txt', 'cache', ...)
+        pages (int): Pages read, for PDFs
+        truncated (bool): Whether pages beyond EXTRACTION_MAX_PAGES were skipped
+    """
+
+    def __init__(self, text=None, error=None, seconds=0.0, backend=None, pages=None, truncated=False):
+        self.text = text
+        self.error = error
+        self.seconds = seconds
+        self.backend = backend
+        self.pages = pages
+        self.truncated = truncated
+
+    def to_dict(self):
+        return {
+            "error": self.error,
+            "seconds": round(self.seconds, 4),
+            "backend": self.backend,
+            "pages": self.pages,
+            "truncated": self.truncated,
+        }
+
+
+# --- Parsers (run inside the worker processes) ---
+
+def _page_limit(page_count, max_pages):
+    return page_count if not max_pages else min(page_count, max_pages)
+
+
+def _pdf_pypdf2(data, max_pages):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    count = len(reader.pages)
+    limit = _page_limit(count, max_pages)
+    return "".join(reader.pages[i].extract_text() or "" for i in range(limit)), limit, limit < count
+
+
+def _pdf_pypdf(data, max_pages):
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    count = len(reader.pages)
+    limit = _page_limit(count, max_pages)
+    return "".join(reader.pages[i].extract_text() or "" for i in range(limit)), limit, limit < count
+
+
+def _pdf_pdfminer(data, max_pages):
+    text = pdfminer_extract_text(io.BytesIO(data), maxpages=max_pages or 0)
+    return text, None, False
+
+
+def _pdf_pymupdf(data, max_pages):
+    with fitz.open(stream=data, filetype="pdf") as document:
+        count = document.page_count
+        limit = _page_limit(count, max_pages)
+        return "".join(document[i].get_text() for i in range(limit)), limit, limit < count
+
+
+PDF_BACKEND_FUNCTIONS = {
+    "pypdf2": (lambda: PyPDF2 is not None, _pdf_pypdf2),
+    "pypdf": (lambda: pypdf is not None, _pdf_pypdf),
+    "pdfminer": (lambda: pdfminer_extract_text is not None, _pdf_pdfminer),
+    "pymupdf": (lambda: fitz is not None, _pdf_pymupdf),
+}
+
+
+def _extract_pdf(data, max_pages):
+    # Try each available backend until one finds text; a scanned PDF may legitimately have none
+    errors = []
+    result = None
+    for name in PDF_BACKENDS:
+        available, parse = PDF_BACKEND_FUNCTIONS.get(name, (lambda: False, None))
+        if not available():
+            continue
+        try:
+            text, pages, truncated = parse(data, max_pages)
+        except Exception as e:
+            errors.append(f"{name}: {str(e)}")
+            continue
+        result = ExtractionResult(text=text, backend=name, pages=pages, truncated=truncated)
+        if text and text.strip():
+            return result
+    if result is not None:
+        return result
+    if errors:
+        return ExtractionResult(error=f"Error processing file: {'; '.join(errors)}")
+    return ExtractionResult(error="No PDF library is installed, cannot process PDF.")
+
+
+def extract_text_result(data, file_extension, max_pages=EXTRACTION_MAX_PAGES):
+    """
+    Extract text from a document held in memory, in this process. No caching.
+
+    Args:
+        data (bytes): Raw file contents
+        file_extension (str): Extension such as '.pdf', '.docx' or '.txt'
+        max_pages (int, optional): Read at most this many PDF pages (0 = all)
+
+    Returns:
+        ExtractionResult: Text or error, with timing
+    """
+    started = time.perf_counter()
+    file_extension = normalize_extension(file_extension)
+    try:
+        if file_extension == '.pdf':
+            result = _extract_pdf(data, max_pages)
+        elif file_extension == '.docx':
+            if not docx2txt:
+                result = ExtractionResult(error="docx2txt is not installed, cannot process DOCX.")
+            else:
+                result = ExtractionResult(text=docx2txt.process(io.BytesIO(data)), backend="docx2txt")
+        elif file_extension == '.txt':
+            result = ExtractionResult(text=data.decode('utf-8'), backend="utf-8")
+        else:
+            result = ExtractionResult(error="Unsupported file type. Please upload .pdf, .docx or .txt.")
+    except Exception as e:
+        result = ExtractionResult(error=f"Error processing file: {str(e)}")
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def extract_text(data, file_extension):
+    """
+    Extract text from a document held in memory, in this process. No caching.
+
+    Returns:
+        tuple: (text, error) where exactly one is None
+    """
+    result = extract_text_result(data, file_extension)
+    return result.text, result.error
+
+
+def _worker_main(connection, memory_limit_mb):
+    # Entry point of a worker process: parse documents sent over the pipe until told to stop
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        data, file_extension, max_pages = task
+        try:
+            result = extract_text_result(data, file_extension, max_pages)
+        except MemoryError:
+            result = ExtractionResult(error="Error processing file: out of memory.")
+        connection.send(result)
+
+
+# --- Sandbox (parent side) ---
+
+class _SandboxWorker:
+    """One worker process and the pipe used to send it documents."""
+
+    def __init__(self, context):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_connection, EXTRACTION_MEMORY_LIMIT_MB),
+            daemon=True,
+            name="extraction-worker"
+        )
+        self.process.start()
+        child_connection.close()
+        self.tasks = 0
+
+    def run(self, task, timeout):
+        """
+        Send one document and wait for its result.
+
+        Returns:
+            tuple: (ExtractionResult or None, timed_out); the result is None if the
+                worker timed out or died
+        """
+        self.tasks += 1
+        try:
+            self.connection.send(task)
+            if not self.connection.poll(timeout):
+                return None, True
+            return self.connection.recv(), False
+        except (EOFError, OSError):
+            return None, False
+
+    def stop(self, kill=False):
+        if not kill and self.process.is_alive():
+            try:
+                self.connection.send(None)
+            except (OSError, ValueError):
+                kill = True
+            self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=5)
+        self.connection.close()
+
+
+class ExtractionSandbox:
+    """
+    Pool of worker processes that parse untrusted documents.
+
+    Each file is parsed by one worker under a hard timeout. A worker that
+    times out, crashes or hits its memory limit is killed and replaced, so a
+    malformed upload costs at most EXTRACTION_TIMEOUT_SECONDS and never
+    wedges the pool.
+    """
+
+    def __init__(self, processes=EXTRACTION_PROCESSES, timeout=EXTRACTION_TIMEOUT_SECONDS):
+        self.processes = max(1, processes)
+        self.timeout = timeout
+        # spawn, not fork: the API and Streamlit app are multi-threaded
+        self._context = multiprocessing.get_context("spawn")
+        self._idle = queue.LifoQueue()
+        self._all = set()
+        self._lock = threading.Lock()
+        self._dispatch = ThreadPoolExecutor(max_workers=self.processes, thread_name_prefix="extraction")
+        for _ in range(self.processes):
+            self._idle.put(None)  # Slot for a worker started on first use
+
+    def _start_worker(self):
+        worker = _SandboxWorker(self._context)
+        with self._lock:
+            self._all.add(worker)
+        return worker
+
+    def _retire(self, worker, kill):
+        with self._lock:
+            self._all.discard(worker)
+        worker.stop(kill=kill)
+
+    def extract(self, data, file_extension, max_pages=EXTRACTION_MAX_PAGES):
+        """
+        Parse one document in a worker process.
+
+        Returns:
+            ExtractionResult: Text or error, with the wall-clock time including the wait for the worker
+        """
+        started = time.perf_counter()
+        worker = self._idle.get()
+        try:
+            if worker is None:
+                worker = self._start_worker()
+            result, timed_out = worker.run((data, file_extension, max_pages), self.timeout)
+            if result is None:
+                self._retire(worker, kill=True)
+                worker = None
+                result = ExtractionResult(
+                    error=f"Extraction took longer than {self.timeout:g}s and was stopped." if timed_out
+                    else "Extraction failed: the file crashed the parser."
+                )
+            elif worker.tasks >= EXTRACTION_MAX_TASKS_PER_WORKER:
+                self._retire(worker, kill=False)
+                worker = None
+        finally:
+            self._idle.put(worker)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def submit(self, data, file_extension, max_pages=EXTRACTION_MAX_PAGES):
+        """Schedule extract() on the dispatch threads. Returns a Future of an ExtractionResult."""
+        return self._dispatch.submit(self.extract, data, file_extension, max_pages)
+
+    def shutdown(self):
+        self._dispatch.shutdown(wait=False)
+        with self._lock:
+            workers = list(self._all)
+            self._all.clear()
+        for worker in workers:
+            worker.stop(kill=True)
+
+
+_sandbox = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox():
+    """Get the process-wide ExtractionSandbox, or None when EXTRACTION_PROCESSES is 0."""
+    global _sandbox
+    if EXTRACTION_PROCESSES <= 0:
+        return None
+    with _sandbox_lock:
+        if _sandbox is None:
+            _sandbox = ExtractionSandbox()
+            atexit.register(_sandbox.shutdown)
+        return _sandbox
+
+
+def _record(result, file_extension):
+    fmt = file_extension.lstrip('.') or "unknown"
+    EXTRACTION_FILE_SECONDS.observe(result.seconds, format=fmt, outcome="error" if result.error else "ok")
+    if result.error:
+        ERRORS.inc(stage="text_extraction", type=fmt)
+
+
+def extract_documents(documents):
+    """
+    Extract text from a batch of documents, using the cache and the sandbox.
+
+    Documents already seen (by SHA-256 of their bytes) come from the cache.
+    Identical uploads in the same batch are extracted once. Plain text is
+    decoded in-process; PDFs and DOCX files are parsed in worker processes
+    in parallel, each under EXTRACTION_TIMEOUT_SECONDS and EXTRACTION_MAX_PAGES.
+
+    Args:
+        documents (list): (data, file_extension) tuples
+
+    Returns:
+        list: ExtractionResult per document, in the same order as documents
+    """
+    results = [None] * len(documents)
+    pending = {}  # cache key -> (file_extension, data, [positions])
+
+    for position, (data, file_extension) in enumerate(documents):
+        file_extension = normalize_extension(file_extension)
+        key = f"{content_hash(data)}{file_extension}"
+        cached = _text_cache.get(key)
+        if cached is not None:
+            results[position] = ExtractionResult(text=cached, backend="cache")
+        elif key in pending:
+            pending[key][2].append(position)
+        else:
+            pending[key] = (file_extension, data, [position])
+
+    if not pending:
+        return results
+
+    started = time.perf_counter()
+    sandbox = get_sandbox()
+    outcomes = {}
+    for key, (file_extension, data, _) in pending.items():
+        if sandbox is None or file_extension not in ('.pdf', '.docx'):
+            outcomes[key] = extract_text_result(data, file_extension)
+        else:
+            outcomes[key] = sandbox.submit(data, file_extension)
+
+    for key, outcome in outcomes.items():
+        file_extension, _, positions = pending[key]
+        if not isinstance(outcome, ExtractionResult):
+            try:
+                outcome = outcome.result()
+            except Exception as e:
+                outcome = ExtractionResult(error=f"Error processing file: {str(e)}")
+        _record(outcome, file_extension)
+        if outcome.error is None:
+            _text_cache.set(key, outcome.text)
+        else:
+            logger.warning(f"Extraction of a {file_extension} file failed after {outcome.seconds:.2f}s: {outcome.error}")
+        for position in positions:
+            results[position] = outcome
+
+    STAGE_SECONDS.observe(time.perf_counter() - started, stage="text_extraction")
+    return results
+
+
+def extract_texts(documents):
+    """
+    Like extract_documents(), returning (text, error) tuples.
+
+    Args:
+        documents (list): (data, file_extension) tuples
+
+    Returns:
+        list: (text, error) tuples in the same order as documents
+    """
+    return [(result.text, result.error) for result in extract_documents(documents)]
+
+
+def extract_text_cached(data, file_extension):
+    """
+    Extract text from one document, reusing earlier results for identical bytes.
+
+    Args:
+        data (bytes): Raw file contents
+        file_extension (str): Extension such as '.pdf', '.docx' or '.txt'
+
+    Returns:
+        tuple: (text, error) where exactly one is None
+    """
+    return extract_texts([(data, file_extension)])[0]
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+from datetime import datetime, timezone
+import pandas as pd
+from columnar import write_columnar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+# Postings not seen by any scrape for this many days are expired
+DEFAULT_MAX_AGE_DAYS = float(os.getenv("JOB_STORE_MAX_AGE_DAYS", "30"))
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and pd.isna(value)) or str(value).strip() == ""
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat(timespec='seconds')
+
+
+class JobStore:
+    """
+    Incremental, deduplicating store of scraped job postings backed by SQLite.
+
+    Postings are keyed on the jobspy `id`, falling back to `job_url`, and a
+    posting whose URL is already stored under another key updates that row.
+    Each scrape upserts its rows and bumps `last_seen`; `first_seen` is kept.
+    Rows not seen for max_age_days are removed by expire(). upsert() reports
+    which rows actually changed so callers only re-export the catalog when
+    its contents differ.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " key TEXT PRIMARY KEY,"
+            " job_url TEXT,"
+            " data TEXT NOT NULL,"
+            " first_seen REAL NOT NULL,"
+            " last_seen REAL NOT NULL,"
+            " times_seen INTEGER NOT NULL DEFAULT 1)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_url ON jobs (job_url)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_last_seen ON jobs (last_seen)")
+        self._conn.commit()
+
+    @staticmethod
+    def _row_key(record):
+        if not _is_blank(record.get('id')):
+            return str(record['id'])
+        if not _is_blank(record.get('job_url')):
+            return f"url:{record['job_url']}"
+        return None
+
+    def upsert(self, jobs_df, seen_at=None):
+        """
+        Insert new postings and refresh the ones already stored.
+
+        Args:
+            jobs_df (pandas.DataFrame): Scraped postings (jobspy columns)
+            seen_at (float, optional): Timestamp to record. Defaults to now.
+
+        Returns:
+            dict: Counts of 'inserted', 'updated' (data changed), 'unchanged' (only
+                last_seen bumped) and 'skipped' (no id or URL) rows
+        """
+        seen_at = seen_at or time.time()
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        if jobs_df is None or jobs_df.empty:
+            return counts
+
+        # Round-trip through JSON so NaN, timestamps and dates become plain values
+        records = json.loads(jobs_df.to_json(orient='records', date_format='iso'))
+
+        with self._lock:
+            cursor = self._conn.cursor()
+            for record in records:
+                key = self._row_key(record)
+                if key is None:
+                    counts["skipped"] += 1
+                    continue
+                job_url = None if _is_blank(record.get('job_url')) else str(record['job_url'])
+
+                existing = cursor.execute("SELECT key, job_url, data FROM jobs WHERE key = ?", (key,)).fetchone()
+                if existing is None and job_url is not None:
+                    existing = cursor.execute("SELECT key, job_url, data FROM jobs WHERE job_url = ?", (job_url,)).fetchone()
+
+                data = json.dumps(record)
+                if existing is None:
+                    cursor.execute(
+                        "INSERT INTO jobs (key, job_url, data, first_seen, last_seen) VALUES (?, ?, ?, ?, ?)",
+                        (key, job_url, data, seen_at, seen_at)
+                    )
+                    counts["inserted"] += 1
+                elif existing[1] == job_url and existing[2] == data:
+                    cursor.execute(
+                        "UPDATE jobs SET last_seen = ?, times_seen = times_seen + 1 WHERE key = ?",
+                        (seen_at, existing[0])
+                    )
+                    counts["unchanged"] += 1
+                else:
+                    cursor.execute(
+                        "UPDATE jobs SET job_url = ?, data = ?, last_seen = ?, times_seen = times_seen + 1 WHERE key = ?",
+                        (job_url, data, seen_at, existing[0])
+                    )
+                    counts["updated"] += 1
+            self._conn.commit()
+        return counts
+
+    def expire(self, max_age_days=DEFAULT_MAX_AGE_DAYS, now=None):
+        """
+        Delete postings that no scrape has returned for max_age_days.
+
+        Returns:
+            int: Number of rows removed
+        """
+        cutoff = (now or time.time()) - max_age_days * 86400
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM jobs WHERE last_seen < ?", (cutoff,))
+            self._conn.commit()
+            return max(cursor.rowcount, 0)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def to_dataframe(self):
+        """
+        Get every stored posting, oldest first, with a first_seen column.
+
+        last_seen is not exported: it changes on every scrape, and the
+        catalog is only rewritten when postings are added, changed or expired.
+
+        Returns:
+            pandas.DataFrame: The catalog in jobspy column order
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data, first_seen FROM jobs ORDER BY first_seen, rowid"
+            ).fetchall()
+        records = []
+        for data, first_seen in rows:
+            record = json.loads(data)
+            record['first_seen'] = _iso(first_seen)
+            records.append(record)
+        return pd.DataFrame.from_records(records)
+
+    def export_csv(self, csv_path="jobs.csv", jobs_df=None):
+        """
+        Write the catalog to csv_path atomically.
+
+        The file is written to a temporary file in the same directory and then
+        renamed over the old one, so readers never see a partial or empty file.
+
+        Args:
+            csv_path (str): Destination file
+            jobs_df (pandas.DataFrame, optional): Output of to_dataframe(), to share
+                one read of the store between several exports
+
+        Returns:
+            int: Number of rows written
+        """
+        if jobs_df is None:
+            jobs_df = self.to_dataframe()
+        directory = os.path.dirname(os.path.abspath(csv_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".jobs-", suffix=".csv.tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+                jobs_df.to_csv(f, index=False)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, csv_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return len(jobs_df)
+
+    def export_columnar(self, path="jobs.columns", jobs_df=None):
+        """
+        Write the catalog as a columnar table (see columnar.write_columnar).
+
+        Args:
+            path (str): Destination directory
+            jobs_df (pandas.DataFrame, optional): Output of to_dataframe()
+
+        Returns:
+            int: Number of rows written
+        """
+        if jobs_df is None:
+            jobs_df = self.to_dataframe()
+        write_columnar(jobs_df, path)
+        return len(jobs_df)
+
+    def import_csv(self, csv_path="jobs.csv"):
+        """
+        Seed the store from an existing jobs.csv (e.g. one written before the store existed).
+
+        Returns:
+            dict: Upsert counts, or None if the file does not exist
+        """
+        if not os.path.exists(csv_path):
+            return None
+        jobs_df = pd.read_csv(csv_path)
+        # The store tracks first_seen/last_seen itself
+        jobs_df = jobs_df.drop(columns=[c for c in ('first_seen', 'last_seen') if c in jobs_df.columns])
+        seen_at = os.path.getmtime(csv_path)
+        return self.upsert(jobs_df, seen_at=seen_at)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_job_store(path=DEFAULT_STORE_PATH):
+    """
+    Get the shared JobStore for a database file, creating it on first use.
+
+    Args:
+        path (str): Path to the SQLite file
+
+    Returns:
+        JobStore: The process-wide store for that file
+    """
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = JobStore(path)
+            _stores[key] = store
+        return store
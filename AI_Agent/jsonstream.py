@@ -0,0 +1,173 @@
+import re
+import json
+
+# A trailing escape that may still be incomplete: a lone backslash or a partial \uXXXX
+_PARTIAL_ESCAPE = re.compile(r'\\(u[0-9a-fA-F]{0,3})?$')
+# A high surrogate escape that needs the following low surrogate before it can be decoded
+_HIGH_SURROGATE = re.compile(r'\\u[dD][89abAB][0-9a-fA-F]{2}$')
+
+
+def _safe_cut(raw):
+    """Length of the prefix of a raw JSON string body that can be decoded on its own."""
+    # Backslashes are paired from the left; only an odd run at the end starts an escape
+    cut = len(raw)
+    match = _PARTIAL_ESCAPE.search(raw)
+    if match:
+        run = len(raw[:match.start() + 1]) - len(raw[:match.start() + 1].rstrip('\\'))
+        if run % 2 == 1:
+            cut = match.start()
+    match = _HIGH_SURROGATE.search(raw[:cut])
+    if match:
+        cut = match.start()
+    return cut
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser for the top-level fields of a single JSON object.
+
+    Text is fed in arbitrary chunks (e.g. as a model streams it). Scalar fields
+    are reported once their value is complete, and string fields listed in
+    stream_fields are reported piece by piece as they arrive, so a caller can
+    show a score before the model has finished writing its feedback. Anything
+    before the opening brace, such as a ```json fence, is ignored; nested
+    objects and arrays are skipped.
+
+    feed() returns a list of events:
+        ('value', key, value)  - a top-level field is complete
+        ('text', key, delta)   - more decoded text of a streamed string field
+    """
+
+    def __init__(self, stream_fields=()):
+        self.stream_fields = set(stream_fields)
+        self.values = {}
+        self.done = False
+        self._state = 'seek_object'
+        self._key = None
+        self._buffer = []      # raw characters of the current key, string or scalar
+        self._emitted = 0      # raw characters of a streamed string already decoded
+        self._decoded = []     # decoded pieces of a streamed string
+        self._escape = False
+        self._nested = 0
+        self._nested_in_string = False
+
+    def feed(self, chunk):
+        events = []
+        for char in chunk:
+            if self.done:
+                break
+            self._step(char, events)
+        if self._state == 'in_string' and self._key in self.stream_fields:
+            self._flush_text(events, final=False)
+        return events
+
+    def _flush_text(self, events, final):
+        raw = "".join(self._buffer)
+        cut = len(raw) if final else _safe_cut(raw)
+        if cut > self._emitted:
+            delta = json.loads(f'"{raw[self._emitted:cut]}"', strict=False)
+            self._emitted = cut
+            self._decoded.append(delta)
+            events.append(('text', self._key, delta))
+
+    def _finish_value(self, value, events):
+        self.values[self._key] = value
+        events.append(('value', self._key, value))
+        self._key = None
+        self._state = 'after_value'
+
+    def _step(self, char, events):
+        state = self._state
+        if state == 'seek_object':
+            if char == '{':
+                self._state = 'key_or_end'
+        elif state == 'key_or_end':
+            if char == '"':
+                self._buffer = []
+                self._escape = False
+                self._state = 'in_key'
+            elif char == '}':
+                self.done = True
+        elif state == 'in_key':
+            if self._escape:
+                self._escape = False
+                self._buffer.append(char)
+            elif char == '\\':
+                self._escape = True
+                self._buffer.append(char)
+            elif char == '"':
+                self._key = json.loads('"' + "".join(self._buffer) + '"')
+                self._state = 'colon'
+            else:
+                self._buffer.append(char)
+        elif state == 'colon':
+            if char == ':':
+                self._state = 'value_start'
+        elif state == 'value_start':
+            if char.isspace():
+                return
+            self._buffer = []
+            if char == '"':
+                self._escape = False
+                self._emitted = 0
+                self._decoded = []
+                self._state = 'in_string'
+            elif char in '{[':
+                self._nested = 1
+                self._nested_in_string = False
+                self._state = 'in_nested'
+            else:
+                self._buffer.append(char)
+                self._state = 'in_scalar'
+        elif state == 'in_string':
+            if self._escape:
+                self._escape = False
+                self._buffer.append(char)
+            elif char == '\\':
+                self._escape = True
+                self._buffer.append(char)
+            elif char == '"':
+                if self._key in self.stream_fields:
+                    self._flush_text(events, final=True)
+                    value = "".join(self._decoded)
+                else:
+                    value = json.loads('"' + "".join(self._buffer) + '"', strict=False)
+                self._finish_value(value, events)
+            else:
+                self._buffer.append(char)
+        elif state == 'in_scalar':
+            if char in ',}' or char.isspace():
+                token = "".join(self._buffer)
+                try:
+                    value = json.loads(token)
+                except ValueError:
+                    value = token
+                self._finish_value(value, events)
+                if char == '}':
+                    self.done = True
+                elif char == ',':
+                    self._state = 'key_or_end'
+            else:
+                self._buffer.append(char)
+        elif state == 'in_nested':
+            if self._nested_in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._nested_in_string = False
+            elif char == '"':
+                self._nested_in_string = True
+            elif char in '{[':
+                self._nested += 1
+            elif char in '}]':
+                self._nested -= 1
+                if self._nested == 0:
+                    # Nested values are not needed by callers; record that the field was present
+                    self._finish_value(None, events)
+        elif state == 'after_value':
+            if char == ',':
+                self._state = 'key_or_end'
+            elif char == '}':
+                self.done = True
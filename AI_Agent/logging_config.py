@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+# Root log level (DEBUG, INFO, WARNING, ...)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# 'json' for one structured object per line, 'text' for the classic human-readable format
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of requests whose headers and form fields are logged (0 disables, 1 logs every request)
+LOG_BODY_SAMPLE_RATE = float(os.getenv("LOG_BODY_SAMPLE_RATE", "0.01"))
+# Longer logged values are cut to this many characters
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "256"))
+# Records waiting for the writer thread; beyond this new records are dropped instead of blocking
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Header and field names (lower case, substring match) whose values are never logged
+LOG_REDACT_FIELDS = tuple(
+    name.strip().lower()
+    for name in os.getenv(
+        "LOG_REDACT_FIELDS", "authorization,cookie,api_key,api-key,apikey,token,secret,password"
+    ).split(",")
+    if name.strip()
+)
+
+REQUEST_ID_HEADER = "X-Request-Id"
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+# Id of the request being handled; copied into worker threads with the rest of the context
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through extra= and is logged as a field
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+
+def new_request_id(incoming=None):
+    """Reuse a well-formed incoming request id, otherwise make a new one."""
+    if incoming and _REQUEST_ID_PATTERN.match(incoming):
+        return incoming
+    return os.urandom(8).hex()
+
+
+def should_sample(rate=None):
+    """Whether this request's details should be logged."""
+    rate = LOG_BODY_SAMPLE_RATE if rate is None else rate
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def truncate(value, limit=None):
+    limit = LOG_MAX_FIELD_CHARS if limit is None else limit
+    text = value if isinstance(value, str) else str(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...[{len(text) - limit} more chars]"
+
+
+def redact(items):
+    """
+    Make (name, value) pairs safe to log.
+
+    Values of sensitive names (LOG_REDACT_FIELDS) are replaced and long values
+    are truncated.
+
+    Args:
+        items (iterable): (name, value) pairs, e.g. request.headers.items()
+
+    Returns:
+        dict: name -> loggable value
+    """
+    safe = {}
+    for name, value in items:
+        lowered = name.lower()
+        if any(field in lowered for field in LOG_REDACT_FIELDS):
+            safe[name] = "[redacted]"
+        else:
+            safe[name] = truncate(value)
+    return safe
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id (in the thread that logged them)."""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record; fields passed with extra= become keys."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        text = super().format(record)
+        if getattr(record, "request_id", None):
+            text = f"{text} [request_id={record.request_id}]"
+        return text
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that never blocks or formats on the logging thread.
+
+    Records are only reduced to their message (args merged, traceback
+    rendered) before being queued; the writer thread does the formatting and
+    I/O. When the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener = None
+_handler = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Route all logging through a bounded queue drained by a background writer thread.
+
+    Replaces the root logger's handlers; calling it again only updates the
+    level. The writer is flushed and stopped at interpreter exit.
+
+    Args:
+        level (str, optional): Root log level. Defaults to LOG_LEVEL.
+        fmt (str, optional): 'json' or 'text'. Defaults to LOG_FORMAT.
+        stream (file, optional): Where the writer thread writes. Defaults to stderr.
+
+    Returns:
+        NonBlockingQueueHandler: The handler installed on the root logger
+    """
+    global _listener, _handler
+    root = logging.getLogger()
+    root.setLevel(level or LOG_LEVEL)
+    with _configure_lock:
+        if _handler is not None:
+            return _handler
+
+        output = logging.StreamHandler(stream)
+        output.setFormatter(TextFormatter() if (fmt or LOG_FORMAT) == "text" else JsonFormatter())
+        log_queue = queue.Queue(maxsize=max(1, LOG_QUEUE_SIZE))
+        _listener = QueueListener(log_queue, output, respect_handler_level=False)
+
+        _handler = NonBlockingQueueHandler(log_queue)
+        _handler.addFilter(RequestIdFilter())
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _handler
@@ -0,0 +1,124 @@
+import os
+import time
+import numpy as np
+from ranking import top_k
+from workers import iter_bounded
+
+# Jobs listed per resume and resumes listed per job when the caller does not say
+DEFAULT_TOP_K_JOBS = int(os.getenv("MATCH_TOP_K_JOBS", "5"))
+DEFAULT_TOP_K_RESUMES = int(os.getenv("MATCH_TOP_K_RESUMES", "5"))
+# Jobs in the job-side ranking (those with the best single-resume similarity)
+DEFAULT_MATCH_JOBS = int(os.getenv("MATCH_JOBS", "20"))
+MAX_MATCH_JOBS = int(os.getenv("MAX_MATCH_JOBS", "200"))
+# Upper bound on resume/job pairs sent to the LLM by one matching request
+MAX_MATCH_EVALUATIONS = int(os.getenv("MAX_MATCH_EVALUATIONS", "50"))
+
+
+class MatchResult:
+    """
+    Outcome of matching a set of resumes against the whole catalog.
+
+    Attributes:
+        resume_matches (list): Per resume, (job_position, similarity) pairs best first;
+            None for resumes without text
+        job_matches (list): (job_position, [(resume_index, similarity), ...]) for the
+            jobs of the job-side ranking, best job first
+        seconds (float): Time spent scoring
+        evaluations (dict): (resume_index, job_position) -> (score, feedback) or an
+            exception, for the pairs evaluated by the LLM
+    """
+
+    def __init__(self, resume_matches, job_matches, seconds):
+        self.resume_matches = resume_matches
+        self.job_matches = job_matches
+        self.seconds = seconds
+        self.evaluations = {}
+
+    def top_pairs(self, limit):
+        """The limit most similar (resume_index, job_position) pairs of the resume-side lists."""
+        pairs = [
+            (similarity, resume_index, job_position)
+            for resume_index, matches in enumerate(self.resume_matches) if matches
+            for job_position, similarity in matches
+        ]
+        pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+        return [(resume_index, job_position) for _, resume_index, job_position in pairs[:limit]]
+
+
+def match_resumes(resume_texts, snapshot, top_k_jobs=DEFAULT_TOP_K_JOBS, top_k_resumes=DEFAULT_TOP_K_RESUMES,
+                  max_jobs=DEFAULT_MATCH_JOBS, min_similarity=None):
+    """
+    Rank every resume against every job of a catalog snapshot with local TF-IDF similarity.
+
+    Each resume is vectorised once and scored against all job descriptions
+    through the index's term postings, so the cost grows with the number of
+    postings sharing a resume's terms rather than with resumes x jobs x
+    vocabulary. No LLM calls are made; see evaluate_top_pairs().
+
+    Args:
+        resume_texts (list): Extracted resume texts; None or empty for resumes that failed
+        snapshot (CatalogSnapshot): Catalog to match against
+        top_k_jobs (int): Jobs to keep per resume
+        top_k_resumes (int): Resumes to keep per job
+        max_jobs (int): Jobs in the job-side ranking, capped at MAX_MATCH_JOBS
+        min_similarity (float, optional): Ignore pairs scoring below this value
+
+    Returns:
+        MatchResult: Top jobs per resume and top resumes per job
+    """
+    start = time.perf_counter()
+    # Pairs without a term in common are never listed
+    min_similarity = max(min_similarity or 0.0, float(np.finfo(np.float32).tiny))
+    tfidf = snapshot.tfidf
+    present = [index for index, text in enumerate(resume_texts) if text]
+    rows = tfidf.transform([resume_texts[index] for index in present])
+
+    resume_matches = [None] * len(resume_texts)
+    # Best similarity any resume reaches per job, to pick the job-side ranking
+    best_per_job = np.zeros(tfidf.document_count, dtype=np.float32)
+    for index, scores in zip(present, tfidf.iter_document_scores(rows)):
+        ranked = top_k(scores, top_k_jobs, min_similarity)
+        resume_matches[index] = [(int(position), round(float(scores[position]), 4)) for position in ranked]
+        np.maximum(best_per_job, scores, out=best_per_job)
+
+    # Score all resumes against just the selected jobs, reusing the transformed rows
+    job_matches = []
+    for position in top_k(best_per_job, min(max_jobs, MAX_MATCH_JOBS), min_similarity):
+        scores = tfidf.score_rows(rows, tfidf.document_vector(position))
+        ranked = top_k(scores, top_k_resumes, min_similarity)
+        job_matches.append((int(position), [(present[i], round(float(scores[i]), 4)) for i in ranked]))
+
+    return MatchResult(resume_matches, job_matches, time.perf_counter() - start)
+
+
+def evaluate_top_pairs(agent, result, resume_texts, snapshot, limit, max_concurrency=None, describe=None):
+    """
+    Run the LLM evaluator on the most similar resume/job pairs of a match.
+
+    Args:
+        agent (TalentEvaluationAgent): Configured evaluation agent
+        result (MatchResult): Output of match_resumes(); its evaluations are filled in
+        resume_texts (list): The texts passed to match_resumes()
+        snapshot (CatalogSnapshot): The catalog passed to match_resumes()
+        limit (int): Pairs to evaluate, capped at MAX_MATCH_EVALUATIONS
+        max_concurrency (int, optional): Per-request cap on concurrent evaluations
+        describe (callable, optional): Turns a raw job description into the prompt
+            text, e.g. profiles.prompt_description bound to the agent. It is called
+            inside the pooled evaluations, so condensing several jobs runs concurrently
+            (concurrent calls for the same job share one build in the profile store).
+
+    Returns:
+        MatchResult: result, with evaluations set
+    """
+    pairs = result.top_pairs(min(limit, MAX_MATCH_EVALUATIONS))
+
+    def evaluate(pair):
+        resume_index, job_position = pair
+        description = snapshot.jobs[job_position].get('description')
+        if describe is not None:
+            description = describe(description)
+        return agent.evaluate_resume(resume_texts[resume_index], description)
+
+    for index, evaluation, error in iter_bounded(evaluate, pairs, max_concurrency=max_concurrency):
+        result.evaluations[pairs[index]] = error if error is not None else evaluation
+    return result
@@ -0,0 +1,212 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Default latency buckets in seconds, from a fast cache hit up to a slow model call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, such as work in flight."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, amount=1, **labels):
+        """Count amount as in progress for the duration of the block."""
+        self.inc(amount, **labels)
+        try:
+            yield
+        finally:
+            self.dec(amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (usually durations in seconds) over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][index] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_sample(self, key, state):
+        bucket_counts, total, count = state
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, bucket_counts):
+            cumulative += bucket_count
+            labels = _format_labels(self.label_names, key, extra=(("le", _format_value(bound)),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Set of metrics rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the metrics the app reports. Each worker process
+# exposes its own values; Prometheus sums them across scrape targets.
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "jobmatch_http_request_duration_seconds", "HTTP request latency by endpoint.",
+    labels=("endpoint", "method", "status")
+))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "jobmatch_stage_duration_seconds",
+    "Time spent in each processing stage (catalog_load, title_lookup, text_extraction, "
+    "rate_limit_wait, llm_call, matching, response_build).",
+    labels=("stage",)
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "jobmatch_llm_tokens_total", "LLM tokens reported by the evaluator backend.", labels=("direction",)
+))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "jobmatch_llm_retries_total", "LLM calls retried after a retryable error."
+))
+ERRORS = REGISTRY.register(Counter(
+    "jobmatch_errors_total", "Errors by stage and type.", labels=("stage", "type")
+))
+EVALUATIONS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "jobmatch_evaluations_in_flight", "Resumes currently being evaluated by the LLM."
+))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "jobmatch_cache_lookups_total", "Cache lookups by cache and result (memory_hits, disk_hits, misses).",
+    labels=("cache", "result")
+))
+SCRAPE_SECONDS = REGISTRY.register(Histogram(
+    "jobmatch_scrape_duration_seconds", "Duration of scraping one site, including retries.",
+    labels=("site", "status"), buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200)
+))
+SCRAPE_ROWS = REGISTRY.register(Counter(
+    "jobmatch_scrape_rows_total", "Postings returned by each site.", labels=("site",)
+))
+SCRAPE_LAST_ROWS = REGISTRY.register(Gauge(
+    "jobmatch_scrape_last_rows", "Postings returned by the most recent scrape of each site.", labels=("site",)
+))
+
+# Report zero rather than nothing before the first event
+EVALUATIONS_IN_FLIGHT.set(0)
+LLM_RETRIES.inc(0)
+
+
+def record_llm_usage(usage):
+    """Count prompt/output tokens from a response's usage_metadata, if it has any."""
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_token_count', None)
+    output_tokens = getattr(usage, 'candidates_token_count', None)
+    if isinstance(prompt_tokens, int) and prompt_tokens > 0:
+        LLM_TOKENS.inc(prompt_tokens, direction="in")
+    if isinstance(output_tokens, int) and output_tokens > 0:
+        LLM_TOKENS.inc(output_tokens, direction="out")
@@ -0,0 +1,211 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from job_store import DEFAULT_STORE_PATH
+
+logger = logging.getLogger(__name__)
+
+# Profiles live in the job store database, next to the postings they describe
+DEFAULT_PROFILE_PATH = os.getenv("JOB_PROFILE_PATH", DEFAULT_STORE_PATH)
+# Descriptions shorter than this are sent as they are; condensing them saves little
+PROFILE_MIN_DESCRIPTION_CHARS = int(os.getenv("JOB_PROFILE_MIN_CHARS", "1500"))
+# Bump whenever the condensing prompt or the profile format changes
+PROFILE_VERSION = "1"
+
+# Profile hits whose last_used times are buffered before being written back in one statement
+PROFILE_TOUCH_FLUSH_ENTRIES = 100
+
+PROFILE_FIELDS = ('title', 'seniority', 'location_constraints', 'must_have', 'nice_to_have', 'responsibilities')
+
+
+def description_hash(job_description, model_name=None):
+    """Identity of a description (and the model condensing it); a changed description gets a new profile."""
+    digest = hashlib.sha256((job_description or "").strip().encode("utf-8"))
+    if model_name:
+        digest.update(b"\0" + model_name.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def format_profile(profile):
+    """
+    Render a requirement profile as the job text used in evaluation prompts.
+
+    Args:
+        profile (dict): Profile with the keys in PROFILE_FIELDS
+
+    Returns:
+        str: Compact plain-text requirements
+    """
+    lines = []
+    if profile.get('title'):
+        lines.append(f"Job title: {profile['title']}")
+    if profile.get('seniority'):
+        lines.append(f"Seniority: {profile['seniority']}")
+    if profile.get('location_constraints'):
+        lines.append(f"Location constraints: {profile['location_constraints']}")
+    for key, heading in (('must_have', "Must-have requirements"),
+                         ('nice_to_have', "Nice-to-have"),
+                         ('responsibilities', "Key responsibilities")):
+        items = [str(item) for item in profile.get(key) or [] if str(item).strip()]
+        if items:
+            lines.append(f"{heading}:")
+            lines.extend(f"- {item}" for item in items)
+    return "\n".join(lines)
+
+
+class JobProfileStore:
+    """
+    Condensed job requirement profiles, keyed by a hash of the job description.
+
+    A profile is generated once per description and reused for every resume
+    evaluated against that job. Editing or re-scraping a posting with a
+    different description changes the hash, so the stale profile is simply
+    never looked up again (and is removed by prune()). last_used times of
+    hits are buffered and written with the next set() or prune(), so reads
+    do not each cost a write.
+    """
+
+    def __init__(self, path=DEFAULT_PROFILE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._generating = {}  # description hash -> lock held while one thread builds its profile
+        self._pending_use = {}  # description hash -> last_used not yet written to disk
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_profiles ("
+            " description_hash TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " model TEXT,"
+            " profile TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL,"
+            " PRIMARY KEY (description_hash, version))"
+        )
+        self._conn.commit()
+
+    def get(self, digest):
+        """Stored profile dict for a description hash, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile FROM job_profiles WHERE description_hash = ? AND version = ?",
+                (digest, PROFILE_VERSION)
+            ).fetchone()
+            if row is None:
+                return None
+            self._pending_use[digest] = time.time()
+            if len(self._pending_use) >= PROFILE_TOUCH_FLUSH_ENTRIES:
+                self._flush_use()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def _flush_use(self):
+        # Write buffered last_used times; the caller holds the lock and commits
+        if self._pending_use:
+            self._conn.executemany(
+                "UPDATE job_profiles SET last_used = ? WHERE description_hash = ? AND version = ?",
+                [(last_used, digest, PROFILE_VERSION) for digest, last_used in self._pending_use.items()]
+            )
+            self._pending_use.clear()
+
+    def set(self, digest, profile, model=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_profiles (description_hash, version, model, profile, created_at, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, PROFILE_VERSION, model, json.dumps(profile), now, now)
+            )
+            self._pending_use.pop(digest, None)
+            self._flush_use()
+            self._conn.commit()
+
+    def prune(self, max_age_days=30):
+        """Delete profiles of other versions and ones unused for max_age_days. Returns the count removed."""
+        cutoff = time.time() - max_age_days * 86400
+        with self._lock:
+            self._flush_use()
+            cursor = self._conn.execute(
+                "DELETE FROM job_profiles WHERE version != ? OR last_used < ?",
+                (PROFILE_VERSION, cutoff)
+            )
+            self._conn.commit()
+            return max(cursor.rowcount, 0)
+
+    def prompt_description(self, agent, job_description):
+        """
+        Get the job text to put in evaluation prompts.
+
+        Returns the formatted condensed profile, generating and storing it with
+        agent.condense_job_description() on first use. Short descriptions, and
+        descriptions the agent could not condense, are returned unchanged.
+
+        Args:
+            agent (TalentEvaluationAgent): Agent used to build missing profiles
+            job_description (str): Raw job description
+
+        Returns:
+            str: Text to use in place of the raw description
+        """
+        if not job_description or len(job_description) < PROFILE_MIN_DESCRIPTION_CHARS:
+            return job_description
+        if not hasattr(agent, 'condense_job_description'):
+            return job_description
+
+        model_name = getattr(agent, 'model_name', None)
+        digest = description_hash(job_description, model_name)
+        profile = self.get(digest)
+        if profile is None:
+            with self._lock:
+                generating = self._generating.setdefault(digest, threading.Lock())
+            # Concurrent requests for the same job wait for one generation instead of repeating it
+            with generating:
+                profile = self.get(digest)
+                if profile is None:
+                    profile = agent.condense_job_description(job_description)
+                    if profile:
+                        self.set(digest, profile, model=model_name)
+            with self._lock:
+                self._generating.pop(digest, None)
+
+        text = format_profile(profile) if profile else ""
+        if not text:
+            logger.warning("No job requirement profile available; using the full description")
+            return job_description
+        return text
+
+
+_profile_store = None
+_profile_store_lock = threading.Lock()
+
+
+def get_profile_store():
+    """
+    Get the shared JobProfileStore, or None when JOB_PROFILES=off.
+
+    Returns:
+        JobProfileStore: The process-wide profile store
+    """
+    global _profile_store
+    if os.getenv("JOB_PROFILES", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    with _profile_store_lock:
+        if _profile_store is None:
+            _profile_store = JobProfileStore()
+        return _profile_store
+
+
+def prompt_description(agent, job_description):
+    """Condensed job text for prompts via the shared store; the raw description if profiles are off."""
+    store = get_profile_store()
+    if store is None:
+        return job_description
+    try:
+        return store.prompt_description(agent, job_description)
+    except Exception as e:
+        logger.error(f"Error building job requirement profile: {e}")
+        return job_description
@@ -0,0 +1,264 @@
+import re
+import math
+import threading
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+
+# Common English words that carry no signal for job matching
+STOP_WORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing during each few for from further had has have having he her here hers him his how i if in into
+is it its itself just me more most my no nor not now of off on once only or other our ours out over
+own same she should so some such than that the their theirs them then there these they this those
+through to too under until up very was we were what when where which while who whom why will with
+would you your yours
+""".split())
+
+
+# A posting gathered through the term index costs about this many document-matrix
+# entries scanned in order; rows touching more postings are scored by a full scan
+DENSE_ROW_COST = 4
+
+
+def tokenize(text):
+    """Lowercase text and split it into terms, dropping stop words and single characters."""
+    return [
+        token for token in TOKEN_PATTERN.findall(str(text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+
+class TfidfIndex:
+    """
+    TF-IDF vectors for a fixed corpus of documents (the job descriptions).
+
+    Document vectors use sublinear term frequency and are L2-normalised, stored
+    as a CSR matrix (indptr, indices, data) in NumPy arrays. Other texts, such
+    as resumes, are vectorised against the same vocabulary and IDF weights so
+    they can be scored against any document in one batched pass.
+    """
+
+    def __init__(self, documents):
+        self.vocabulary = {}
+        document_terms = []
+        for document in documents:
+            counts = {}
+            for token in tokenize(document):
+                term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            document_terms.append(counts)
+
+        self.document_count = len(document_terms)
+        document_frequency = np.zeros(len(self.vocabulary), dtype=np.float64)
+        for counts in document_terms:
+            if counts:
+                document_frequency[list(counts)] += 1
+        self.idf = (np.log((1.0 + self.document_count) / (1.0 + document_frequency)) + 1.0).astype(np.float32)
+        # Weight given to terms never seen in the corpus (only matters for norms)
+        self.unseen_idf = float(math.log(1.0 + self.document_count) + 1.0)
+
+        self.indptr, self.indices, self.data = self._build_rows(document_terms, {})
+        self._postings = None
+        self._postings_lock = threading.Lock()
+
+    def _build_rows(self, term_counts, unseen_counts):
+        indptr = np.zeros(len(term_counts) + 1, dtype=np.int64)
+        indices = []
+        data = []
+        for row, counts in enumerate(term_counts):
+            term_ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            weights = (1.0 + np.log(tf)) * self.idf[term_ids] if len(counts) else tf
+            norm_sq = float(np.dot(weights, weights))
+            # Out-of-vocabulary terms never overlap with a document but still count in the norm
+            for count in unseen_counts.get(row, ()):
+                norm_sq += ((1.0 + math.log(count)) * self.unseen_idf) ** 2
+            norm = math.sqrt(norm_sq)
+            if norm > 0:
+                weights = weights / norm
+            indices.append(term_ids)
+            data.append(weights.astype(np.float32))
+            indptr[row + 1] = indptr[row] + len(term_ids)
+        if indices:
+            return indptr, np.concatenate(indices), np.concatenate(data)
+        return indptr, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    def transform(self, texts):
+        """
+        Vectorise texts against the corpus vocabulary.
+
+        Args:
+            texts (list): Strings to vectorise
+
+        Returns:
+            tuple: CSR arrays (indptr, indices, data), one L2-normalised row per text
+        """
+        term_counts = []
+        unseen_counts = {}
+        for row, text in enumerate(texts):
+            counts = {}
+            unseen = {}
+            for token in tokenize(text):
+                term_id = self.vocabulary.get(token)
+                if term_id is None:
+                    unseen[token] = unseen.get(token, 0) + 1
+                else:
+                    counts[term_id] = counts.get(term_id, 0) + 1
+            term_counts.append(counts)
+            if unseen:
+                unseen_counts[row] = list(unseen.values())
+        return self._build_rows(term_counts, unseen_counts)
+
+    def document_vector(self, row):
+        """
+        Get the dense vector for one corpus document.
+
+        Args:
+            row (int): Position of the document in the corpus
+
+        Returns:
+            numpy.ndarray: float32 vector over the vocabulary
+        """
+        dense = np.zeros(len(self.vocabulary), dtype=np.float32)
+        start, stop = self.indptr[row], self.indptr[row + 1]
+        dense[self.indices[start:stop]] = self.data[start:stop]
+        return dense
+
+    def score(self, texts, document_vector):
+        """
+        Cosine similarity of each text to one dense document vector, in one pass.
+
+        Args:
+            texts (list): Strings to score
+            document_vector (numpy.ndarray): Vector from document_vector() or text_vector()
+
+        Returns:
+            numpy.ndarray: One similarity in [0, 1] per text
+        """
+        return self.score_rows(self.transform(texts), document_vector)
+
+    def score_rows(self, rows, document_vector):
+        """Like score(), for rows already vectorised with transform()."""
+        indptr, indices, data = rows
+        products = data * document_vector[indices]
+        scores = np.zeros(len(indptr) - 1, dtype=np.float32)
+        non_empty = np.diff(indptr) > 0
+        if non_empty.any():
+            scores[non_empty] = np.add.reduceat(products, indptr[:-1][non_empty])
+        return scores
+
+    def postings(self):
+        """
+        The document vectors transposed: for each term, the documents containing it.
+
+        Built once on first use (a CSC copy of the document matrix).
+
+        Returns:
+            tuple: (term_indptr, documents, data) where the documents containing term t
+                and their weights are documents/data[term_indptr[t]:term_indptr[t + 1]]
+        """
+        if self._postings is None:
+            with self._postings_lock:
+                if self._postings is None:
+                    order = np.argsort(self.indices, kind="stable")
+                    rows = np.repeat(np.arange(self.document_count, dtype=np.int32), np.diff(self.indptr))
+                    term_indptr = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+                    np.cumsum(np.bincount(self.indices, minlength=len(self.vocabulary)), out=term_indptr[1:])
+                    self._postings = (term_indptr, rows[order], self.data[order])
+        return self._postings
+
+    def iter_document_scores(self, rows):
+        """
+        Cosine similarity of each row to every corpus document.
+
+        Only the postings of each row's terms are touched, so the cost per row
+        is proportional to how many documents share its terms, not to the
+        corpus size times the vocabulary. Rows made of very common terms, whose
+        postings cover much of the corpus anyway, are scored with one pass over
+        the document matrix instead, which is cheaper per entry.
+
+        Args:
+            rows (tuple): CSR arrays from transform()
+
+        Yields:
+            numpy.ndarray: float32 similarity to every document, one array per row
+        """
+        term_indptr, documents, weights = self.postings()
+        indptr, indices, data = rows
+        non_empty = np.diff(self.indptr) > 0
+        dense_row = None
+        for row in range(len(indptr) - 1):
+            terms = indices[indptr[row]:indptr[row + 1]]
+            starts = term_indptr[terms]
+            lengths = term_indptr[terms + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                yield np.zeros(self.document_count, dtype=np.float32)
+                continue
+            if total * DENSE_ROW_COST > len(self.data):
+                if dense_row is None:
+                    dense_row = np.zeros(len(self.vocabulary), dtype=np.float32)
+                dense_row[terms] = data[indptr[row]:indptr[row + 1]]
+                scores = np.zeros(self.document_count, dtype=np.float32)
+                scores[non_empty] = np.add.reduceat(self.data * dense_row[self.indices], self.indptr[:-1][non_empty])
+                dense_row[terms] = 0
+                yield scores
+                continue
+            # Positions of all the row's postings, concatenated term by term
+            offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(total)
+            contributions = weights[offsets] * np.repeat(data[indptr[row]:indptr[row + 1]], lengths)
+            yield np.bincount(documents[offsets], weights=contributions, minlength=self.document_count).astype(np.float32)
+
+    def text_vector(self, text):
+        """Dense vector for a text that is not part of the corpus (e.g. an edited description)."""
+        indptr, indices, data = self.transform([text])
+        dense = np.zeros(len(self.vocabulary), dtype=np.float32)
+        dense[indices] = data
+        return dense
+
+
+def select_for_evaluation(scores, top_k=None, min_similarity=None):
+    """
+    Decide which resumes go on to the LLM after local pre-ranking.
+
+    Args:
+        scores (sequence): Local similarity per resume
+        top_k (int, optional): Keep at most this many of the highest-scoring resumes
+        min_similarity (float, optional): Drop resumes scoring below this value
+
+    Returns:
+        numpy.ndarray: Boolean mask, True for resumes to evaluate
+    """
+    scores = np.asarray(scores, dtype=np.float32)
+    keep = np.ones(len(scores), dtype=bool)
+    if min_similarity is not None:
+        keep &= scores >= min_similarity
+    if top_k is not None and keep.sum() > top_k:
+        # Stable sort keeps upload order among equal scores
+        order = np.argsort(-scores, kind="stable")
+        ranked = order[keep[order]]
+        keep[:] = False
+        keep[ranked[:top_k]] = True
+    return keep
+
+
+def top_k(scores, k, min_similarity=None):
+    """
+    Positions of the k highest scores, best first.
+
+    Args:
+        scores (numpy.ndarray): Scores to rank
+        k (int): How many to return
+        min_similarity (float, optional): Ignore scores below this value
+
+    Returns:
+        numpy.ndarray: Positions into scores, sorted by descending score
+    """
+    scores = np.asarray(scores)
+    candidates = np.flatnonzero(scores >= min_similarity) if min_similarity is not None else np.arange(len(scores))
+    if k <= 0 or len(candidates) == 0:
+        return candidates[:0]
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import random
+import logging
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to a per-process limiter
+    fcntl = None
+
+try:
+    from google.api_core import exceptions as google_exceptions
+except ImportError:
+    google_exceptions = None
+
+from metrics import LLM_RETRIES, STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Quota for Gemini calls; 0 disables that limit
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "1000000"))
+# Shared state file so every worker process draws from the same quota ("off" keeps it per process)
+GEMINI_RATE_LIMIT_FILE = os.getenv(
+    "GEMINI_RATE_LIMIT_FILE", os.path.join(tempfile.gettempdir(), "jobmatch-gemini-ratelimit.json")
+)
+# Longest a call may wait for quota before giving up
+GEMINI_MAX_QUEUE_SECONDS = float(os.getenv("GEMINI_MAX_QUEUE_SECONDS", "300"))
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+GEMINI_RETRY_BASE_SECONDS = float(os.getenv("GEMINI_RETRY_BASE_SECONDS", "2"))
+GEMINI_RETRY_MAX_SECONDS = float(os.getenv("GEMINI_RETRY_MAX_SECONDS", "60"))
+
+# HTTP status codes worth retrying: rate limited, or a transient server-side failure
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when quota does not become available within the allowed queue time."""
+
+
+def is_retryable(error):
+    """
+    Decide whether a failed Gemini call is worth retrying.
+
+    Args:
+        error (Exception): The exception raised by the call
+
+    Returns:
+        bool: True for quota (429), timeout and transient server errors
+    """
+    if google_exceptions is not None and isinstance(error, (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.TooManyRequests,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )):
+        return True
+    code = getattr(error, 'code', None)
+    code = getattr(code, 'value', code)  # grpc status enums wrap the number
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class _MemoryBackend:
+    """Bucket levels held in this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+
+    def update(self, func):
+        with self._lock:
+            self._state, result = func(self._state)
+            return result
+
+
+class _FileBackend:
+    """Bucket levels kept in a small JSON file, updated under an exclusive flock."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()  # flock is per process; threads also need excluding
+
+    def update(self, func):
+        with self._lock, open(self.path, 'a+', encoding='utf-8') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else None
+                except ValueError:
+                    state = None
+                state, result = func(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+
+    Both buckets start full and refill continuously. acquire() blocks until
+    both hold enough for the call, then takes it out of each. With a file
+    backend, every process using the same file shares one quota.
+    """
+
+    def __init__(self, rpm=GEMINI_RPM, tpm=GEMINI_TPM, state_file=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        if state_file and fcntl is not None:
+            self._backend = _FileBackend(state_file)
+        else:
+            self._backend = _MemoryBackend()
+        self.state_file = state_file if isinstance(self._backend, _FileBackend) else None
+        self._stats_lock = threading.Lock()
+        self._waiting = 0
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+        self._retries = 0
+        self._timeouts = 0
+
+    def _refill(self, state, now):
+        if state is None:
+            return {"requests": self.rpm, "tokens": self.tpm, "updated": now}
+        elapsed = max(0.0, now - state.get("updated", now))
+        return {
+            "requests": min(self.rpm, state.get("requests", self.rpm) + elapsed * self.rpm / 60.0),
+            "tokens": min(self.tpm, state.get("tokens", self.tpm) + elapsed * self.tpm / 60.0),
+            "updated": now,
+        }
+
+    def _try_take(self, tokens):
+        # A single call larger than the whole TPM bucket could never fit; let it through when the bucket is full
+        tokens = min(tokens, self.tpm) if self.tpm > 0 else 0
+
+        def take(state):
+            state = self._refill(state, time.time())
+            wait = 0.0
+            if self.rpm > 0 and state["requests"] < 1:
+                wait = max(wait, (1 - state["requests"]) * 60.0 / self.rpm)
+            if self.tpm > 0 and state["tokens"] < tokens:
+                wait = max(wait, (tokens - state["tokens"]) * 60.0 / self.tpm)
+            if wait == 0.0:
+                if self.rpm > 0:
+                    state["requests"] -= 1
+                state["tokens"] -= tokens
+            return state, wait
+
+        return self._backend.update(take)
+
+    def acquire(self, tokens=0, timeout=GEMINI_MAX_QUEUE_SECONDS):
+        """
+        Wait for quota for one request of roughly `tokens` tokens.
+
+        Args:
+            tokens (int): Estimated tokens the call will use
+            timeout (float, optional): Give up after waiting this many seconds
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: If quota did not free up within timeout
+        """
+        if self.rpm <= 0 and self.tpm <= 0:
+            return 0.0
+        start = time.monotonic()
+        with self._stats_lock:
+            self._waiting += 1
+        try:
+            while True:
+                wait = self._try_take(tokens)
+                waited = time.monotonic() - start
+                if wait == 0.0:
+                    break
+                if timeout is not None and waited + wait > timeout:
+                    with self._stats_lock:
+                        self._timeouts += 1
+                    raise RateLimitTimeout(f"Gemini quota not available after waiting {waited:.1f}s")
+                # Other callers (or processes) may get there first; re-check after a short sleep
+                time.sleep(min(wait, 1.0) + random.uniform(0, 0.05))
+        finally:
+            with self._stats_lock:
+                self._waiting -= 1
+
+        STAGE_SECONDS.observe(waited, stage="rate_limit_wait")
+        with self._stats_lock:
+            self._acquired += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+            self._last_wait = waited
+        return waited
+
+    def adjust(self, tokens):
+        """Correct the token bucket once the real usage of a call is known (positive = used more)."""
+        if self.tpm <= 0 or not tokens:
+            return
+
+        def correct(state):
+            state = self._refill(state, time.time())
+            state["tokens"] = min(self.tpm, state["tokens"] - tokens)
+            return state, None
+
+        self._backend.update(correct)
+
+    def record_retry(self):
+        LLM_RETRIES.inc()
+        with self._stats_lock:
+            self._retries += 1
+
+    def stats(self):
+        """Snapshot of limiter settings, current bucket levels and queue wait statistics."""
+        def peek(state):
+            state = self._refill(state, time.time())
+            return state, state
+
+        levels = self._backend.update(peek)
+        with self._stats_lock:
+            return {
+                "requests_per_minute": self.rpm,
+                "tokens_per_minute": self.tpm,
+                "available_requests": round(levels["requests"], 2),
+                "available_tokens": round(levels["tokens"]),
+                "shared_state_file": self.state_file,
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "retries": self._retries,
+                "timeouts": self._timeouts,
+                "last_wait_seconds": round(self._last_wait, 3),
+                "max_wait_seconds": round(self._max_wait, 3),
+                "average_wait_seconds": round(self._total_wait / self._acquired, 3) if self._acquired else 0.0,
+            }
+
+
+def call_with_retry(func, limiter=None, tokens=0, max_retries=GEMINI_MAX_RETRIES,
+                    base_delay=GEMINI_RETRY_BASE_SECONDS, max_delay=GEMINI_RETRY_MAX_SECONDS):
+    """
+    Call func() under the rate limiter, retrying retryable failures.
+
+    Each attempt first takes quota from the limiter. Retryable errors are
+    retried with exponential backoff and full jitter; anything else, or the
+    last failure, is raised to the caller.
+
+    Args:
+        func (callable): Zero-argument function making the API call
+        limiter (RateLimiter, optional): Limiter to draw quota from
+        tokens (int): Estimated tokens per attempt
+        max_retries (int): Retries after the first attempt
+        base_delay (float): Backoff for the first retry, in seconds
+        max_delay (float): Upper bound on a single backoff
+
+    Returns:
+        The return value of func()
+    """
+    attempt = 0
+    while True:
+        if limiter is not None:
+            limiter.acquire(tokens)
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            if limiter is not None:
+                limiter.record_retry()
+            logger.warning(f"Retryable Gemini error ({e}); retry {attempt}/{max_retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Get the process-wide Gemini rate limiter, configured from GEMINI_RPM,
+    GEMINI_TPM and GEMINI_RATE_LIMIT_FILE.
+
+    Returns:
+        RateLimiter: The shared limiter
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            state_file = GEMINI_RATE_LIMIT_FILE
+            if state_file.lower() in ("", "0", "off", "false", "no"):
+                state_file = None
+            _limiter = RateLimiter(GEMINI_RPM, GEMINI_TPM, state_file=state_file)
+        return _limiter
@@ -0,0 +1,124 @@
+import time
+import uuid
+import logging
+import threading
+from scraper import run_job_scraper_with_report, SCRAPER_SITES
+
+logger = logging.getLogger(__name__)
+
+
+def coalesce_key(params):
+    """Scrapes with the same search_term, location, hours_old and country are the same work."""
+    return (
+        str(params.get('search_term', '')).strip().lower(),
+        str(params.get('location', '')).strip().lower(),
+        int(params.get('hours_old', 72)),
+        str(params.get('country_indeed', 'USA')).strip().lower(),
+    )
+
+
+class ScrapeScheduler:
+    """
+    Runs job scrapes in the background instead of on request threads.
+
+    One-off scrapes are queued on a TaskManager; a request identical to one
+    already queued or running joins that task instead of starting another.
+    Recurring scrapes are kept in memory for this process and enqueued by a
+    daemon thread each time their interval elapses.
+    """
+
+    def __init__(self, task_manager, scrape_func=run_job_scraper_with_report, poll_seconds=30):
+        self.task_manager = task_manager
+        self.scrape_func = scrape_func
+        self.poll_seconds = poll_seconds
+        self._schedules = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def enqueue(self, params):
+        """
+        Queue a scrape, or join an identical one that has not finished yet.
+
+        Args:
+            params (dict): Keyword arguments for the scrape function
+
+        Returns:
+            tuple: (task, created) where created is False if the request was coalesced
+
+        Raises:
+            TaskQueueFull: If too many scrapes are already queued
+        """
+        params = dict(params)
+        sites = params.get('sites') or SCRAPER_SITES
+
+        def run_scrape(task):
+            task.set_progress(0, total=len(sites), message="Scraping started")
+            finished = []
+
+            def on_site_done(site, site_report):
+                finished.append(site)
+                task.set_progress(len(finished), message=f"{site}: {site_report['status']}")
+
+            return self.scrape_func(on_site_done=on_site_done, **params)
+
+        return self.task_manager.submit_unique(coalesce_key(params), 'scrape', run_scrape, params=params)
+
+    def add_schedule(self, params, interval_seconds, run_now=True):
+        """
+        Scrape with the same parameters every interval_seconds.
+
+        Returns:
+            dict: The schedule, including its id and next run time
+        """
+        schedule = {
+            "schedule_id": uuid.uuid4().hex,
+            "params": dict(params),
+            "interval_seconds": float(interval_seconds),
+            "next_run": time.time() if run_now else time.time() + float(interval_seconds),
+            "last_task_id": None,
+            "last_error": None,
+        }
+        with self._lock:
+            self._schedules[schedule["schedule_id"]] = schedule
+            self._ensure_thread()
+        self._wakeup.set()
+        return dict(schedule)
+
+    def remove_schedule(self, schedule_id):
+        with self._lock:
+            return self._schedules.pop(schedule_id, None) is not None
+
+    def list_schedules(self):
+        with self._lock:
+            return [dict(schedule) for schedule in self._schedules.values()]
+
+    def _ensure_thread(self):
+        # Caller must hold self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run_schedules, name="scrape-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run_schedules(self):
+        while True:
+            now = time.time()
+            with self._lock:
+                due = [s for s in self._schedules.values() if s["next_run"] <= now]
+                for schedule in due:
+                    # Skip missed runs rather than bursting to catch up
+                    while schedule["next_run"] <= now:
+                        schedule["next_run"] += schedule["interval_seconds"]
+                next_run = min((s["next_run"] for s in self._schedules.values()), default=now + self.poll_seconds)
+
+            for schedule in due:
+                try:
+                    task, created = self.enqueue(schedule["params"])
+                    schedule["last_task_id"] = task.id
+                    schedule["last_error"] = None
+                    logger.info(f"Scheduled scrape {schedule['schedule_id']} -> task {task.id} ({'new' if created else 'coalesced'})")
+                except Exception as e:
+                    schedule["last_error"] = str(e)
+                    logger.error(f"Scheduled scrape {schedule['schedule_id']} could not be queued: {e}")
+
+            self._wakeup.wait(max(0.0, min(next_run - time.time(), self.poll_seconds)))
+            self._wakeup.clear()
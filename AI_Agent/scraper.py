@@ -1,59 +1,212 @@
-import json
-import pandas as pd
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from jobspy import scrape_jobs
+from columnar import columnar_path_for
+from metrics import ERRORS, SCRAPE_LAST_ROWS, SCRAPE_ROWS, SCRAPE_SECONDS
+from job_store import DEFAULT_STORE_PATH, get_job_store
 
-def run_job_scraper(search_term, google_search_term, location, results_wanted, hours_old=72, country_indeed='USA'):
+SCRAPER_SITES = [site.strip() for site in os.getenv("SCRAPER_SITES", "indeed,linkedin,glassdoor").split(",") if site.strip()]
+# Each site gets this long before its results are given up on
+SITE_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_SITE_TIMEOUT_SECONDS", "120"))
+SITE_MAX_RETRIES = int(os.getenv("SCRAPER_SITE_MAX_RETRIES", "1"))
+SITE_RETRY_BACKOFF_SECONDS = float(os.getenv("SCRAPER_SITE_RETRY_BACKOFF_SECONDS", "2"))
+
+class SiteScrapeError(Exception):
+    """Raised by scrape_site() once a site has failed all its attempts."""
+
+    def __init__(self, message, attempts):
+        super().__init__(message)
+        self.attempts = attempts
+
+def scrape_site(site, max_retries=SITE_MAX_RETRIES, retry_backoff=SITE_RETRY_BACKOFF_SECONDS, deadline=None, **search_kwargs):
+    """
+    Scrape a single job board, retrying failed attempts with exponential backoff.
+
+    Args:
+        site (str): jobspy site name, e.g. 'indeed'
+        max_retries (int, optional): Extra attempts after the first failure
+        retry_backoff (float, optional): Seconds to wait before the first retry; doubles each time
+        deadline (float, optional): time.monotonic() value after which no retry is started
+        **search_kwargs: Passed through to jobspy.scrape_jobs
+
+    Returns:
+        tuple: (jobs DataFrame, number of attempts made)
+
+    Raises:
+        SiteScrapeError: If every attempt failed
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return scrape_jobs(site_name=[site], **search_kwargs), attempt
+        except Exception as e:
+            delay = retry_backoff * (2 ** (attempt - 1))
+            out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+            if attempt > max_retries or out_of_time:
+                raise SiteScrapeError(str(e), attempt) from e
+            print(f"Scraping {site} failed (attempt {attempt}): {str(e)}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def run_job_scraper_with_report(search_term, google_search_term, location, results_wanted, hours_old=72,
+                                country_indeed='USA', sites=None, site_timeout=SITE_TIMEOUT_SECONDS,
+                                max_retries=SITE_MAX_RETRIES, site_results_cap=None,
+                                csv_path="jobs.csv", store_path=DEFAULT_STORE_PATH, on_site_done=None):
     """
-    Run the job scraper with the provided parameters and save results to jobs.csv
+    Scrape every site concurrently and merge each site's results into the job store
+    as soon as they arrive, then re-export jobs.csv
     
     Args:
         search_term (str): The job title to search for
         google_search_term (str): The full search query for Google
         location (str): The location to search for jobs
-        results_wanted (int): Number of job results to fetch
+        results_wanted (int): Number of job results to fetch per site
         hours_old (int, optional): How recent the jobs should be. Defaults to 72.
         country_indeed (str, optional): Country for Indeed search. Defaults to 'USA'.
+        sites (list, optional): jobspy site names. Defaults to SCRAPER_SITES.
+        site_timeout (float, optional): Seconds to wait for each site before giving up on it
+        max_retries (int, optional): Retries per site after a failed attempt
+        site_results_cap (dict, optional): Site name -> maximum rows kept from that site
+        csv_path (str, optional): Catalog CSV to export. Defaults to 'jobs.csv'.
+        store_path (str, optional): SQLite job store to merge into. Defaults to JOB_STORE_PATH.
+        on_site_done (callable, optional): Called as on_site_done(site, site_report) when
+            each site finishes, fails or times out
         
     Returns:
-        int: Number of jobs found, 0 if no jobs found, -1 if error occurred
+        dict: 'jobs_found' (total rows, -1 if every site failed) and 'sites', a
+            per-site dict of status ('ok', 'error' or 'timeout'), jobs, attempts,
+            seconds and error
     """
+    sites = list(sites or SCRAPER_SITES)
+    site_results_cap = site_results_cap or {}
+    report = {"jobs_found": 0, "sites": {site: {"status": "pending", "jobs": 0, "attempts": 0, "seconds": None, "error": None} for site in sites}}
+
     try:
-        jobs = scrape_jobs(
-            site_name=["indeed", "linkedin", "glassdoor"],
-            search_term=search_term,
-            google_search_term=google_search_term,
-            location=location,
-            results_wanted=int(results_wanted),
-            hours_old=hours_old,
-            country_indeed=country_indeed,
-        )
-        
-        # Save to CSV
-        jobs_count = len(jobs)
-        if jobs_count > 0:
-            jobs.to_csv("jobs.csv", index=False)
-            return jobs_count
-        else:
-            # Create empty DataFrame with headers and save it
-            empty_df = pd.DataFrame(columns=[
-                'job_id', 'site', 'url', 'query', 'title', 'company', 'location', 
-                'date_posted', 'salary', 'description', 'extensions'
-            ])
-            empty_df.to_csv("jobs.csv", index=False)
-            return 0
-            
+        store = get_job_store(store_path)
+        if store.count() == 0:
+            # First run with a store: keep the catalog scraped before it existed
+            seeded = store.import_csv(csv_path)
+            if seeded:
+                print(f"Seeded job store from {csv_path}: {seeded}")
     except Exception as e:
         print(f"Error in job scraper: {str(e)}")
-        # Create empty DataFrame with headers on error
-        try:
-            empty_df = pd.DataFrame(columns=[
-                'job_id', 'site', 'url', 'query', 'title', 'company', 'location', 
-                'date_posted', 'salary', 'description', 'extensions'
-            ])
-            empty_df.to_csv("jobs.csv", index=False)
-        except:
-            pass
-        return -1
+        report["jobs_found"] = -1
+        return report
+
+    search_kwargs = dict(
+        search_term=search_term,
+        google_search_term=google_search_term,
+        location=location,
+        results_wanted=int(results_wanted),
+        hours_old=hours_old,
+        country_indeed=country_indeed,
+    )
+    started = time.monotonic()
+    deadline = started + site_timeout
+    # Not used as a context manager: a hung site must not block the return
+    executor = ThreadPoolExecutor(max_workers=len(sites), thread_name_prefix="scraper")
+    futures = {
+        executor.submit(scrape_site, site, max_retries=max_retries, deadline=deadline, **search_kwargs): site
+        for site in sites
+    }
+
+    changed_rows = 0  # Postings inserted or changed by this scrape
+    try:
+        for future in as_completed(futures, timeout=site_timeout):
+            site = futures[future]
+            site_report = report["sites"][site]
+            site_report["seconds"] = round(time.monotonic() - started, 2)
+            try:
+                jobs, attempts = future.result()
+            except Exception as e:
+                site_report.update(status="error", error=str(e), attempts=getattr(e, 'attempts', 1))
+                print(f"Error scraping {site}: {str(e)}")
+                if on_site_done:
+                    on_site_done(site, site_report)
+                continue
+
+            cap = site_results_cap.get(site)
+            if cap is not None:
+                jobs = jobs.head(int(cap))
+            site_report.update(status="ok", jobs=len(jobs), attempts=attempts)
+            report["jobs_found"] += len(jobs)
+
+            # Merge this site's postings right away; previously scraped postings are kept
+            if len(jobs) > 0:
+                try:
+                    counts = store.upsert(jobs)
+                    changed_rows += counts["inserted"] + counts["updated"]
+                    print(f"Job store updated from {site}: {counts}")
+                except Exception as e:
+                    site_report.update(status="error", error=f"Could not store results: {str(e)}")
+            if on_site_done:
+                on_site_done(site, site_report)
+    except FuturesTimeoutError:
+        for future, site in futures.items():
+            if not future.done():
+                report["sites"][site].update(status="timeout", seconds=site_timeout,
+                                             error=f"No response within {site_timeout}s")
+                future.cancel()
+                print(f"Scraping {site} timed out after {site_timeout}s")
+                if on_site_done:
+                    on_site_done(site, report["sites"][site])
+    finally:
+        executor.shutdown(wait=False)
+
+    for site, site_report in report["sites"].items():
+        SCRAPE_SECONDS.observe(site_report["seconds"] or 0, site=site, status=site_report["status"])
+        if site_report["status"] == "ok":
+            SCRAPE_ROWS.inc(site_report["jobs"], site=site)
+            SCRAPE_LAST_ROWS.set(site_report["jobs"], site=site)
+        else:
+            ERRORS.inc(stage="scrape", type=site_report["status"])
+
+    if all(site_report["status"] != "ok" for site_report in report["sites"].values()):
+        # jobs.csv and the store are left as they were
+        report["jobs_found"] = -1
+        return report
+
+    try:
+        expired = store.expire()
+        if expired:
+            print(f"{expired} stale posting(s) expired")
+        # Rewrite the exported catalog only when its contents changed
+        if changed_rows or expired or not os.path.exists(csv_path):
+            jobs_df = store.to_dataframe()
+            store.export_csv(csv_path, jobs_df=jobs_df)
+            # Written after the CSV so the catalog prefers it
+            store.export_columnar(columnar_path_for(csv_path), jobs_df=jobs_df)
+        else:
+            print(f"No postings added, changed or expired; {csv_path} left as it was")
+    except Exception as e:
+        print(f"Error exporting {csv_path}: {str(e)}")
+        report["jobs_found"] = -1
+    return report
+
+def run_job_scraper(search_term, google_search_term, location, results_wanted, hours_old=72, country_indeed='USA',
+                    csv_path="jobs.csv", store_path=DEFAULT_STORE_PATH):
+    """
+    Run the job scraper with the provided parameters, merge the results into the
+    job store and re-export jobs.csv from it
+    
+    Args:
+        search_term (str): The job title to search for
+        google_search_term (str): The full search query for Google
+        location (str): The location to search for jobs
+        results_wanted (int): Number of job results to fetch
+        hours_old (int, optional): How recent the jobs should be. Defaults to 72.
+        country_indeed (str, optional): Country for Indeed search. Defaults to 'USA'.
+        csv_path (str, optional): Catalog CSV to export. Defaults to 'jobs.csv'.
+        store_path (str, optional): SQLite job store to merge into. Defaults to JOB_STORE_PATH.
+        
+    Returns:
+        int: Number of jobs found, 0 if no jobs found, -1 if error occurred
+    """
+    return run_job_scraper_with_report(
+        search_term, google_search_term, location, results_wanted, hours_old=hours_old,
+        country_indeed=country_indeed, csv_path=csv_path, store_path=store_path
+    )["jobs_found"]
 
 # The original direct call is commented out
 # jobs = scrape_jobs(
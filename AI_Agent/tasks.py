@@ -0,0 +1,271 @@
+import os
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Task states
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED_STATES = (COMPLETED, FAILED, CANCELLED)
+
+
+class TaskQueueFull(Exception):
+    """Raised when a TaskManager already holds its maximum number of unfinished tasks."""
+
+
+class Task:
+    """
+    A unit of background work with progress, partial results and an event log.
+
+    The worker function receives the Task and reports through add_result() /
+    set_progress(); readers poll to_dict() or follow events with wait_for_events().
+    """
+
+    def __init__(self, kind, total=0, params=None, key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.key = key
+        self.params = params or {}
+        self.status = QUEUED
+        self.total = total
+        self.completed = 0
+        self.results = [None] * total
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self._events = []
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def _emit(self, event, data):
+        # Caller must hold self._condition
+        self._events.append((event, data))
+        self._condition.notify_all()
+
+    def set_status(self, status, error=None):
+        with self._condition:
+            self.status = status
+            if status == RUNNING:
+                self.started_at = time.time()
+            if status in FINISHED_STATES:
+                self.finished_at = time.time()
+            if error is not None:
+                self.error = error
+            self._emit('status', {"status": status, "error": self.error})
+
+    def set_progress(self, completed, total=None, message=None):
+        with self._condition:
+            self.completed = completed
+            if total is not None:
+                self.total = total
+            self._emit('progress', {"completed": self.completed, "total": self.total, "message": message})
+
+    def add_result(self, position, result):
+        """Record the result for one item of the batch and publish it to followers."""
+        with self._condition:
+            if position >= len(self.results):
+                self.results.extend([None] * (position + 1 - len(self.results)))
+            self.results[position] = result
+            self.completed += 1
+            self._emit('result', {"position": position, "result": result})
+            self._emit('progress', {"completed": self.completed, "total": self.total})
+
+    def add_event(self, event, data):
+        """Publish an intermediate event (e.g. a partial result) to followers."""
+        with self._condition:
+            self._emit(event, data)
+
+    def cancel(self):
+        """Ask the worker to stop; work already in flight still finishes."""
+        self.cancel_event.set()
+        with self._condition:
+            if self.status == QUEUED:
+                self.status = CANCELLED
+                self.finished_at = time.time()
+                self._emit('status', {"status": CANCELLED, "error": None})
+
+    def wait_for_events(self, after, timeout=None):
+        """
+        Block until there are events past index `after` or the task finishes.
+
+        Args:
+            after (int): Number of events the caller has already seen
+            timeout (float, optional): Seconds to wait before returning empty-handed
+
+        Returns:
+            list: (index, event, data) tuples newer than `after`
+        """
+        with self._condition:
+            if len(self._events) <= after and not self.finished:
+                self._condition.wait(timeout)
+            return [(after + offset, event, data) for offset, (event, data) in enumerate(self._events[after:])]
+
+    def to_dict(self, include_results=True):
+        with self._condition:
+            data = {
+                "task_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": {"completed": self.completed, "total": self.total},
+                "params": self.params,
+                "error": self.error,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+            if include_results:
+                data["results"] = list(self.results)
+                if self.result is not None:
+                    data["result"] = self.result
+            return data
+
+
+class TaskManager:
+    """
+    Runs Tasks on a small background thread pool and keeps them for a bounded time.
+
+    Finished tasks are dropped after retention_seconds, and the oldest finished
+    tasks are dropped once more than max_retained are held.
+    """
+
+    def __init__(self, max_workers=2, max_pending=100, max_retained=500, retention_seconds=3600, name="tasks"):
+        self.max_pending = max_pending
+        self.max_retained = max_retained
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._tasks = {}
+        self._active_keys = {}  # coalescing key -> id of the unfinished task for it
+        self._lock = threading.Lock()
+
+    def submit(self, kind, func, total=0, params=None, cleanup=None):
+        """
+        Queue func(task) to run in the background.
+
+        Args:
+            kind (str): Label for the type of work, e.g. 'evaluation'
+            func (callable): Worker called with the Task; its return value becomes task.result
+            total (int, optional): Number of items the task will report results for
+            params (dict, optional): JSON-serialisable description of the request
+            cleanup (callable, optional): Called with no arguments once the task is over,
+                whether it ran, failed or was cancelled before starting; e.g. to release
+                the uploads func would have consumed
+
+        Returns:
+            Task: The queued task
+
+        Raises:
+            TaskQueueFull: If too many tasks are already waiting or running
+        """
+        task, _ = self._submit(kind, func, total, params, key=None, cleanup=cleanup)
+        return task
+
+    def submit_unique(self, key, kind, func, total=0, params=None, cleanup=None):
+        """
+        Like submit(), but coalesce with an identical unfinished task.
+
+        Args:
+            key (hashable): Identity of the work; tasks with equal keys are the same work
+
+        Returns:
+            tuple: (task, created) where created is False if an existing task was reused
+        """
+        return self._submit(kind, func, total, params, key=key, cleanup=cleanup)
+
+    def _submit(self, kind, func, total, params, key, cleanup=None):
+        with self._lock:
+            self._prune()
+            if key is not None:
+                existing = self._tasks.get(self._active_keys.get(key))
+                if existing is not None and not existing.finished:
+                    return existing, False
+            unfinished = sum(1 for t in self._tasks.values() if not t.finished)
+            if unfinished >= self.max_pending:
+                raise TaskQueueFull(f"{unfinished} tasks are already queued or running")
+            task = Task(kind, total=total, params=params, key=key)
+            self._tasks[task.id] = task
+            if key is not None:
+                self._active_keys[key] = task.id
+        # The task runs in the submitting request's context (and so logs with its request id)
+        self._executor.submit(contextvars.copy_context().run, self._run, task, func, cleanup)
+        return task, True
+
+    def _run(self, task, func, cleanup=None):
+        try:
+            if task.cancel_event.is_set():
+                return
+            task.set_status(RUNNING)
+            try:
+                result = func(task)
+            except Exception as e:
+                logger.error(f"Background {task.kind} task {task.id} failed: {e}")
+                task.set_status(FAILED, error=str(e))
+                return
+            task.result = result
+            task.set_status(CANCELLED if task.cancel_event.is_set() else COMPLETED)
+        finally:
+            if cleanup is not None:
+                try:
+                    cleanup()
+                except Exception as e:
+                    logger.error(f"Cleanup of background {task.kind} task {task.id} failed: {e}")
+
+    def get(self, task_id):
+        with self._lock:
+            self._prune()
+            return self._tasks.get(task_id)
+
+    def list(self, kind=None):
+        with self._lock:
+            self._prune()
+            return [task for task in self._tasks.values() if kind is None or task.kind == kind]
+
+    def cancel(self, task_id):
+        """Cancel a task by id. Returns the Task, or None if it is unknown."""
+        task = self.get(task_id)
+        if task is not None:
+            task.cancel()
+        return task
+
+    def _prune(self):
+        # Caller must hold self._lock
+        now = time.time()
+        finished = sorted(
+            (task for task in self._tasks.values() if task.finished),
+            key=lambda task: task.finished_at or 0
+        )
+        excess = len(self._tasks) - self.max_retained
+        for task in finished:
+            if excess > 0 or now - (task.finished_at or now) > self.retention_seconds:
+                del self._tasks[task.id]
+                if task.key is not None and self._active_keys.get(task.key) == task.id:
+                    del self._active_keys[task.key]
+                excess -= 1
+
+
+def task_manager_from_env(prefix, name, max_workers=2):
+    """
+    Build a TaskManager configured from <prefix>_WORKERS, <prefix>_MAX_PENDING,
+    <prefix>_MAX_RETAINED and <prefix>_RETENTION_SECONDS environment variables.
+    """
+    return TaskManager(
+        max_workers=int(os.getenv(f"{prefix}_WORKERS", str(max_workers))),
+        max_pending=int(os.getenv(f"{prefix}_MAX_PENDING", "100")),
+        max_retained=int(os.getenv(f"{prefix}_MAX_RETAINED", "500")),
+        retention_seconds=float(os.getenv(f"{prefix}_RETENTION_SECONDS", "3600")),
+        name=name,
+    )
@@ -0,0 +1,237 @@
+import os
+import tarfile
+import zlib
+import zipfile
+import tempfile
+import threading
+from werkzeug.utils import secure_filename
+
+# Uploads larger than this are spooled to a temporary file instead of being kept in memory
+UPLOAD_SPOOL_THRESHOLD_BYTES = int(float(os.getenv("UPLOAD_SPOOL_THRESHOLD_MB", "1")) * 1024 * 1024)
+# In-memory spools of one request together never hold more than this; later ones go to disk
+UPLOAD_MEMORY_BUDGET_BYTES = int(float(os.getenv("UPLOAD_MEMORY_BUDGET_MB", "16")) * 1024 * 1024)
+# Largest single resume, uploaded directly or inside an archive
+MAX_RESUME_FILE_BYTES = int(float(os.getenv("MAX_RESUME_FILE_MB", "10")) * 1024 * 1024)
+# Largest request body, all files together (enforced by Flask's MAX_CONTENT_LENGTH)
+MAX_REQUEST_BYTES = int(float(os.getenv("MAX_REQUEST_MB", "200")) * 1024 * 1024)
+# Uploads whose bytes are loaded for text extraction at the same time
+EXTRACT_BATCH_BYTES = int(float(os.getenv("EXTRACT_BATCH_MB", "32")) * 1024 * 1024)
+# Limits on what one archive may expand to, whatever its compressed size
+MAX_ARCHIVE_MEMBERS = int(os.getenv("MAX_ARCHIVE_MEMBERS", "500"))
+MAX_ARCHIVE_UNPACKED_BYTES = int(float(os.getenv("MAX_ARCHIVE_UNPACKED_MB", "500")) * 1024 * 1024)
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+COPY_CHUNK_BYTES = 64 * 1024
+
+
+def format_size(size):
+    return f"{size / (1024 * 1024):.3g} MB"
+
+
+class UploadTooLarge(Exception):
+    """Raised when a file grows past its size limit while it is being copied."""
+
+
+def archive_extension(filename):
+    """The archive extension of a filename ('.zip', '.tar.gz', ...), or None."""
+    lowered = (filename or "").lower()
+    for extension in ARCHIVE_EXTENSIONS:
+        if lowered.endswith(extension):
+            return extension
+    return None
+
+
+class SpooledUpload:
+    """
+    One uploaded file, copied out of the request into a spooled temporary file.
+
+    Small files stay in memory; larger ones (or any once the request's memory
+    budget is used up) live on disk. The bytes are only loaded by read(), so
+    a batch can be processed a few files at a time.
+    """
+
+    def __init__(self, budget=None):
+        self._file = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_THRESHOLD_BYTES)
+        self._budget = budget
+        self.size = 0
+
+    @property
+    def in_memory(self):
+        return not getattr(self._file, "_rolled", True)
+
+    def copy_from(self, stream, limit=MAX_RESUME_FILE_BYTES):
+        """
+        Copy a stream into the spool in chunks.
+
+        Raises:
+            UploadTooLarge: If the stream holds more than limit bytes
+        """
+        while True:
+            chunk = stream.read(COPY_CHUNK_BYTES)
+            if not chunk:
+                break
+            self.size += len(chunk)
+            if self.size > limit:
+                raise UploadTooLarge(f"File is larger than the {format_size(limit)} limit.")
+            self._file.write(chunk)
+        if self.in_memory and self._budget is not None and not self._budget.reserve(self.size):
+            self._file.rollover()
+        return self
+
+    def read(self):
+        """Load the whole file. Only call this for files about to be processed."""
+        self._file.seek(0)
+        return self._file.read()
+
+    def close(self):
+        """Release the spool; safe to call more than once."""
+        if self._file.closed:
+            return
+        if self.in_memory and self._budget is not None:
+            self._budget.release(self.size)
+        self._file.close()
+
+
+class MemoryBudget:
+    """Bytes of uploads one request may keep in memory."""
+
+    def __init__(self, limit=UPLOAD_MEMORY_BUDGET_BYTES):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.used = max(0, self.used - size)
+
+
+def _spool(stream, candidate, budget, limit=MAX_RESUME_FILE_BYTES):
+    # (candidate, SpooledUpload, None), or (candidate, None, error) if the file is too large
+    upload = SpooledUpload(budget)
+    try:
+        return candidate, upload.copy_from(stream, limit), None
+    except UploadTooLarge as e:
+        upload.close()
+        return candidate, None, str(e)
+    except Exception:
+        # e.g. a corrupt archive member; the caller reports it
+        upload.close()
+        raise
+
+
+def _zip_members(stream):
+    # zipfile needs to seek; uploads are already in a (temporary) file
+    with zipfile.ZipFile(stream) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            with archive.open(info) as member:
+                yield info.filename, info.file_size, member
+
+
+def _tar_members(stream):
+    # Stream mode: members are read in order without seeking back
+    with tarfile.open(fileobj=stream, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile():
+                continue
+            yield info.name, info.size, archive.extractfile(info)
+
+
+def iter_archive_uploads(stream, archive_name, allowed_extensions, budget=None):
+    """
+    Unpack an uploaded ZIP or TAR archive one member at a time.
+
+    Each member is copied into its own spool as it is reached, so only one
+    member is ever being read. Directories and hidden or macOS metadata files
+    are skipped. Members are limited in number, in size (MAX_RESUME_FILE_BYTES)
+    and in total unpacked size; once a limit is hit, unpacking stops with an
+    error entry.
+
+    Args:
+        stream (file): Readable archive contents
+        archive_name (str): Uploaded filename, used to name the members
+        allowed_extensions (tuple): Resume extensions to keep; other members become error entries
+        budget (MemoryBudget, optional): Memory budget shared by the request's spools
+
+    Yields:
+        tuple: (candidate, SpooledUpload or None, error or None) per member
+    """
+    extension = archive_extension(archive_name)
+    members = _zip_members(stream) if extension == '.zip' else _tar_members(stream)
+    count = 0
+    unpacked = 0
+    try:
+        for name, declared_size, member in members:
+            basename = os.path.basename(name)
+            if not basename or basename.startswith('.') or name.startswith('__MACOSX/'):
+                continue
+            candidate = f"{archive_name}/{secure_filename(basename)}"
+            count += 1
+            if count > MAX_ARCHIVE_MEMBERS:
+                yield archive_name, None, f"Archive has more than {MAX_ARCHIVE_MEMBERS} files; the rest were not processed."
+                return
+            if os.path.splitext(basename)[1].lower() not in allowed_extensions:
+                yield candidate, None, f"Unsupported file type. Please upload {' or '.join(allowed_extensions)}."
+                continue
+            if declared_size > MAX_RESUME_FILE_BYTES:
+                yield candidate, None, f"File is larger than the {format_size(MAX_RESUME_FILE_BYTES)} limit."
+                continue
+            remaining = MAX_ARCHIVE_UNPACKED_BYTES - unpacked
+            if remaining <= 0:
+                yield archive_name, None, f"Archive unpacks to more than {format_size(MAX_ARCHIVE_UNPACKED_BYTES)}; the rest was not processed."
+                return
+            entry = _spool(member, candidate, budget, limit=min(MAX_RESUME_FILE_BYTES, remaining))
+            if entry[1] is None and remaining < MAX_RESUME_FILE_BYTES:
+                yield archive_name, None, f"Archive unpacks to more than {format_size(MAX_ARCHIVE_UNPACKED_BYTES)}; the rest was not processed."
+                return
+            if entry[1] is not None:
+                unpacked += entry[1].size
+            yield entry
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError, zlib.error,
+            RuntimeError, NotImplementedError) as e:
+        # Corrupt compressed data, encrypted members and unsupported compression methods
+        yield archive_name, None, f"Could not read archive: {e}"
+
+
+def spool_uploads(file_storages, allowed_extensions, budget=None):
+    """
+    Copy a request's uploaded files (and the contents of uploaded archives) out of the request.
+
+    Args:
+        file_storages (list): werkzeug FileStorage objects from request.files
+        allowed_extensions (tuple): Accepted resume extensions, e.g. ('.pdf', '.txt')
+        budget (MemoryBudget, optional): Shared in-memory limit. Defaults to a new
+            budget of UPLOAD_MEMORY_BUDGET_BYTES.
+
+    Returns:
+        list: (candidate, SpooledUpload or None, error or None) tuples; close them with close_uploads()
+    """
+    budget = budget or MemoryBudget()
+    uploads = []
+    for file_storage in file_storages:
+        if not file_storage or not file_storage.filename:
+            uploads.append(("Unknown or empty file", None, "File could not be processed."))
+            continue
+        filename = secure_filename(file_storage.filename)
+        if archive_extension(filename):
+            uploads.extend(iter_archive_uploads(file_storage.stream, filename, allowed_extensions, budget))
+        elif os.path.splitext(filename)[1].lower() not in allowed_extensions:
+            uploads.append((filename, None, f"Unsupported file type. Please upload {' or '.join(allowed_extensions)}."))
+        else:
+            uploads.append(_spool(file_storage.stream, filename, budget))
+    return uploads
+
+
+def close_uploads(uploads):
+    """Release the spools of (candidate, upload, error) tuples."""
+    for _, upload, _ in uploads:
+        if upload is not None and hasattr(upload, 'close'):
+            upload.close()
@@ -0,0 +1,111 @@
+import os
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Process-wide cap on concurrent evaluations (shared by every request)
+MAX_EVALUATION_WORKERS = int(os.getenv("MAX_EVALUATION_WORKERS", "8"))
+# Default per-request cap when the caller does not ask for one
+DEFAULT_REQUEST_CONCURRENCY = int(os.getenv("DEFAULT_REQUEST_CONCURRENCY", "4"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_evaluation_executor():
+    """
+    Get the shared thread pool used for resume evaluations.
+
+    The pool size is the process-wide concurrency cap, so concurrent requests
+    queue behind each other instead of multiplying the number of Gemini calls.
+
+    Returns:
+        ThreadPoolExecutor: The process-wide evaluation pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=max(1, MAX_EVALUATION_WORKERS),
+                thread_name_prefix="evaluation"
+            )
+        return _executor
+
+
+def clamp_concurrency(requested=None):
+    """
+    Turn a requested per-request concurrency into a usable value.
+
+    Args:
+        requested (int, optional): Concurrency asked for by the caller
+
+    Returns:
+        int: A value between 1 and MAX_EVALUATION_WORKERS
+    """
+    if requested is None:
+        requested = DEFAULT_REQUEST_CONCURRENCY
+    return max(1, min(int(requested), max(1, MAX_EVALUATION_WORKERS)))
+
+
+def iter_bounded(func, items, max_concurrency=None, executor=None, cancel_event=None):
+    """
+    Run func(item) for every item with at most max_concurrency calls in flight.
+
+    Exceptions raised by func are captured per item, so one failure never
+    affects the other items.
+
+    Args:
+        func (callable): Function to call with each item
+        items (iterable): Items to process
+        max_concurrency (int, optional): Per-call cap on in-flight items
+        executor (Executor, optional): Pool to run on. Defaults to the shared evaluation pool.
+        cancel_event (threading.Event, optional): Once set, no further items are started;
+            items already in flight still finish and are yielded
+
+    Yields:
+        tuple: (index, result, exception) in completion order; exactly one of
+            result/exception is meaningful
+    """
+    executor = executor or get_evaluation_executor()
+    limit = clamp_concurrency(max_concurrency)
+    pending = {}
+    iterator = iter(enumerate(items))
+    exhausted = False
+
+    while True:
+        # Keep the window full
+        while not exhausted and len(pending) < limit:
+            if cancel_event is not None and cancel_event.is_set():
+                exhausted = True
+                break
+            try:
+                index, item = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            # Run in a copy of the caller's context so its request id follows the work into the pool
+            pending[executor.submit(contextvars.copy_context().run, func, item)] = index
+
+        if not pending:
+            return
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            index = pending.pop(future)
+            error = future.exception()
+            yield index, (None if error else future.result()), error
+
+
+def map_bounded(func, items, max_concurrency=None, executor=None, cancel_event=None):
+    """
+    Like iter_bounded(), but wait for everything and return results in input order.
+
+    Returns:
+        list: (result, exception) tuples, one per item, in the original order;
+            None for items skipped because of cancellation
+    """
+    items = list(items)
+    results = [None] * len(items)
+    for index, result, error in iter_bounded(func, items, max_concurrency, executor, cancel_event):
+        results[index] = (result, error)
+    return results